@@ -6,6 +6,15 @@ function of time traces.
 """
 
 from ..timeTrace import CollectAndCalcTimeTrace
+from ..collectAndCalcHelpers import (polFluct,\
+                                     iterCollect,\
+                                     calcDerivedVariables,\
+                                     getBaseVariables,\
+                                     slicesToIndices,\
+                                     getHistogramEdges,\
+                                     accumulateHistograms,\
+                                     histogramDensity,\
+                                     )
 import numpy as np
 
 #{{{CollectAndCalcPDF
@@ -41,6 +50,237 @@ class CollectAndCalcPDF(CollectAndCalcTimeTrace):
         super().__init__(*args, **kwargs)
     #}}}
 
+    #{{{executeCollectAndCalcPDF
+    def executeCollectAndCalcPDF(self              ,\
+                                 chunkSize = 1000  ,\
+                                 bins      = "sqrt",\
+                                 calcStats = False ,\
+                                ):
+        #{{{docstring
+        """
+        Function which collects the time traces in blocks of time and
+        calculates the probability density functions.
+
+        Contrary to executeCollectAndCalc followed by calcPDF, the full
+        time traces are never held in memory:
+            * A first pass over the blocks finds the range of the traces,
+              which gives the bin edges
+            * A second pass accumulates the histograms
+        All the points with the same time are binned at once.
+        The PDFs equals those of calcPDF.
+
+        Parameters
+        ----------
+        chunkSize : int
+            The number of time points in each block.
+        bins : ["sqrt"|int]
+            The number of bins (see getHistogramEdges).
+        calcStats : bool
+            Whether or not to calculate the skewness and the excess
+            kurtosis (as given by scipy.stats.skew and
+            scipy.stats.kurtosis) in the second pass.
+
+        Returns
+        -------
+        PDF : dict
+            Dictionary where the keys are on the form "rho,theta,z".
+            The value is a dict containing of
+            {varPDFX:pdfX, varPDFY:pdfY}
+        PDFStats : dict
+            Only returned if calcStats is True.
+            Dictionary where the keys are on the form "rho,theta,z".
+            The value is a dict containing of
+            {"skew":skewness, "kurtExcess":excessKurtosis}
+        """
+        #}}}
+
+        # Guard
+        if len(self._notCalled) > 0:
+            message = "The following functions were not called:\n{}".\
+                        format("\n".join(self._notCalled))
+            raise RuntimeError(message)
+
+        # Make sure zInd is not None
+        self._zInd =\
+            tuple(zInd if zInd is not None else 0 for zInd in self._zInd)
+
+        # Initialize the output, the points are grouped by the time
+        PDF      = {}
+        PDFStats = {}
+        groups   = {}
+        for tCounter, (x, y, z) in enumerate(zip(self._xInd,\
+                                                 self._yInd,\
+                                                 self._zInd)):
+            # NOTE: The indices
+            rho   = self._dh.rho     [x]
+            theta = self._dh.thetaDeg[z]
+            par   = self._dh.z       [y]
+
+            key = "{},{},{}".format(rho,theta,par)
+            PDF[key] = {}
+
+            # NOTE: The indices contains the step of the slice, so only
+            #       the kept time points are read
+            if self._tSlice is not None:
+                t = slicesToIndices(self._collectPaths,\
+                                    self._tSlice[tCounter], "t")
+            else:
+                t = None
+
+            groups.setdefault(t, []).append((key, (x, y, z)))
+
+        for t, group in groups.items():
+            keys, points = zip(*group)
+
+            # First pass: The range of the traces
+            minVal   = None
+            maxVal   = None
+            total    = 0
+            nSamples = 0
+            for block in self._iterBlocks(points, t, chunkSize):
+                if minVal is None:
+                    minVal = block.min(axis=0)
+                    maxVal = block.max(axis=0)
+                else:
+                    minVal = np.minimum(minVal, block.min(axis=0))
+                    maxVal = np.maximum(maxVal, block.max(axis=0))
+                total    += block.sum(axis=0)
+                nSamples += block.shape[0]
+
+            edges = getHistogramEdges(minVal, maxVal, nSamples, bins)
+            mean  = total/nSamples
+
+            # Second pass: The histograms and the central moments
+            counts  = None
+            moments = np.zeros((3, len(points)))
+            for block in self._iterBlocks(points, t, chunkSize):
+                counts = accumulateHistograms(block, edges, counts)
+                if calcStats:
+                    deviation   = block - mean
+                    moments[0] += (deviation**2).sum(axis=0)
+                    moments[1] += (deviation**3).sum(axis=0)
+                    moments[2] += (deviation**4).sum(axis=0)
+
+            PDF.update(self._makePDF(keys, self._varName, counts, edges))
+
+            if calcStats:
+                m2, m3, m4 = moments/nSamples
+                # NOTE: As in scipy.stats, the moments of constant traces
+                #       are not defined
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    zero = m2 <= (np.finfo(m2.dtype).eps*mean)**2
+                    skew = np.where(zero, np.nan, m3/m2**1.5)
+                    kurt = np.where(zero, np.nan, m4/m2**2.0 - 3)
+                for nr, key in enumerate(keys):
+                    PDFStats[key] = {"skew":skew[nr], "kurtExcess":kurt[nr]}
+
+        # NOTE: If the time traces are converted to physical units, then
+        #       PDF is in physical units as well
+        if calcStats:
+            return PDF, PDFStats
+        else:
+            return PDF
+    #}}}
+
+    #{{{_iterBlocks
+    def _iterBlocks(self, points, t, chunkSize):
+        #{{{docstring
+        """
+        Iterates over the time traces of the points in blocks of time.
+
+        The window bounding all the points is collected, so that the
+        traces of all the points are read at once.
+
+        Parameters
+        ----------
+        points : tuple
+            Tuple of the (x, y, z) indices of the points.
+        t : [None|tuple]
+            The collect-like slice in t
+        chunkSize : int
+            The number of time points in each block.
+
+        Yields
+        ------
+        block : array-2d
+            The time traces on the form (t, point).
+        """
+        #}}}
+
+        xs, ys, zs = (np.array(ind) for ind in zip(*points))
+        xInd = (int(xs.min()), int(xs.max()))
+        yInd = (int(ys.min()), int(ys.max()))
+        if self._mode == "fluct":
+            # The whole poloidal profile is needed for the average
+            zInd = None
+            zMin = 0
+        else:
+            zInd = (int(zs.min()), int(zs.max()))
+            zMin = zInd[0]
+
+        # NOTE: The collected variables are normalized
+        baseVars = getBaseVariables((self._varName,))
+        for _, data in iterCollect(self._collectPaths,\
+                                   baseVars,\
+                                   chunkSize,\
+                                   tInd = t,\
+                                   xInd = xInd,\
+                                   yInd = yInd,\
+                                   zInd = zInd):
+            var = calcDerivedVariables((self._varName,), data)[self._varName]
+
+            if self._mode == "fluct":
+                var = polFluct(var)
+
+            block = var[:, xs - xInd[0], ys - yInd[0], zs - zMin]
+
+            if self.uc.convertToPhysical:
+                block = self.uc.physicalConversion(block, self._varName)
+
+            yield block
+    #}}}
+
+    @staticmethod
+    #{{{_makePDF
+    def _makePDF(keys, varName, counts, edges):
+        #{{{docstring
+        """
+        Makes the PDF dict from the accumulated histograms.
+
+        Parameters
+        ----------
+        keys : tuple
+            The keys of the traces on the form "rho,theta,z".
+        varName : str
+            The variable name.
+        counts : array-2d
+            The counts on the form (trace, bin).
+        edges : tuple
+            The bin edges of each trace.
+
+        Returns
+        -------
+        PDF : dict
+            Dictionary where the keys are on the form "rho,theta,z".
+            The value is a dict containing of
+            {varPDFX:pdfX, varPDFY:pdfY}
+        """
+        #}}}
+
+        # Make the keys
+        xKey = "{}PDFX".format(varName)
+        yKey = "{}PDFY".format(varName)
+
+        PDF     = {}
+        density = histogramDensity(counts, edges)
+        for key, pdfY, edge in zip(keys, density, edges):
+            # Only the bin edges are saved. Interpolate to bin center
+            PDF[key] = {xKey : 0.5*(edge[:-1] + edge[1:]),\
+                        yKey : pdfY}
+
+        return PDF
+    #}}}
+
     @staticmethod
     #{{{calcPDF
     def calcPDF(timeTraces):
@@ -75,31 +315,27 @@ class CollectAndCalcPDF(CollectAndCalcTimeTrace):
         keys = timeTraces[ind].keys()
         varName = tuple(var for var in keys if var != "time")[0]
 
-        # Make the keys
-        xKey = "{}PDFX".format(varName)
-        yKey = "{}PDFY".format(varName)
-
         # Histogram counts the occurences of values within a specific interval
         # Density normalizes so that the integral (of the continuous variable)
         # equals one, note that the sum of histograms is not necessarily 1)
         # http://docs.scipy.org/doc/numpy/reference/generated/numpy.histogram.html
         # http://stackoverflow.com/questions/36150257/probability-distribution-function-python/36248810
+        # NOTE: The traces of the same length are binned at once
+        groups = {}
         for key in timeTraces.keys():
-            # Initialize the PDF
+            # Initialize the PDF in the order of the keys
             PDF[key] = {}
+            groups.setdefault(timeTraces[key][varName].size, []).append(key)
 
-            # Calculate pdfY
-            PDF[key][yKey], bins =\
-                np.histogram(timeTraces[key][varName],\
-                             bins="sqrt",\
-                             density=True)
-
-            # Initialize x
-            PDF[key][xKey] = np.zeros(PDF[key][yKey].size)
-
-            # Only the bin edges are saved. Interpolate to bin center
-            for k in range(PDF[key][yKey].size):
-                PDF[key][xKey][k] = 0.5*(bins[k]+bins[k+1])
+        for keys in groups.values():
+            block = np.stack([timeTraces[key][varName].ravel()\
+                              for key in keys], axis=-1)
+            edges  = getHistogramEdges(block.min(axis=0),\
+                                       block.max(axis=0),\
+                                       block.shape[0])
+            counts = accumulateHistograms(block, edges)
+            PDF.update(CollectAndCalcPDF._makePDF(keys, varName,\
+                                                  counts, edges))
 
         # NOTE: If timeTraces was converted to physical units, then PDF is
         #       in physical units as well
@@ -8,7 +8,6 @@ from ..driverHelpers import onlyScan
 from .collectAndCalcPDF import CollectAndCalcPDF
 from ..superClasses import DriverPointsSuperClass
 from .plotPDF import PlotPDF
-from scipy import stats
 from multiprocessing import Process
 import os, pickle
 
@@ -132,22 +131,16 @@ def getPDF(collectPaths       ,\
     # Set name
     ccPDF.setVarName(varName)
 
-    # Execute the collection
-    tt = ccPDF.executeCollectAndCalc()
-    tt = ccPDF.convertTo1D(tt)
-
-    # Calculate the PDF
-    PDF = ccPDF.calcPDF(tt)
-
+    # Execute the collection and calculate the PDF
+    # NOTE: The time traces are collected in blocks of time, so that
+    #       they are never held in memory
     if returnStats:
-        # Calculate the skewness and kurtosis
-        PDFStats = {}
-        for key in tt.keys():
-            PDFStats[key] = {"skew":stats.skew(tt[key][varName]),\
-                             "kurtExcess":stats.kurtosis(tt[key][varName])}
+        PDF, PDFStats = ccPDF.executeCollectAndCalcPDF(calcStats = True)
 
         return PDF, ccPDF.uc, PDFStats
     else:
+        PDF = ccPDF.executeCollectAndCalcPDF()
+
         return PDF, ccPDF.uc
 #}}}
 
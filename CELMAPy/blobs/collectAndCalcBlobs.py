@@ -4,7 +4,7 @@
 Contains the blobs calculation
 """
 
-from ..collectAndCalcHelpers import DimensionsHelper, polAvg
+from ..collectAndCalcHelpers import DimensionsHelper, polFluct, prefetch
 from ..fields2D import CollectAndCalcFields2D
 from ..radialFlux import getRadialFlux
 from itertools import starmap
@@ -570,7 +570,13 @@ class CollectAndCalcBlobs(object):
                 tupleOfBins2D = tuple(p.starmap(self._collect2DBin, args))
         else:
             # Here using itertools.starmap
-            tupleOfBins2D = tuple(starmap(self._collect2DBin, args))
+            ccf2Ds = tuple(starmap(self._getCollectAndCalcFields2D, args))
+            # The next bin is collected on a background thread while the
+            # current bin is calculated
+            prefetched = prefetch(CollectAndCalcFields2D.prefetch,\
+                                  ((ccf2D,) for ccf2D in ccf2Ds))
+            tupleOfBins2D = tuple(ccf2D.executeCollectAndCalc()\
+                                  for ccf2D, _ in zip(ccf2Ds, prefetched))
 
         return tupleOfBins2D
     #}}}
@@ -608,6 +614,36 @@ class CollectAndCalcBlobs(object):
         """
         #}}}
 
+        ccf2D  = self._getCollectAndCalcFields2D(varName, tSlice, fluct, mode)
+        theBin = ccf2D.executeCollectAndCalc()
+
+        return theBin
+    #}}}
+
+    #{{{_getCollectAndCalcFields2D
+    def _getCollectAndCalcFields2D(self, varName, tSlice, fluct, mode):
+        #{{{docstring
+        """
+        Returns the 2D field collector of a bin.
+
+        Parameters
+        ----------
+        varName : str
+            Name of the variable to collect.
+        tSlice : slice
+            The slice which will be used to collect the bin.
+        fluct : bool
+            Whether or not to collect the fluctuations only.
+        mode : ["perp"|"par"|"pol"]
+            Type of 2D calculation.
+
+        Returns
+        -------
+        ccf2D : CollectAndCalcFields2D
+            The collector, which is ready to be executed.
+        """
+        #}}}
+
         xSlice            = None
         ySlice            = None
         zSlice            = None
@@ -637,9 +673,8 @@ class CollectAndCalcBlobs(object):
             raise ValueError(message)
 
         ccf2D.setVarName(varName)
-        theBin = ccf2D.executeCollectAndCalc()
 
-        return theBin
+        return ccf2D
     #}}}
 
     #{{{_getTimeTraceBins
@@ -689,7 +724,7 @@ class CollectAndCalcBlobs(object):
             curDict         = {}
             # Must manually take the poloidal average
             var = np.expand_dims(perp2DBin["n"], axis=2)
-            fluct = var - polAvg(var)
+            fluct = polFluct(var)
             # Add to perp2DBinFluct
             fluctDict = perp2DBin.copy()
             fluctDict["n"] = fluct
@@ -12,15 +12,11 @@ uExB = (-e_theta*DDX(phi)             +  e_rho*DDZ(phi))*(Bclebcsh/Bcyl)
 """
 
 from ..fields1D import CollectAndCalcFields1D
-from ..collectAndCalcHelpers import (DimensionsHelper,\
-                                     collectConstRho ,\
-                                     polAvg          ,\
-                                     slicesToIndices ,\
-                                     DDX             ,\
-                                     DDZ             ,\
+from ..collectAndCalcHelpers import (collectDerived ,\
+                                     polFluct       ,\
+                                     slicesToIndices,\
                                      )
 from ..unitsConverter import UnitsConverter
-import scipy.constants as  cst
 
 #{{{calcRadialExBPoloidal
 def calcRadialExBPoloidal(collectPaths, slices,\
@@ -54,7 +50,7 @@ def calcRadialExBPoloidal(collectPaths, slices,\
     xInd, yInd, tSlice = slices
     slices = (xInd, yInd, None, tSlice)
 
-    # Collect phi
+    # Collect the radial ExB velocity
     ccf1D = CollectAndCalcFields1D(\
                 collectPaths,\
                 mode = "poloidal" ,\
@@ -62,25 +58,15 @@ def calcRadialExBPoloidal(collectPaths, slices,\
                 convertToPhysical = convertToPhysical)
 
     ccf1D.setSlice(*slices)
-    ccf1D.setVarName("phi")
-    phiDict = ccf1D.executeCollectAndCalc()
-    phi = phiDict.pop("phi")
+    ccf1D.setVarName("radialExB")
+    radialExBDict = ccf1D.executeCollectAndCalc()
+    radialExB = radialExBDict.pop("radialExB")
 
-    # Calculate the derivative
-    DDZPhi = DDZ(phi)
     if mode == "fluct":
-        DDZPhi = (DDZPhi - polAvg(DDZPhi))
+        # NOTE: The collected variables are read only
+        radialExB = polFluct(radialExB)
 
-    # Obtain B
-    omCI = ccf1D.uc.getNormalizationParameter("omCI")
-    mi   = ccf1D.uc.getNormalizationParameter("mi")
-    B    = omCI*(mi/cst.e)
-
-    # Divide by the Jacobian (rho) as we are in a cylindrical coordinate system
-    dh = ccf1D.getDh()
-    radialExB = DDZPhi/(dh.rho[xInd]*B)
-
-    return radialExB, phiDict.pop("time")
+    return radialExB, radialExBDict.pop("time")
 #}}}
 
 #{{{calcRadialExBConstRho
@@ -117,37 +103,19 @@ def calcRadialExBConstRho(collectPaths           ,\
 
     tInd = slicesToIndices(collectPaths[0], tSlice, "t")
 
-    # Collect phi
-    phi = collectConstRho(collectPaths, "phi", xInd, tInd = tInd)
-
-    # Slice
-    if tSlice is not None:
-        if type(tSlice) == slice:
-            if tSlice.step is not None:
-                phi = phi [::tSlice.step]
+    radialExB = collectDerived(collectPaths    ,\
+                               ("radialExB", ) ,\
+                               xInd = xInd     ,\
+                               tInd = tInd)["radialExB"]
 
     # Convert to physical units
     uc = UnitsConverter(collectPaths[0], convertToPhysical)
-    convertToPhysical = uc.convertToPhysical
-    dh = DimensionsHelper(collectPaths[0], uc)
-    if convertToPhysical:
-        phi = uc.physicalConversion(phi, "phi")
+    if uc.convertToPhysical:
+        radialExB = uc.physicalConversion(radialExB, "radialExB")
 
-    # Calculate the derivative
-    DDZPhi = DDZ(phi)
     if mode == "fluct":
-        DDZPhi = (DDZPhi - polAvg(DDZPhi))
-
-    # Obtain B
-    if convertToPhysical:
-        omCI = uc.getNormalizationParameter("omCI")
-        mi   = uc.getNormalizationParameter("mi")
-        B    = omCI*(mi/cst.e)
-    else:
-        B = 1.0
-
-    # Divide by the Jacobian (rho) as we are in a cylindrical coordinate system
-    radialExB = DDZPhi/(dh.rho[xInd]*B)
+        # NOTE: The collected variables are read only
+        radialExB = polFluct(radialExB)
 
     return radialExB
 #}}}
@@ -184,7 +152,7 @@ def calcPoloidalExBConstZ(collectPaths, slices,\
     yInd, tSlice = slices
     slices = (None, yInd, None, tSlice)
 
-    # Collect phi
+    # Collect the poloidal ExB velocity
     ccf1D = CollectAndCalcFields1D(\
                 collectPaths,\
                 mode = "radial" ,\
@@ -192,23 +160,13 @@ def calcPoloidalExBConstZ(collectPaths, slices,\
                 convertToPhysical = convertToPhysical)
 
     ccf1D.setSlice(*slices)
-    ccf1D.setVarName("phi")
-    phiDict = ccf1D.executeCollectAndCalc()
-    phi = phiDict.pop("phi")
+    ccf1D.setVarName("poloidalExB")
+    poloidalExBDict = ccf1D.executeCollectAndCalc()
+    poloidalExB = poloidalExBDict.pop("poloidalExB")
 
-    # Calculate the poloidal ExB
-    dh = ccf1D.getDh()
-    DDXPhi = DDX(phi, dh.dx)
     if mode == "fluct":
-        DDXPhi = (DDXPhi - polAvg(DDXPhi))
-
-    # Obtain B
-    omCI = ccf1D.uc.getNormalizationParameter("omCI")
-    mi   = ccf1D.uc.getNormalizationParameter("mi")
-    B    = omCI*(mi/cst.e)
-
-    # Divide by the Jacobian (rho) as we are in a cylindrical coordinate system
-    poloidalExB = -DDXPhi/B
+        # NOTE: The collected variables are read only
+        poloidalExB = polFluct(poloidalExB)
 
-    return poloidalExB, phiDict.pop("time")
+    return poloidalExB, poloidalExBDict.pop("time")
 #}}}
@@ -2,7 +2,7 @@
 
 """ Init for the collect and calc helpers package """
 
-from .averages import polAvg, timeAvg
+from .averages import polAvg, polFluct, timeAvg, iterTimeAvg
 from .derivatives import (DDX, DDY, DDZ,\
                           collectSteadyN,\
                           findLargestRadialGrad,\
@@ -10,23 +10,56 @@ from .derivatives import (DDX, DDY, DDZ,\
                           findLargestPoloidalGrad,\
                           findLargestRadialGradN)
 from .dimensionHelper import DimensionsHelper
+from .consolidatedStore import writeStore
+from .derivedVariables import (DERIVED_VARIABLES,\
+                               isDerived,\
+                               getBaseVariables,\
+                               calcDerivedVariables,\
+                               collectDerived,\
+                               setDerivedMemo,\
+                               clearDerivedMemo)
+from .dmpReader import readDmpFolder, getProcessorLayout
 from .gridSizes import (getGridSizes,\
                         getUniformSpacing,\
                         getEvenlySpacedIndices,\
                         getMXG,\
                         getMYG)
+from .histograms import (getHistogramEdges,\
+                         accumulateHistograms,\
+                         histogramDensity)
 from .integrators import (parallelIntegration,\
                           poloidalIntegration,\
-                          radialIntegration)
+                          radialIntegration,\
+                          fluxSurfaceWeights,\
+                          productIntegration,\
+                          iterProductIntegration)
 from .improvedCollect import (safeCollect, collectiveCollect,\
-                              collectTime, collectPoint,\
+                              setReadWorkers, setScratchDir,\
+                              setPrefetchDepth,\
+                              setCollectDtype, getCollectDtype,\
+                              collectTime, iterCollect,\
+                              collectPoint, collectPoints,\
                               collectParallelProfile, collectPoloidalProfile,\
                               collectRadialProfile,\
                               collectConstRho, collectConstZ,\
                               )
-from .linRegOfExp import linRegOfExp
+from .modeDecomposition import (calcModeMagnitude,\
+                                calcModeAngularFrequency,\
+                                calcPhaseAngularFrequency,\
+                                decomposeModes)
+from .lazyField import LazyField, collectLazy
+from .linRegOfExp import linRegOfExp, linRegOfExps
 from .meshHelper import addLastThetaSlice, get2DMesh
 from .nonSolvedVariables import calcN, calcUIPar, calcUEPar
+from .prefetcher import prefetch
+from .resultCache import setCache
+from .runManifest import (getManifest,\
+                          getNormalizationParameter,\
+                          setManifestTTL)
 from .scanHelpers import getScanValue
+from .segmentAssembler import (getSegmentLengths,\
+                               getSegmentPlan,\
+                               allocateAssembly)
 from .slicesToIndices import slicesToIndices
+from .storeReader import readStore
 from .tSize import getTSize
@@ -7,7 +7,7 @@ Contains functions for taking poloidal averages
 import numpy as np
 
 #{{{polAvg
-def polAvg(f):
+def polAvg(f, out = None, keepdims = False):
     #{{{docstring
     """
     Returns the poloidal average of a field.
@@ -18,6 +18,16 @@ def polAvg(f):
         The field to find the poloidal average of.
         The field must be a 4D field, and should not include the last
         poloidal slice (i.e. the domain should go from [0,2pi[)
+        May be a memory mapped array.
+    out : [None|array]
+        If given, the average is written into this array, which must
+        have the same shape as f (or the shape of the average if
+        keepdims is True).
+        Giving a memory mapped array prevents the average from being
+        held in memory.
+    keepdims : bool
+        If True, the average is returned with the shape (t, x, y, 1),
+        which broadcasts against f without allocating a full 4D array.
 
     Returns
     -------
@@ -27,18 +37,58 @@ def polAvg(f):
     #}}}
 
     tLen, xLen, yLen, zLen = f.shape
-    out = np.zeros(f.shape)
+    shape = (tLen, xLen, yLen, 1) if keepdims else f.shape
+    if out is not None and out.shape != shape:
+        raise ValueError("out must have the shape {}".format(shape))
 
-    for t in range(tLen):
-        for x in range(xLen):
-            for y in range(yLen):
-                out[t,x,y,:] = f[t,x,y,:].mean()
+    avg = np.mean(f, axis=3, keepdims=True)
+    if keepdims:
+        if out is None:
+            return avg
+        out[...] = avg
+        return out
+
+    if out is None:
+        out = np.empty(f.shape, dtype=avg.dtype)
+    out[...] = avg
 
     return out
 #}}}
 
+#{{{polFluct
+def polFluct(f, out = None):
+    #{{{docstring
+    """
+    Returns the field with the poloidal average subtracted.
+
+    Parameters
+    ----------
+    f : array-4d
+        The field to find the fluctuations of.
+        The field must be a 4D field, and should not include the last
+        poloidal slice (i.e. the domain should go from [0,2pi[)
+    out : [None|array]
+        If given, the fluctuations are written into this array, which
+        must have the same shape as f.
+        out may be f itself, in which case the subtraction is done in
+        place.
+
+    Returns
+    -------
+    out : array
+        The poloidal fluctuations of the field
+    """
+    #}}}
+
+    if out is not None and out.shape != f.shape:
+        raise ValueError("out must have the shape {}".format(f.shape))
+
+    # The average is broadcast, so no full size temporary is made
+    return np.subtract(f, polAvg(f, keepdims=True), out=out)
+#}}}
+
 #{{{timeAvg
-def timeAvg(f, t = None, startInd = 0, endInd = -1):
+def timeAvg(f, t = None, startInd = 0, endInd = -1, out = None):
     #{{{docstring
     """
     Returns the poloidal average of a field.
@@ -52,6 +102,7 @@ def timeAvg(f, t = None, startInd = 0, endInd = -1):
     f : array-4d
         The field to find the time average of.
         The field must be a 4D field.
+        May be a memory mapped array.
     t : [None|array]
         The time.
         Must have the same temporal dimension as f.
@@ -59,6 +110,11 @@ def timeAvg(f, t = None, startInd = 0, endInd = -1):
         Start index to take the average from.
     endInd : int
         End index to take the average from.
+    out : [None|array]
+        If given, the averaged field is written into this array, which
+        must have the shape of avgF.
+        Giving a memory mapped array prevents the average from being
+        held in memory.
 
     Returns
     -------
@@ -85,6 +141,9 @@ def timeAvg(f, t = None, startInd = 0, endInd = -1):
             raise ValueError("endInd={} is out of range".\
                     format(endInd))
 
+    if startInd >= tLen:
+        raise ValueError("startInd={} is out of range".format(startInd))
+
     diffT = endInd - startInd
     if diffT < 0:
         raise ValueError("Must have endInd>startInd")
@@ -92,7 +151,12 @@ def timeAvg(f, t = None, startInd = 0, endInd = -1):
     tLenOut = int(np.floor((tLen-1)/(endInd - startInd)))
     outDim  = (tLenOut, xLen, yLen, zLen)
 
-    outF = np.zeros(outDim)
+    if out is None:
+        outF = np.empty(outDim)
+    elif out.shape != outDim:
+        raise ValueError("out must have the shape {}".format(outDim))
+    else:
+        outF = out
 
     if t is not None:
         outT = np.zeros(tLenOut)
@@ -103,17 +167,141 @@ def timeAvg(f, t = None, startInd = 0, endInd = -1):
 
         outT = np.array(range(startTAvgInd, endTAvgInd))
 
-    for avgTInd in range(tLenOut):
-        tStart = startInd + avgTInd
-        tEnd   = endInd   + avgTInd
-        for x in range(xLen):
-            for y in range(yLen):
-                for z in range(zLen):
-                    # +1 as slicing does not include last point
-                    outF[avgTInd,x,y,z] = f[tStart:tEnd+1,x,y,z].mean()
+    if tLenOut > 0:
+        _slidingMean(f, startInd, endInd, outF)
 
     if t is not None:
         return outF, outT
     else:
         return outF
 #}}}
+
+#{{{iterTimeAvg
+def iterTimeAvg(blocks, windowLen):
+    #{{{docstring
+    """
+    Iterates over the sliding time average of a field given in blocks of
+    time.
+
+    Only the current block and the last windowLen - 1 time points are
+    held in memory, so that the average of long runs can be taken from
+    iterCollect:
+
+    >>> blocks = (data["n"] for _, data in iterCollect(paths, ("n",), 500))
+    >>> avg = np.concatenate(tuple(iterTimeAvg(blocks, 100)), axis=0)
+
+    The blocks may be shorter than the window:
+
+    >>> f = np.arange(40.0).reshape(40, 1, 1, 1)
+    >>> blocks = (f[i:i+3] for i in range(0, 40, 3))
+    >>> avg = np.concatenate(tuple(iterTimeAvg(blocks, 10)), axis=0)
+    >>> avg.shape[0], float(avg[0,0,0,0])
+    (31, 4.5)
+
+    Parameters
+    ----------
+    blocks : iterable of array-4d
+        The consecutive blocks in time of the field.
+    windowLen : int
+        The number of time points in each average.
+
+    Yields
+    ------
+    avgF : array-4d
+        The averages of the windows ending in the current block (may have
+        zero length).
+        Window i is the average of the time points i to i + windowLen - 1,
+        so that the windows of timeAvg(f, startInd=0,
+        endInd=windowLen-1) are the first windows given here.
+    """
+    #}}}
+
+    if windowLen < 1:
+        raise ValueError("windowLen must be at least 1")
+
+    tail = None
+    for block in blocks:
+        if tail is not None:
+            block = np.concatenate((tail, block), axis=0)
+
+        nWindows = block.shape[0] - windowLen + 1
+        avgF     = np.empty((max(nWindows, 0), *block.shape[1:]))
+        if nWindows > 0:
+            _slidingMean(block, 0, windowLen - 1, avgF)
+        yield avgF
+
+        # Keep the points of the windows ending in the next blocks
+        # NOTE: A block shorter than the window is carried whole
+        tail = block[max(0, block.shape[0] - (windowLen - 1)):]
+#}}}
+
+#{{{_slidingMean
+def _slidingMean(f, startInd, endInd, out, blockLen = 256):
+    #{{{docstring
+    """
+    Writes the sliding time average of a field into out.
+
+    The windows are found from a cumulative sum, so that the cost is
+    linear in the number of time points regardless of the window length.
+    The cumulative sum is accumulated in blocks of time, where the sums
+    at the start and the end of the windows are subtracted from and
+    added to out, so that only one block is held in memory besides f
+    and out (which may be memory mapped).
+
+    Parameters
+    ----------
+    f : array-4d
+        The field to find the time average of.
+    startInd : int
+        Start index of the first window.
+    endInd : int
+        End index (inclusive) of the first window.
+    out : array-4d
+        The averaged field. Window i starts at startInd + i.
+        Windows reaching past the end of f only averages the points
+        inside f.
+    blockLen : int
+        The number of time points in each block of the cumulative sum.
+    """
+    #}}}
+
+    tLen     = f.shape[0]
+    nWindows = out.shape[0]
+    # The cumulative sum has the indices 0 (the empty sum) to nSum
+    nSum     = tLen - startInd
+
+    windows = np.arange(nWindows)
+    starts  = np.minimum(windows, nSum)
+    ends    = np.minimum(windows + (endInd - startInd) + 1, nSum)
+    counts  = (ends - starts).reshape(-1, *(1,)*(f.ndim - 1))
+
+    # Subtract the first time point to reduce the round-off in the sum
+    ref   = np.array(f[startInd], dtype=float)
+    carry = None
+
+    out[...] = 0
+    for first in range(0, nSum, blockLen):
+        last = min(first + blockLen, nSum)
+
+        # The cumulative sum at the indices first + 1 to last
+        cSum = np.empty((last - first, *f.shape[1:]))
+        np.subtract(f[startInd + first:startInd + last], ref, out=cSum)
+        if carry is not None:
+            cSum[0] += carry
+        np.cumsum(cSum, axis=0, out=cSum)
+        carry = cSum[-1]
+
+        # NOTE: The ends are added before the starts, so that out equals
+        #       cSum[end] - cSum[start] to the last bit
+        for inds, ufunc in ((ends, np.add), (starts, np.subtract)):
+            # The indices are sorted, so the windows are contiguous
+            w0, w1 = np.searchsorted(inds, (first + 1, last + 1))
+            if w1 > w0:
+                ufunc(out[w0:w1], cSum[inds[w0:w1] - (first + 1)],\
+                      out=out[w0:w1])
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # The windows outside f are NaN
+        out /= counts
+    out += ref
+#}}}
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+
+"""
+Contains the function which consolidates the dump files of a run into
+one chunked HDF5 store
+"""
+
+from .dmpReader import getProcessorLayout
+from .improvedCollect import iterCollect
+from .runManifest import getManifest
+from .segmentAssembler import getSegmentLengths, getSegmentPlan
+from .prefetcher import ioLock
+from .storeReader import h5py, getStoreName, getSource
+import threading
+import os
+
+# The dimensions of the variables which are consolidated
+_storedDims = (("t", "x", "y", "z"), ("t",))
+
+#{{{writeStore
+def writeStore(paths, varStrings = None, chunks = "time",\
+               blockSize = 100, nWorkers = None):
+    #{{{docstring
+    """
+    Writes the time dependent variables of a run into one chunked HDF5
+    store.
+
+    The variables are written with the ghost points, and the duplicated
+    time point at the start of each restart segment is removed.
+    Once the store exists, collectiveCollect (and therefore every
+    collect helper) reads from the store rather than from the dump files
+    as long as the dump files are not modified.
+
+    Parameters
+    ----------
+    paths : iterable of strings
+        The paths of the run (for example a value of the dict given by
+        pathMerger). Must be in ascending order of the simulation time.
+    varStrings : [None|iterable of strings]
+        The variables to store.
+        If None, all the variables with the dimensions (t, x, y, z) or
+        (t) are stored.
+    chunks : ["time"|"plane"|tuple]
+        The chunk shape of the 4d variables.
+        * "time"  - Long chunks in time of the poloidal profile in one
+                    spatial point, suited for time traces and probes.
+        * "plane" - One time point of a perpendicular plane per chunk,
+                    suited for animations.
+        * tuple   - The chunk shape in (t, x, y, z), where None gives the
+                    full dimension.
+    blockSize : int
+        The number of time points collected into memory at the time
+        while writing.
+    nWorkers : [None|int]
+        Number of processes reading the dump files (see
+        collectiveCollect).
+
+    Returns
+    -------
+    fileName : str
+        The name of the written store.
+    """
+    #}}}
+
+    if h5py is None:
+        raise ImportError("h5py is needed in order to write the store")
+
+    paths      = tuple(paths)
+    dimensions = getManifest(paths[0])["dimensions"]
+
+    if varStrings is None:
+        varStrings = tuple(var for var in sorted(dimensions.keys())\
+                           if dimensions[var] in _storedDims)
+    for var in varStrings:
+        if var not in dimensions:
+            raise ValueError("Variable '{}' not found in {}".\
+                             format(var, paths[0]))
+        if dimensions[var] not in _storedDims:
+            message = "Only variables with dimensions {} can be stored, "\
+                      "'{}' has {}".format(_storedDims, var, dimensions[var])
+            raise ValueError(message)
+
+    _, nt  = getSegmentPlan(getSegmentLengths(paths))
+    layout = getProcessorLayout(paths[0])
+    shape  = (nt,\
+              layout["NXPE"]*layout["MXSUB"] + 2*layout["MXG"],\
+              layout["NYPE"]*layout["MYSUB"] + 2*layout["MYG"],\
+              layout["nz"])
+
+    fileName = getStoreName(paths)
+    tmpName  = "{}.{}.{}.tmp".format(fileName, os.getpid(),\
+                                     threading.get_ident())
+    try:
+        with h5py.File(tmpName, "w") as f:
+            f.attrs["source"] = getSource(paths)
+            f.attrs["MXG"]    = layout["MXG"]
+            f.attrs["MYG"]    = layout["MYG"]
+            f.attrs["shape"]  = shape
+
+            for var in varStrings:
+                if dimensions[var] == ("t",):
+                    f.create_dataset(var, shape=shape[:1], dtype=float,\
+                                     chunks=(min(nt, 4096),))
+                else:
+                    f.create_dataset(var, shape=shape, dtype=float,\
+                                     chunks=_getChunkShape(chunks, shape))
+
+            tStart = 0
+            for _, data in iterCollect(paths, varStrings         ,\
+                                       blockSize                 ,\
+                                       collectGhost = True       ,\
+                                       nWorkers     = nWorkers   ):
+                # NOTE: The next block is read on a background thread
+                with ioLock:
+                    for var, block in data.items():
+                        if f[var].ndim == 1:
+                            block = block[:,0,0,0]
+                        f[var][tStart:tStart + block.shape[0]] = block
+                tStart += block.shape[0]
+
+        # Only a complete store is found by readStore
+        os.replace(tmpName, fileName)
+    except BaseException:
+        if os.path.exists(tmpName):
+            os.remove(tmpName)
+        raise
+
+    return fileName
+#}}}
+
+#{{{_getChunkShape
+def _getChunkShape(chunks, shape):
+    #{{{docstring
+    """
+    Returns the chunk shape of a 4d variable.
+
+    Parameters
+    ----------
+    chunks : ["time"|"plane"|tuple]
+        The chunk shape or the name of the chunk layout.
+    shape : tuple
+        The shape of the variable.
+
+    Returns
+    -------
+    chunkShape : tuple
+        The chunk shape within the shape of the variable.
+    """
+    #}}}
+
+    _, nx, _, nz = shape
+
+    if chunks == "time":
+        chunks = (1024, 1, 1, nz)
+    elif chunks == "plane":
+        chunks = (1, nx, 1, nz)
+    elif not(hasattr(chunks, "__iter__")) or len(chunks) != 4:
+        message = "chunks must be 'time', 'plane' or a tuple of length 4"
+        raise ValueError(message)
+
+    return tuple(dimLen if chunk is None else max(min(chunk, dimLen), 1)\
+                 for chunk, dimLen in zip(chunks, shape))
+#}}}
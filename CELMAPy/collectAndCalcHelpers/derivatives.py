@@ -4,16 +4,18 @@
 Contains derivative functions
 """
 
+from .dmpReader import readDmpFolder
 from .gridSizes import getUniformSpacing
 from .nonSolvedVariables import calcN
-from boututils.datafile import DataFile
-from boutdata import collect
+from .runManifest import getManifest
 import numpy as np
-from scipy.fftpack import diff
 import os
 
+# The indices found by findLargestRadialGradN
+_largestRadialGradN = {}
+
 #{{{DDX
-def DDX(var, dx):
+def DDX(var, dx, MXG = None, out = None):
     #{{{docstring
     """
     Calculates the first rho-derivative of a profile using a second order
@@ -25,6 +27,13 @@ def DDX(var, dx):
         Variable to take the first derivative of
     dx : [array-1d, float]
         The grid spacing in x for the different evaluation points
+    MXG : [None|int]
+        If this is not None, the variable is assumed to contain MXG ghost
+        points on each side in x. The inner points are then only
+        calculated with the central stencil, and the ghost points of the
+        output are set to NaN.
+    out : [None|array-4d]
+        Array of the same shape as var to write the derivative into.
 
     Returns
     -------
@@ -35,22 +44,11 @@ def DDX(var, dx):
     if len(var.shape) != 4:
        raise ValueError("Input variable must be 4-dimensional")
 
-    tLen, _, yLen, zLen = var.shape
-
-    out = np.zeros(var.shape)
-
-    for tInd in range(tLen):
-        for yInd in range(yLen):
-            for zInd in range(zLen):
-                # 2nd order scheme
-                out[tInd, :, yInd, zInd] =\
-                    np.gradient(var[tInd, :, yInd, zInd], dx, edge_order=2)
-
-    return out
+    return _gradient(var, dx, 1, MXG, out)
 #}}}
 
 #{{{DDY
-def DDY(var, dy):
+def DDY(var, dy, MYG = None, out = None):
     """
     Calculates the first parallel-derivative of a profile using a second order
     stencil (assuming that we are using cylinder geometry).
@@ -62,6 +60,12 @@ def DDY(var, dy):
         points)
     dy : array
         The grid spacing in x for the different evaluation points
+    MYG : [None|int]
+        If this is not None, the variable is assumed to contain MYG ghost
+        points on each side in y, and the ghost points of the output are
+        set to NaN.
+    out : [None|array-4d]
+        Array of the same shape as var to write the derivative into.
 
     Returns
     -------
@@ -71,22 +75,11 @@ def DDY(var, dy):
     if len(var.shape) != 4:
        raise ValueError("Input variable must be 4-dimensional")
 
-    tLen, xLen, _, zLen = var.shape
-
-    out = np.zeros(var.shape)
-
-    for tInd in range(tLen):
-        for xInd in range(xLen):
-            for zInd in range(zLen):
-                # 2nd order scheme
-                out[tInd, xInd, :, zInd] =\
-                    np.gradient(var[tInd, xInd, :, zInd], dy, edge_order=2)
-
-    return out
+    return _gradient(var, dy, 2, MYG, out)
 #}}}
 
 #{{{DDZ
-def DDZ(var):
+def DDZ(var, out = None):
     #{{{docstring
     """
     Calculates the first theta-derivative of a profile using spectral
@@ -99,8 +92,8 @@ def DDZ(var):
     ----------
     var : array
         The variable to take the z-derivative of
-    J : array
-        The Jacobian
+    out : [None|array-4d]
+        Array of the same shape as var to write the derivative into.
 
     Returns
     -------
@@ -111,21 +104,113 @@ def DDZ(var):
     if len(var.shape) != 4:
        raise ValueError("Input variable must be 4-dimensional")
 
-    tLen, xLen, yLen, _ = var.shape
+    out = _allocateOut(var, out)
+
+    # The wave numbers of the [0, 2*pi[ period
+    zLen = var.shape[3]
+    k    = np.arange(zLen//2 + 1, dtype=float)
+    if zLen % 2 == 0:
+        # The Nyquist mode has no odd derivative (as in scipy's diff)
+        k[-1] = 0
+
+    # All the z-profiles are transformed at once
+    out[...] = np.fft.irfft(1j*k*np.fft.rfft(var, axis=3), n=zLen, axis=3)
+
+    return out
+#}}}
+
+#{{{_gradient
+def _gradient(var, spacing, axis, nGuards, out):
+    #{{{docstring
+    """
+    Calculates the second order first derivative along an axis.
+
+    Gives the same result as np.gradient with edge_order=2 along the
+    axis, but writes a uniform spacing directly into out.
+
+    Parameters
+    ----------
+    var : array-4d
+        Variable to take the first derivative of
+    spacing : [array-1d, float]
+        The grid spacing, or the coordinates along the axis
+    axis : int
+        The axis to take the derivative along
+    nGuards : [None|int]
+        Number of ghost points on each side along the axis, which are set
+        to NaN in the output
+    out : [None|array-4d]
+        Array to write the derivative into
+
+    Returns
+    -------
+    out : array-4d
+        The derivative
+    """
+    #}}}
+
+    out = _allocateOut(var, out)
+
+    # The slices along the axis
+    along = lambda start, stop:\
+        (slice(None),)*axis + (slice(start, stop),)
+
+    if np.ndim(spacing) == 0 and var.shape[axis] > 2:
+        # The same stencils and order of operations as in np.gradient
+        dx = float(spacing)
+        inner = out[along(1, -1)]
+        np.subtract(var[along(2, None)], var[along(None, -2)], out=inner)
+        inner /= 2.0*dx
+        out[along(0, 1)] = (-1.5/dx)*var[along(0, 1)] +\
+                           (2.0/dx)*var[along(1, 2)] +\
+                           (-0.5/dx)*var[along(2, 3)]
+        out[along(-1, None)] = (0.5/dx)*var[along(-3, -2)] +\
+                               (-2.0/dx)*var[along(-2, -1)] +\
+                               (1.5/dx)*var[along(-1, None)]
+    else:
+        out[...] = np.gradient(var, spacing, axis=axis, edge_order=2)
+
+    if nGuards:
+        # The inner points next to the ghost points are central differences
+        out[along(None, nGuards)] = np.nan
+        out[along(-nGuards, None)] = np.nan
+
+    return out
+#}}}
+
+#{{{_allocateOut
+def _allocateOut(var, out):
+    #{{{docstring
+    """
+    Returns the array to write a derivative into.
 
-    out = np.zeros(var.shape)
+    Parameters
+    ----------
+    var : array-4d
+        The variable to take the derivative of
+    out : [None|array-4d]
+        The array given by the user
 
-    for tInd in range(tLen):
-        for xInd in range(xLen):
-            for yInd in range(yLen):
-                out[tInd, xInd, yInd, :] =\
-                    diff(var[tInd, xInd, yInd, :])
+    Returns
+    -------
+    out : array-4d
+        out if given, else a new array of the shape of var
+    """
+    #}}}
+
+    if out is None:
+        dtype = var.dtype if np.issubdtype(var.dtype, np.floating) else float
+        return np.empty(var.shape, dtype=dtype)
+
+    if out.shape != var.shape:
+        raise ValueError("out must have the shape {}, got {}".\
+                         format(var.shape, out.shape))
 
     return out
 #}}}
 
 #{{{findLargestRadialGrad
-def findLargestRadialGrad(var, dx, MXG = None):
+def findLargestRadialGrad(var, dx, MXG = None, blockSize = 64):
     #{{{docstring
     """
     Returns the index of the maximum absolute gradient along rho.
@@ -139,6 +224,8 @@ def findLargestRadialGrad(var, dx, MXG = None):
     MXG : [None|int]
         If this is not None, the routine assumes that the variable contains
         ghost points, and MXG will be subtracted from maxGradInd
+    blockSize : int
+        Number of time points differentiated at the time.
 
     Returns
     -------
@@ -147,13 +234,10 @@ def findLargestRadialGrad(var, dx, MXG = None):
     """
     #}}}
 
-    ddxVar = DDX(var, dx)
+    ddx = lambda block, out: DDX(block, dx, out=out)
 
-    # nanmax excludes the NaNs
-    maxGradInds = np.where(np.abs(ddxVar) == np.nanmax(np.abs(ddxVar)))
-
-    # Take the firs occurence of the x axis
-    maxGradInd = int(maxGradInds[1][0])
+    # Take the first occurence of the x axis
+    maxGradInd = _findLargestGrad(var, ddx, blockSize)[1]
     if MXG is not None:
         # Subtract MXG as xguards are collected
         maxGradInd -= MXG
@@ -162,7 +246,7 @@ def findLargestRadialGrad(var, dx, MXG = None):
 #}}}
 
 #{{{findLargestParallelGrad
-def findLargestParallelGrad(var, dy, MYG = None):
+def findLargestParallelGrad(var, dy, MYG = None, blockSize = 64):
     #{{{docstring
     """
     Returns the index of the maximum absolute gradient along z.
@@ -176,6 +260,8 @@ def findLargestParallelGrad(var, dy, MYG = None):
     MYG : [None|int]
         If this is not None, the routine assumes that the variable contains
         ghost points, and MYG will be subtracted from maxGradInd
+    blockSize : int
+        Number of time points differentiated at the time.
 
     Returns
     -------
@@ -184,13 +270,10 @@ def findLargestParallelGrad(var, dy, MYG = None):
     """
     #}}}
 
-    ddyVar = DDY(var, dy)
-
-    # nanmax excludes the NaNs
-    maxGradInds = np.where(np.abs(ddyVar) == np.nanmax(np.abs(ddyVar)))
+    ddy = lambda block, out: DDY(block, dy, out=out)
 
-    # Take the firs occurence of the y axis
-    maxGradInd = int(maxGradInds[2][0])
+    # Take the first occurence of the y axis
+    maxGradInd = _findLargestGrad(var, ddy, blockSize)[2]
     if MYG is not None:
         # Subtract MYG as yguards are collected
         maxGradInd -= MYG
@@ -199,7 +282,7 @@ def findLargestParallelGrad(var, dy, MYG = None):
 #}}}
 
 #{{{findLargestPoloidalGrad
-def findLargestPoloidalGrad(var):
+def findLargestPoloidalGrad(var, blockSize = 64):
     #{{{docstring
     """
     Returns the index of the maximum absolute gradient along theta
@@ -208,6 +291,8 @@ def findLargestPoloidalGrad(var):
     ----------
     var : array
         The variable to investigate.
+    blockSize : int
+        Number of time points differentiated at the time.
 
     Returns
     -------
@@ -216,13 +301,10 @@ def findLargestPoloidalGrad(var):
     """
     #}}}
 
-    ddzVar = DDZ(var)
+    ddz = lambda block, out: DDZ(block, out=out)
 
-    # nanmax excludes the NaNs
-    maxGradInds = np.where(np.abs(ddzVar) == np.nanmax(np.abs(ddzVar)))
-
-    # Take the firs occurence of the z axis
-    maxGradInd = int(maxGradInds[3][0])
+    # Take the first occurence of the z axis
+    maxGradInd = _findLargestGrad(var, ddz, blockSize)[3]
 
     return maxGradInd
 #}}}
@@ -236,6 +318,8 @@ def findLargestRadialGradN(steadyStatePath, yInd = 0):
     NOTE:
         * If yInd is unspecified, one is assuming that the position of
           the max gradient is constant in the parallel direction.
+        * The result is cached in memory for each path and yInd until
+          the dump files are modified.
 
     Parameters
     ----------
@@ -251,10 +335,18 @@ def findLargestRadialGradN(steadyStatePath, yInd = 0):
     """
     #}}}
 
+    manifest = getManifest(steadyStatePath)
+    key = (os.path.abspath(steadyStatePath), int(yInd),\
+           tuple(sorted(manifest["mtimes"].items())))
+    if key in _largestRadialGradN:
+        return _largestRadialGradN[key]
+
     dx    = getUniformSpacing(steadyStatePath, "x")
     n     = collectSteadyN(steadyStatePath, yInd = yInd)
     xInd  = findLargestRadialGrad(n, dx[0,0])
 
+    _largestRadialGradN[key] = xInd
+
     return xInd
 #}}}
 
@@ -279,21 +371,72 @@ def collectSteadyN(steadyStatePath, yInd):
     #}}}
 
     # Check last t index
-    with DataFile(os.path.join(steadyStatePath, "BOUT.dmp.0.nc")) as f:
-        tLast = len(f.read("t_array")) - 1
+    tLast = getManifest(steadyStatePath)["nt"] - 1
 
     # In the steady state, the max gradient in "n" is the same
     # throughout in the domain, so we use yInd=0, zInd=0 in the
     # collect
-    lnN = collect("lnN",\
-                  path=steadyStatePath   ,\
-                  xguards=False          ,\
-                  yguards=False          ,\
-                  yind   = [yInd, yInd]  ,\
-                  zind   = [0   , 0]     ,\
-                  tind   = [tLast, tLast],\
-                  info=False)
-    n = calcN(lnN, normalized = True)
+    # NOTE: Only the processor files containing yInd are read
+    data, _ = readDmpFolder(steadyStatePath              ,\
+                            ("lnN",)                     ,\
+                            collectGhost = False         ,\
+                            tInd         = (tLast, tLast),\
+                            yInd         = (yInd, yInd)  ,\
+                            zInd         = (0   , 0)     )
+    n = calcN(data["lnN"], normalized = True)
 
     return n
 #}}}
+
+#{{{_findLargestGrad
+def _findLargestGrad(var, derivative, blockSize):
+    #{{{docstring
+    """
+    Returns the index of the maximum absolute derivative of a variable.
+
+    The derivative is taken in blocks of time, so that only one block of
+    the derivative is held in memory.
+
+    Parameters
+    ----------
+    var : array-4d
+        The variable to investigate (may be memory mapped).
+    derivative : callable
+        Function on the form derivative(block, out) which takes the
+        derivative of a block along a spatial axis.
+    blockSize : int
+        Number of time points differentiated at the time.
+
+    Returns
+    -------
+    maxInd : tuple
+        The first (in C order) index of the maximum absolute derivative,
+        where NaNs are ignored.
+    """
+    #}}}
+
+    if blockSize < 1:
+        raise ValueError("blockSize must be at least 1")
+
+    tLen   = var.shape[0]
+    buffer = np.empty((min(blockSize, tLen), *var.shape[1:]))
+    maxVal = -1.0
+    maxInd = None
+    for tStart in range(0, tLen, blockSize):
+        block = var[tStart:tStart + blockSize]
+        absDeriv = derivative(block, buffer[:block.shape[0]])
+        np.abs(absDeriv, out=absDeriv)
+        # The NaNs are never larger than the absolute values
+        absDeriv[np.isnan(absDeriv)] = -1.0
+
+        flatInd = int(np.argmax(absDeriv))
+        if absDeriv.flat[flatInd] > maxVal:
+            maxVal = absDeriv.flat[flatInd]
+            maxInd = np.unravel_index(flatInd, absDeriv.shape)
+            maxInd = (int(maxInd[0]) + tStart, *(int(i) for i in maxInd[1:]))
+
+    if maxInd is None:
+        raise ValueError("The derivative has no finite values")
+
+    return maxInd
+#}}}
@@ -0,0 +1,412 @@
+#!/usr/bin/env python
+
+"""
+Contains functions which collects variables derived from the solved
+variables
+"""
+
+from .derivatives import DDX, DDZ
+from .improvedCollect import collectiveCollect, getCollectDtype
+from .nonSolvedVariables import calcN, calcUIPar, calcUEPar
+from .runManifest import getManifest
+from collections import OrderedDict
+import numpy as np
+import threading
+import os
+
+# The collected and derived variables of the windows collected by this
+# process (the least recently used window first)
+_memo = OrderedDict()
+# The windows may be collected in advance by a background thread
+_memoLock = threading.Lock()
+# Maximum total size of the memoized variables in bytes
+_maxMemoSize = 2*1024**3
+
+#{{{_calcN
+def _calcN(lnN, geometry):
+    """Calculates the normalized n from lnN."""
+    return calcN(lnN, normalized = True)
+#}}}
+
+#{{{_calcUIPar
+def _calcUIPar(momDensPar, n, geometry):
+    """Calculates the normalized uIPar from momDensPar and n."""
+    return calcUIPar(momDensPar, n)
+#}}}
+
+#{{{_calcUEPar
+def _calcUEPar(uIPar, jPar, n, geometry):
+    """Calculates the normalized uEPar from uIPar, jPar and n."""
+    return calcUEPar(uIPar, jPar, n, normalized = True)
+#}}}
+
+#{{{_calcRadialExB
+def _calcRadialExB(phi, geometry):
+    """Calculates the normalized radial ExB velocity from phi."""
+    # Divide by the Jacobian (rho) as we are in a cylindrical coordinate
+    # system
+    return DDZ(phi)/geometry["rho"][np.newaxis, :, np.newaxis, np.newaxis]
+#}}}
+
+#{{{_calcPoloidalExB
+def _calcPoloidalExB(phi, geometry):
+    """Calculates the normalized poloidal ExB velocity from phi."""
+    return -DDX(phi, geometry["dx"])
+#}}}
+
+# The derived variables on the form
+#     name : (dependencies, function)
+# where the function is called with the dependencies (in the given
+# order) and the geometry of the collected window.
+# All the variables are normalized.
+DERIVED_VARIABLES = {\
+    "n"           : (("lnN",)                 , _calcN)          ,\
+    "uIPar"       : (("momDensPar", "n")      , _calcUIPar)      ,\
+    "uEPar"       : (("uIPar", "jPar", "n")   , _calcUEPar)      ,\
+    "radialExB"   : (("phi",)                 , _calcRadialExB)  ,\
+    "poloidalExB" : (("phi",)                 , _calcPoloidalExB),\
+                    }
+
+#{{{isDerived
+def isDerived(varName):
+    #{{{docstring
+    """
+    Checks whether a variable is derived from the solved variables.
+
+    Parameters
+    ----------
+    varName : str
+        The variable.
+
+    Returns
+    -------
+    derived : bool
+        True if the variable is found in DERIVED_VARIABLES.
+    """
+    #}}}
+    return varName in DERIVED_VARIABLES
+#}}}
+
+#{{{getBaseVariables
+def getBaseVariables(varStrings):
+    #{{{docstring
+    """
+    Returns the solved variables needed to calculate the variables.
+
+    Parameters
+    ----------
+    varStrings : iterable of strings
+        The variables (derived or not).
+
+    Returns
+    -------
+    baseVars : tuple
+        The variables which must be collected.
+    """
+    #}}}
+
+    baseVars = []
+    for var in _resolve(varStrings):
+        if not(isDerived(var)):
+            baseVars.append(var)
+
+    return tuple(baseVars)
+#}}}
+
+#{{{calcDerivedVariables
+def calcDerivedVariables(varStrings, fields, geometry = None):
+    #{{{docstring
+    """
+    Calculates the derived variables from collected variables.
+
+    Parameters
+    ----------
+    varStrings : iterable of strings
+        The variables to calculate.
+    fields : dict
+        The collected variables given by getBaseVariables.
+        The intermediate variables are stored in the dict, so that they
+        are only calculated once.
+    geometry : [None|dict]
+        Dictionary with the keys "rho" (the rho coordinate of the
+        collected window) and "dx" (the grid spacing in rho).
+        Only needed for the ExB velocities.
+
+    Returns
+    -------
+    varDict : dict
+        Dictionary of the variables in varStrings.
+    """
+    #}}}
+
+    for var in _resolve(varStrings):
+        if var in fields:
+            continue
+        if not(isDerived(var)):
+            raise ValueError("'{}' must be collected".format(var))
+
+        dependencies, func = DERIVED_VARIABLES[var]
+        fields[var] = func(*(fields[dep] for dep in dependencies), geometry)
+
+    return {var:fields[var] for var in varStrings}
+#}}}
+
+#{{{collectDerived
+def collectDerived(paths, varStrings, collectGhost = False, tInd = None,\
+                   xInd = None, yInd = None, zInd = None, **kwargs):
+    #{{{docstring
+    """
+    Collects variables which may be derived from the solved variables.
+
+    All the solved variables needed are collected in one pass.
+    The collected and calculated variables are kept in memory, so that
+    the same window is only collected and calculated once.
+    The least recently used windows are removed when the memory exceeds
+    the size set by setDerivedMemo.
+
+    Parameters
+    ----------
+    paths : iterable of strings
+        The paths to collect from. Must be in ascending order of the
+        simulation time, as the variables are being concatenated
+    varStrings : iterable of strings
+        The variables to be collected.
+    collectGhost : bool
+        If the ghost is to be collected
+    tInd : [None|tuple]
+        Start and end (and optionally step) of the time if not None
+    xInd : [None|2d array]
+        x index range to collect. The first index is the start, and the
+        second is the end of the range (inclusive)
+    yInd : [None|2d array]
+        y index range to collect. The first index is the start, and the
+        second is the end of the range (inclusive)
+    zInd : [None|2d array]
+        z index range to collect. The first index is the start, and the
+        second is the end of the range (inclusive)
+    **kwargs : keyword arguments
+        Additional keyword arguments given to collectiveCollect.
+
+    Returns
+    -------
+    varDict : dict
+        Dictionary of the normalized variables.
+    """
+    #}}}
+
+    dtype     = kwargs.get("dtype")
+    dtype     = dtype if dtype is not None else getCollectDtype()
+    windowKey = _getWindowKey(paths, collectGhost, tInd, xInd, yInd, zInd,\
+                              dtype)
+    with _memoLock:
+        fields = _memo.pop(windowKey, {})
+
+    toCollect = tuple(var for var in getBaseVariables(varStrings)\
+                      if var not in fields)
+    if len(toCollect) != 0:
+        fields.update(collectiveCollect(paths, toCollect           ,\
+                                        collectGhost = collectGhost,\
+                                        tInd         = tInd        ,\
+                                        xInd         = xInd        ,\
+                                        yInd         = yInd        ,\
+                                        zInd         = zInd        ,\
+                                        **kwargs))
+
+    geometry = None
+    exbVars  = ("radialExB", "poloidalExB")
+    if any(var in exbVars for var in _resolve(varStrings)):
+        if zInd is not None:
+            # The z derivative is spectral
+            raise ValueError("The ExB velocities needs zInd = None")
+        geometry = _getGeometry(paths[0], collectGhost, xInd)
+
+    nFields  = len(fields)
+    varDict  = calcDerivedVariables(varStrings, fields, geometry)
+    if len(fields) != nFields:
+        for var in fields:
+            # The memoized variables are shared between the callers
+            fields[var].setflags(write=False)
+
+    # Store as the most recently used window
+    with _memoLock:
+        _memo[windowKey] = fields
+        _evictMemo()
+
+    return varDict
+#}}}
+
+#{{{setDerivedMemo
+def setDerivedMemo(maxSize):
+    #{{{docstring
+    """
+    Sets the maximum size of the variables kept in memory by
+    collectDerived.
+
+    Parameters
+    ----------
+    maxSize : int
+        Maximum total size of the memoized variables in bytes.
+        0 disables the memoization.
+    """
+    #}}}
+
+    global _maxMemoSize
+
+    if maxSize < 0:
+        raise ValueError("maxSize must be positive")
+
+    with _memoLock:
+        _maxMemoSize = maxSize
+        _evictMemo()
+#}}}
+
+#{{{clearDerivedMemo
+def clearDerivedMemo():
+    #{{{docstring
+    """
+    Removes the variables kept in memory by collectDerived.
+    """
+    #}}}
+    with _memoLock:
+        _memo.clear()
+#}}}
+
+#{{{_resolve
+def _resolve(varStrings):
+    #{{{docstring
+    """
+    Returns the variables in the order they must be calculated.
+
+    Parameters
+    ----------
+    varStrings : iterable of strings
+        The variables to resolve.
+
+    Returns
+    -------
+    order : list
+        The variables and all their dependencies, where every variable
+        comes after its dependencies.
+    """
+    #}}}
+
+    order = []
+    for var in varStrings:
+        if var in order:
+            continue
+        if isDerived(var):
+            for dep in _resolve(DERIVED_VARIABLES[var][0]):
+                if dep not in order:
+                    order.append(dep)
+        order.append(var)
+
+    return order
+#}}}
+
+#{{{_evictMemo
+def _evictMemo():
+    #{{{docstring
+    """
+    Removes the least recently used windows until the memoized variables
+    are within the maximum size.
+
+    Must be called with the _memoLock held.
+    """
+    #}}}
+
+    totalSize = sum(var.nbytes\
+                    for fields in _memo.values() for var in fields.values())
+
+    while totalSize > _maxMemoSize and len(_memo) != 0:
+        _, fields = _memo.popitem(last=False)
+        totalSize -= sum(var.nbytes for var in fields.values())
+#}}}
+
+#{{{_getWindowKey
+def _getWindowKey(paths, collectGhost, tInd, xInd, yInd, zInd, dtype):
+    #{{{docstring
+    """
+    Returns the key of a collected window in the memo.
+
+    Parameters
+    ----------
+    paths : iterable of strings
+        The paths collected from.
+    collectGhost : bool
+        If the ghost points are collected.
+    tInd : [None|int|2d array]
+        The t index range.
+    xInd : [None|int|2d array]
+        The x index range.
+    yInd : [None|int|2d array]
+        The y index range.
+    zInd : [None|int|2d array]
+        The z index range.
+    dtype : dtype
+        The data type of the collected variables.
+
+    Returns
+    -------
+    key : tuple
+        The key, which changes if the dump files are modified.
+    """
+    #}}}
+
+    source = []
+    for path in paths:
+        mtimes = getManifest(path)["mtimes"]
+        source.append((os.path.abspath(path), tuple(sorted(mtimes.items()))))
+
+    windows = []
+    for ind in (tInd, xInd, yInd, zInd):
+        if hasattr(ind, "__iter__"):
+            ind = tuple(None if i is None else int(i) for i in ind)
+        elif ind is not None:
+            ind = int(ind)
+        windows.append(ind)
+
+    return (tuple(source), bool(collectGhost), tuple(windows),\
+            np.dtype(dtype).str)
+#}}}
+
+#{{{_getGeometry
+def _getGeometry(path, collectGhost, xInd):
+    #{{{docstring
+    """
+    Returns the rho coordinate of the collected window and the grid
+    spacing in rho.
+
+    Parameters
+    ----------
+    path : str
+        The path to read the grid from.
+    collectGhost : bool
+        If the ghost points are collected.
+    xInd : [None|int|2d array]
+        The x index range.
+
+    Returns
+    -------
+    geometry : dict
+        Dictionary with the keys "rho" and "dx".
+    """
+    #}}}
+
+    manifest = getManifest(path)
+    dx       = float(manifest["dx"][0,0])
+    nx       = manifest["NXPE"]*manifest["MXSUB"]
+    MXG      = manifest["MXG"] if collectGhost else 0
+
+    # The cell centered rho as in DimensionsHelper
+    rho = dx * np.arange(0.5 - MXG, nx + MXG)
+
+    if xInd is not None:
+        if not(hasattr(xInd, "__iter__")):
+            xInd = (xInd, xInd)
+        start = xInd[0] if xInd[0] is not None else 0
+        # +1 as the collect indices are inclusive
+        end   = xInd[1] + 1 if xInd[1] is not None else len(rho)
+        rho   = rho[start:end]
+
+    return {"rho" : rho, "dx" : dx}
+#}}}
@@ -0,0 +1,566 @@
+#!/usr/bin/env python
+
+"""
+Contains functions which reads several variables from the BOUT.dmp.*.nc
+files of a dump folder in one pass
+"""
+
+from .prefetcher import ioLock
+from .runManifest import getManifest
+from boututils.datafile import DataFile
+from concurrent.futures import as_completed
+import numpy as np
+import os
+
+#{{{readDmpFolder
+def readDmpFolder(path                ,\
+                  varStrings          ,\
+                  collectGhost = False,\
+                  tInd         = None ,\
+                  xInd         = None ,\
+                  yInd         = None ,\
+                  zInd         = None ,\
+                  executor     = None ,\
+                  dtype        = float):
+    #{{{docstring
+    """
+    Reads several variables from the processor files of one dump folder.
+
+    Only the BOUT.dmp.*.nc files containing a part of the requested x
+    and y window are opened.
+    Each of these is opened once, and all the variables in varStrings
+    are read for the requested index window before the next file is
+    opened.
+    The variables are stitched together as in boutdata.collect.
+
+    Parameters
+    ----------
+    path : str
+        The dump folder to read from.
+    varStrings : iterable of strings
+        The variables to be read.
+    collectGhost : bool
+        If the ghost points in x and y are to be collected.
+    tInd : [None|int|2d array|3d array]
+        t index range to collect. The first index is the start, and the
+        second is the end of the range (inclusive). The optional third
+        index is the step, which is used in the read.
+    xInd : [None|int|2d array]
+        x index range to collect. The first index is the start, and the
+        second is the end of the range (inclusive)
+    yInd : [None|int|2d array]
+        y index range to collect. The first index is the start, and the
+        second is the end of the range (inclusive)
+    zInd : [None|int|2d array]
+        z index range to collect. The first index is the start, and the
+        second is the end of the range (inclusive)
+    executor : [None|Executor]
+        If given, the processor files are read concurrently by
+        submitting the reads to the executor.
+        Must be a process pool as the netCDF library is not thread safe.
+    dtype : dtype
+        The data type of the returned variables.
+
+    Returns
+    -------
+    data : dict
+        Dictionary of the read variables.
+        The dimensions of each variable are the same as in the dump
+        files (i.e. a subset of (t, x, y, z)).
+    time : array-1d
+        The time corresponding to the read time window.
+    """
+    #}}}
+
+    manifest = getManifest(path)
+
+    # Obtain the global windows
+    windows = {\
+        "t" : _getWindow(tInd, manifest["nt"]),\
+        "x" : _getWindow(xInd, _getGlobalLen(manifest, "x", collectGhost)),\
+        "y" : _getWindow(yInd, _getGlobalLen(manifest, "y", collectGhost)),\
+        "z" : _getWindow(zInd, manifest["nz"]),\
+              }
+
+    for dim in ("x", "y"):
+        if windows[dim].step is not None:
+            # The processor slices assumes continuous windows
+            raise ValueError("Steps are not supported in {}".format(dim))
+
+    data       = {}
+    dimensions = {}
+    for var in varStrings:
+        if var not in manifest["dimensions"]:
+            raise ValueError("Variable '{}' not found in {}".format(var, path))
+        dimensions[var] = manifest["dimensions"][var]
+        shape = tuple(_windowLen(windows[dim]) for dim in dimensions[var])
+        data[var] = np.empty(shape, dtype=dtype)
+
+    time = manifest["t_array"][windows["t"]].copy()
+
+    # Variables which are not distributed over the processors are
+    # only read from the first file
+    sharedVars =\
+        tuple(var for var in varStrings if not(_isDistributed(dimensions[var])))
+    distributedVars =\
+        tuple(var for var in varStrings if _isDistributed(dimensions[var]))
+
+    # Only the files containing a part of the window are opened
+    procNrs = ()
+    if len(distributedVars) != 0:
+        procNrs = _getProcessorsInWindow(manifest, windows, collectGhost)
+    tasks = [(procNr, distributedVars) for procNr in procNrs]
+    if len(sharedVars) != 0:
+        if len(tasks) == 0:
+            tasks.append((0, ()))
+        tasks[0] = (tasks[0][0], sharedVars + tasks[0][1])
+
+    fileReads = [_getFileReads(procNr, procVars, dimensions,\
+                               manifest, windows, collectGhost)\
+                 for procNr, procVars in tasks]
+
+    if executor is None:
+        for procNr, reads, dests in fileReads:
+            arrays = _readFile(_getFileName(path, procNr), reads)
+            _scatter(data, dests, arrays)
+    else:
+        # NOTE: The files are read in the worker processes as the
+        #       netCDF library is not thread safe
+        futures = {executor.submit(_readFile,\
+                                   _getFileName(path, procNr), reads):\
+                   dests\
+                   for procNr, reads, dests in fileReads}
+        # The processors writes to disjoint parts of data
+        for future in as_completed(futures):
+            _scatter(data, futures[future], future.result())
+
+    return data, time
+#}}}
+
+#{{{getProcessorLayout
+def getProcessorLayout(path):
+    #{{{docstring
+    """
+    Returns the processor layout of a dump folder.
+
+    Parameters
+    ----------
+    path : str
+        The dump folder to read from.
+
+    Returns
+    -------
+    layout : dict
+        Dictionary with the keys:
+            * "NXPE"  - Number of processors in x
+            * "NYPE"  - Number of processors in y
+            * "MXSUB" - Number of inner x points per processor
+            * "MYSUB" - Number of inner y points per processor
+            * "MXG"   - Number of ghost points in x
+            * "MYG"   - Number of ghost points in y
+            * "nz"    - Number of z points
+            * "nt"    - Number of time points
+            * "nProc" - Total number of processor files
+    """
+    #}}}
+
+    manifest = getManifest(path)
+
+    keys = ("NXPE", "NYPE", "MXSUB", "MYSUB", "MXG", "MYG", "nz", "nt", "nProc")
+    layout = {key:manifest[key] for key in keys}
+
+    return layout
+#}}}
+
+#{{{_getFileName
+def _getFileName(path, procNr):
+    #{{{docstring
+    """
+    Returns the name of the dump file of a processor.
+
+    Parameters
+    ----------
+    path : str
+        The dump folder.
+    procNr : int
+        The processor number.
+
+    Returns
+    -------
+    fileName : str
+        The file name.
+    """
+    #}}}
+    return os.path.join(path, "BOUT.dmp.{}.nc".format(procNr))
+#}}}
+
+#{{{_getGlobalLen
+def _getGlobalLen(layout, dim, collectGhost):
+    #{{{docstring
+    """
+    Returns the global length of the spatial dimension.
+
+    Parameters
+    ----------
+    layout : dict
+        The processor layout.
+    dim : ["x"|"y"]
+        The dimension.
+    collectGhost : bool
+        Whether or not the ghost points are collected.
+
+    Returns
+    -------
+    globalLen : int
+        The length of the dimension in the collected array.
+    """
+    #}}}
+
+    nPE, nSub, nGuard = _getDimLayout(layout, dim)
+
+    globalLen = nPE*nSub
+    if collectGhost:
+        globalLen += 2*nGuard
+
+    return globalLen
+#}}}
+
+#{{{_getDimLayout
+def _getDimLayout(layout, dim):
+    #{{{docstring
+    """
+    Returns the processor layout of a spatial dimension.
+
+    Parameters
+    ----------
+    layout : dict
+        The processor layout.
+    dim : ["x"|"y"]
+        The dimension.
+
+    Returns
+    -------
+    nPE : int
+        Number of processors in the dimension.
+    nSub : int
+        Number of inner points per processor.
+    nGuard : int
+        Number of ghost points.
+    """
+    #}}}
+
+    if dim == "x":
+        return layout["NXPE"], layout["MXSUB"], layout["MXG"]
+    elif dim == "y":
+        return layout["NYPE"], layout["MYSUB"], layout["MYG"]
+    else:
+        raise ValueError("Unknown dimension {}".format(dim))
+#}}}
+
+#{{{_getWindow
+def _getWindow(ind, dimLen):
+    #{{{docstring
+    """
+    Converts collect-like indices to a slice.
+
+    As in boutdata.collect, indices outside of the range are truncated.
+
+    Parameters
+    ----------
+    ind : [None|int|2d array|3d array]
+        The start and the end (inclusive) of the range, and optionally
+        the step.
+    dimLen : int
+        Length of the dimension.
+
+    Returns
+    -------
+    window : slice
+        The corresponding slice.
+    """
+    #}}}
+
+    if ind is None:
+        return slice(0, dimLen)
+
+    if not(hasattr(ind, "__iter__")):
+        ind = (ind, ind)
+
+    start = ind[0] if ind[0] is not None else 0
+    # +1 as the collect indices are inclusive
+    stop  = ind[1]+1 if ind[1] is not None else dimLen
+    step  = None
+    if len(ind) > 2 and ind[2] is not None and ind[2] != 1:
+        step = ind[2]
+        if step < 1:
+            raise ValueError("The step must be positive, got {}".format(step))
+
+    start = min(max(start, 0), dimLen)
+    stop  = min(max(stop, start), dimLen)
+
+    return slice(start, stop, step)
+#}}}
+
+#{{{_windowLen
+def _windowLen(window):
+    #{{{docstring
+    """
+    Returns the number of points in a window.
+
+    Parameters
+    ----------
+    window : slice
+        Slice with non-negative start and stop.
+
+    Returns
+    -------
+    windowLen : int
+        The number of points in the window.
+    """
+    #}}}
+    step = window.step if window.step is not None else 1
+    return len(range(window.start, window.stop, step))
+#}}}
+
+#{{{_isDistributed
+def _isDistributed(dims):
+    #{{{docstring
+    """
+    Checks whether a variable is distributed over the processors.
+
+    Parameters
+    ----------
+    dims : tuple
+        The dimensions of the variable.
+
+    Returns
+    -------
+    distributed : bool
+        True if the variable has an x or y dimension.
+    """
+    #}}}
+    return ("x" in dims) or ("y" in dims)
+#}}}
+
+#{{{_getProcessorsInWindow
+def _getProcessorsInWindow(layout, windows, collectGhost):
+    #{{{docstring
+    """
+    Returns the processors containing a part of the global window.
+
+    Parameters
+    ----------
+    layout : dict
+        The processor layout.
+    windows : dict
+        The global slices of the dimensions "t", "x", "y" and "z".
+    collectGhost : bool
+        Whether or not the ghost points are collected.
+
+    Returns
+    -------
+    procNrs : tuple
+        The processor numbers in ascending order.
+    """
+    #}}}
+
+    procInds = {}
+    for dim in ("x", "y"):
+        nPE, nSub, nGuard = _getDimLayout(layout, dim)
+
+        window = windows[dim]
+        if window.start >= window.stop:
+            return ()
+
+        # The global index without the ghost points
+        shift = nGuard if collectGhost else 0
+        first = window.start    - shift
+        last  = window.stop - 1 - shift
+
+        # The ghost points are owned by the outer processors
+        first = min(max(first // nSub, 0), nPE - 1)
+        last  = min(max(last  // nSub, 0), nPE - 1)
+
+        procInds[dim] = range(first, last + 1)
+
+    # NOTE: The processors are numbered with x as the fastest index
+    procNrs = tuple(iy*layout["NXPE"] + ix\
+                    for iy in procInds["y"] for ix in procInds["x"])
+
+    return procNrs
+#}}}
+
+#{{{_getProcessorSlices
+def _getProcessorSlices(layout, procNr, windows, collectGhost):
+    #{{{docstring
+    """
+    Finds the part of the global window stored in a processor file.
+
+    The processor must be one of the processors returned by
+    _getProcessorsInWindow.
+
+    Parameters
+    ----------
+    layout : dict
+        The processor layout.
+    procNr : int
+        The processor number.
+    windows : dict
+        The global slices of the dimensions "t", "x", "y" and "z".
+    collectGhost : bool
+        Whether or not the ghost points are collected.
+
+    Returns
+    -------
+    localWindows : dict
+        The slices to read from the processor file.
+    globalWindows : dict
+        The slices in the global array to write to.
+    """
+    #}}}
+
+    # NOTE: The processors are numbered with x as the fastest index
+    procInds = {"x" : procNr % layout["NXPE"],\
+                "y" : procNr // layout["NXPE"]}
+
+    localWindows  = {"t" : windows["t"], "z" : windows["z"]}
+    globalWindows = {"t" : slice(0, _windowLen(windows["t"])),\
+                     "z" : slice(0, _windowLen(windows["z"]))}
+
+    for dim in ("x", "y"):
+        nPE, nSub, nGuard = _getDimLayout(layout, dim)
+        procInd = procInds[dim]
+
+        # Global index (counted with the ghost points) of the first
+        # local point
+        offset = procInd*nSub
+
+        # The points owned by the processor.
+        # The outer processors owns the ghost points if collected
+        localStart = nGuard
+        localStop  = nGuard + nSub
+        if collectGhost:
+            if procInd == 0:
+                localStart = 0
+            if procInd == nPE - 1:
+                localStop = nSub + 2*nGuard
+
+        # The window counted with the ghost points
+        shift = 0 if collectGhost else nGuard
+        windowStart = windows[dim].start + shift
+        windowStop  = windows[dim].stop  + shift
+
+        start = max(offset + localStart, windowStart)
+        stop  = min(offset + localStop , windowStop)
+
+        localWindows [dim] = slice(start - offset     , stop - offset)
+        globalWindows[dim] = slice(start - windowStart, stop - windowStart)
+
+    return localWindows, globalWindows
+#}}}
+
+#{{{_getFileReads
+def _getFileReads(procNr, varStrings, dimensions,\
+                  layout, windows, collectGhost):
+    #{{{docstring
+    """
+    Finds what to read from a processor file, and where to put it.
+
+    Parameters
+    ----------
+    procNr : int
+        The processor number.
+    varStrings : tuple
+        The variables to read.
+    dimensions : dict
+        The dimensions of the variables.
+    layout : dict
+        The processor layout.
+    windows : dict
+        The global slices of the dimensions "t", "x", "y" and "z".
+    collectGhost : bool
+        Whether or not the ghost points are collected.
+
+    Returns
+    -------
+    procNr : int
+        The processor number.
+    reads : tuple
+        Tuple of (var, ranges) to read from the file, where ranges is
+        None for scalars.
+    dests : tuple
+        Tuple of (var, dest), where dest is the index in the global
+        array to write the read data to.
+    """
+    #}}}
+
+    reads = []
+    dests = []
+    for var in varStrings:
+        dims = dimensions[var]
+        if len(dims) == 0:
+            reads.append((var, None))
+            dests.append((var, Ellipsis))
+        elif not(_isDistributed(dims)):
+            reads.append((var, [windows[dim] for dim in dims]))
+            dests.append((var, Ellipsis))
+        else:
+            localWindows, globalWindows =\
+                _getProcessorSlices(layout, procNr, windows, collectGhost)
+            reads.append((var, [localWindows[dim] for dim in dims]))
+            dests.append((var, tuple(globalWindows[dim] for dim in dims)))
+
+    return procNr, tuple(reads), tuple(dests)
+#}}}
+
+#{{{_readFile
+def _readFile(fileName, reads):
+    #{{{docstring
+    """
+    Reads windows of variables from a file.
+
+    Parameters
+    ----------
+    fileName : str
+        The file to read.
+    reads : tuple
+        Tuple of (var, ranges), where ranges is None for scalars.
+
+    Returns
+    -------
+    arrays : list
+        The read data.
+    """
+    #}}}
+
+    arrays = []
+    with ioLock, DataFile(fileName) as f:
+        for var, ranges in reads:
+            if ranges is None:
+                arrays.append(f.read(var))
+            else:
+                arrays.append(f.read(var, ranges=ranges))
+
+    return arrays
+#}}}
+
+#{{{_scatter
+def _scatter(data, dests, arrays):
+    #{{{docstring
+    """
+    Writes the read data into the global arrays.
+
+    Parameters
+    ----------
+    data : dict
+        The global arrays.
+    dests : tuple
+        Tuple of (var, dest) as returned by _getFileReads.
+    arrays : list
+        The read data as returned by _readFile.
+    """
+    #}}}
+
+    for (var, dest), array in zip(dests, arrays):
+        data[var][dest] = array
+#}}}
@@ -4,9 +4,8 @@
 Contains functions dealing with sizes of the grid
 """
 
-from boututils.datafile import DataFile
+from .runManifest import getManifest
 import numpy as np
-import os
 
 #{{{getGridSizes
 def getGridSizes(path, coordinate, varName="lnN", includeGhost=False):
@@ -31,26 +30,26 @@ def getGridSizes(path, coordinate, varName="lnN", includeGhost=False):
         Size of the desired coordinate
     """
     #}}}
-    with DataFile(os.path.join(path, "BOUT.dmp.0.nc")) as f:
-        if coordinate == "x":
-            # nx
-            coordinateSize =\
-                    (f.size(varName)[1] - 2*int(f.read("MXG")))*f.read("NXPE")
-            if includeGhost:
-                coordinateSize += 2*int(f.read("MXG"))
-        elif coordinate == "y":
-            # ny
-            coordinateSize =\
-                    (f.size(varName)[2] - 2*int(f.read("MYG")))*f.read("NYPE")
-            if includeGhost:
-                coordinateSize += 2*int(f.read("MYG"))
-        elif coordinate == "z":
-            # nz
-            coordinateSize = (f.size(varName)[3])
-        elif coordinate == "z":
-            coordinateSize = (f.size(varName)[0])
-        else:
-            raise ValueError("Unknown coordinate {}".format(coordinate))
+    manifest = getManifest(path)
+    size     = manifest["sizes"][varName]
+
+    if coordinate == "x":
+        # nx
+        coordinateSize = (size[1] - 2*manifest["MXG"])*manifest["NXPE"]
+        if includeGhost:
+            coordinateSize += 2*manifest["MXG"]
+    elif coordinate == "y":
+        # ny
+        coordinateSize = (size[2] - 2*manifest["MYG"])*manifest["NYPE"]
+        if includeGhost:
+            coordinateSize += 2*manifest["MYG"]
+    elif coordinate == "z":
+        # nz
+        coordinateSize = size[3]
+    elif coordinate == "t":
+        coordinateSize = size[0]
+    else:
+        raise ValueError("Unknown coordinate {}".format(coordinate))
 
     return coordinateSize
 #}}}
@@ -78,41 +77,31 @@ def getUniformSpacing(path, coordinate, xguards=False, yguards=False):
         The grid spacing
     """
     #}}}
-    with DataFile(os.path.join(path, "BOUT.dmp.0.nc")) as f:
-        if coordinate == "x" or coordinate == "y":
-            if coordinate == "x":
-                # dx
-                spacing = f.read("dx")
-            elif coordinate == "y":
-                # dy
-                spacing = f.read("dy")
-
-            shape = spacing.shape
-            xSize = shape[0] - 2*int(f.read("MXG"))
-            ySize = shape[1] - 2*int(f.read("MYG"))
-            if not(xguards) and not (yguards):
-                spacingEmpty = np.empty((xSize*int(f.read("NXPE")),\
-                                         ySize*int(f.read("NYPE"))))
-            elif xguards and not(yguards):
-                spacingEmpty = np.empty((xSize*int(f.read("NXPE"))+\
-                                             2*int(f.read("MXG")),\
-                                         ySize*int(f.read("NYPE"))))
-            elif not(xguards) and yguards:
-                spacingEmpty = np.empty((xSize*int(f.read("NXPE")),\
-                                         ySize*int(f.read("NYPE"))+\
-                                             2*int(f.read("MYG"))))
-            elif xguards and yguards:
-                spacingEmpty = np.empty((xSize*int(f.read("NXPE"))+\
-                                             2*int(f.read("MXG")),\
-                                         ySize*int(f.read("NYPE"))+\
-                                             2*int(f.read("MYG"))))
-            spacingEmpty.fill(spacing[0,0])
-            spacing = spacingEmpty
-        elif coordinate == "z":
-            # dz
-            spacing = f.read("dz")
-        else:
-            raise ValueError("Unknown coordinate {}".format(coordinate))
+    manifest = getManifest(path)
+
+    if coordinate == "x" or coordinate == "y":
+        if coordinate == "x":
+            # dx
+            spacing = manifest["dx"]
+        elif coordinate == "y":
+            # dy
+            spacing = manifest["dy"]
+
+        shape = spacing.shape
+        xSize = (shape[0] - 2*manifest["MXG"])*manifest["NXPE"]
+        ySize = (shape[1] - 2*manifest["MYG"])*manifest["NYPE"]
+        if xguards:
+            xSize += 2*manifest["MXG"]
+        if yguards:
+            ySize += 2*manifest["MYG"]
+        spacingEmpty = np.empty((xSize, ySize))
+        spacingEmpty.fill(spacing[0,0])
+        spacing = spacingEmpty
+    elif coordinate == "z":
+        # dz
+        spacing = manifest["dz"]
+    else:
+        raise ValueError("Unknown coordinate {}".format(coordinate))
 
     return spacing
 #}}}
@@ -197,8 +186,7 @@ def getMXG(path):
         Number of ghost points in x
     """
     #}}}
-    with DataFile(os.path.join(path, "BOUT.dmp.0.nc")) as f:
-            return f.read("MXG")
+    return getManifest(path)["MXG"]
 #}}}
 
 #{{{getMYG
@@ -218,6 +206,5 @@ def getMYG(path):
         Number of ghost points in y
     """
     #}}}
-    with DataFile(os.path.join(path, "BOUT.dmp.0.nc")) as f:
-            return f.read("MYG")
+    return getManifest(path)["MYG"]
 #}}}
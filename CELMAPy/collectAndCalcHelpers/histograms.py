@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+
+"""
+Contains functions for calculating histograms of several time traces
+from blocks of time
+"""
+
+import numpy as np
+
+#{{{getHistogramEdges
+def getHistogramEdges(minVal, maxVal, nSamples, bins = "sqrt"):
+    #{{{docstring
+    """
+    Returns the bin edges of the histograms of several time traces.
+
+    The edges are the same as np.histogram would give for the full time
+    traces, but only the range and the number of samples are needed, so
+    that they can be found from a pass over blocks of the time traces.
+
+    Parameters
+    ----------
+    minVal : array-1d
+        The minimum of each time trace.
+    maxVal : array-1d
+        The maximum of each time trace.
+    nSamples : int
+        The number of samples in each time trace.
+    bins : ["sqrt"|int]
+        If "sqrt", the number of bins are found as in np.histogram.
+        If int, the number of bins to use.
+
+    Returns
+    -------
+    edges : tuple
+        The bin edges (array-1d) of each time trace.
+    """
+    #}}}
+
+    edges = []
+    for first, last in zip(np.atleast_1d(minVal), np.atleast_1d(maxVal)):
+        if not(np.isfinite(first) and np.isfinite(last)):
+            message = "autodetected range of [{}, {}] is not finite"
+            raise ValueError(message.format(first, last))
+
+        ptp = last - first
+        if first == last:
+            first = first - 0.5
+            last  = last  + 0.5
+
+        if bins == "sqrt":
+            width = ptp/np.sqrt(nSamples)
+            nBins = int(np.ceil((last - first)/width)) if width else 1
+        elif type(bins) == int and bins > 0:
+            nBins = bins
+        else:
+            message = "bins must be 'sqrt' or a positive int, got {}"
+            raise ValueError(message.format(bins))
+
+        edges.append(np.linspace(first, last, nBins + 1,\
+                                 dtype=np.result_type(first, last)))
+
+    return tuple(edges)
+#}}}
+
+#{{{accumulateHistograms
+def accumulateHistograms(block, edges, counts = None):
+    #{{{docstring
+    """
+    Adds a block of time to the histograms of several time traces.
+
+    The values are binned exactly as in np.histogram, and all the time
+    traces are binned at once.
+    Values outside the edges (and NaNs) are not counted.
+
+    Parameters
+    ----------
+    block : array-2d
+        The block of time on the form (t, trace).
+    edges : tuple
+        The bin edges of each time trace (see getHistogramEdges).
+    counts : [None|array-2d]
+        If not None, the counts of the previous blocks which the counts
+        of this block will be added to.
+
+    Returns
+    -------
+    counts : array-2d
+        The counts on the form (trace, bin), where bins beyond the
+        number of bins of a trace are zero.
+    """
+    #}}}
+
+    block = np.asarray(block)
+    if block.ndim != 2 or block.shape[1] != len(edges):
+        message = "block must be on the form (t, {}), got {}"
+        raise ValueError(message.format(len(edges), block.shape))
+
+    nTraces = len(edges)
+    nBins   = np.array(tuple(len(edge) - 1 for edge in edges))
+    maxBins = nBins.max()
+    rows    = np.arange(nTraces)[:, np.newaxis]
+
+    # Pad the edges so that all the traces can be binned at once
+    dtype  = np.result_type(*edges)
+    padded = np.full((nTraces, maxBins + 2), np.inf, dtype=dtype)
+    for nr, edge in enumerate(edges):
+        padded[nr, :edge.size] = edge
+    first = padded[:, :1]
+    last  = padded[rows[:,0], nBins][:, np.newaxis]
+    nBins = nBins[:, np.newaxis]
+
+    values = block.T.astype(dtype, copy=False)
+    keep   = (values >= first) & (values <= last)
+    values = np.where(keep, values, first)
+
+    # Compute the bin indices, and for values that lie exactly on the
+    # last edge we need to subtract one
+    # NOTE: As in np.histogram, the indices are corrected where the
+    #       computation is not exact within ~1 ULP of the edges
+    indices = ((values - first)/(last - first)*nBins.astype(dtype)).\
+              astype(np.intp)
+    indices[indices == nBins] -= 1
+    indices[values < padded[rows, indices]] -= 1
+    increment = (values >= padded[rows, indices + 1]) & (indices != nBins - 1)
+    indices[increment] += 1
+
+    flat      = (rows*maxBins + indices)[keep]
+    newCounts = np.bincount(flat, minlength=nTraces*maxBins).\
+                reshape(nTraces, maxBins)
+
+    if counts is None:
+        return newCounts
+
+    counts += newCounts
+    return counts
+#}}}
+
+#{{{histogramDensity
+def histogramDensity(counts, edges):
+    #{{{docstring
+    """
+    Normalizes the histograms so that their integrals equals one.
+
+    Parameters
+    ----------
+    counts : array-2d
+        The counts on the form (trace, bin) (see accumulateHistograms).
+    edges : tuple
+        The bin edges of each time trace.
+
+    Returns
+    -------
+    density : tuple
+        The probability density (array-1d) of each time trace.
+    """
+    #}}}
+
+    density = []
+    for traceCounts, edge in zip(counts, edges):
+        traceCounts = traceCounts[:edge.size - 1]
+        density.append(traceCounts/np.diff(edge)/traceCounts.sum())
+
+    return tuple(density)
+#}}}
@@ -4,10 +4,36 @@
 Contains function which collects a variable over several output timesteps
 """
 
+from .dmpReader import readDmpFolder
+from .prefetcher import prefetch, readerContext
+from .resultCache import getCacheKey, loadCached, storeCached
+from .runManifest import getManifest
+from .segmentAssembler import (getSegmentLengths,\
+                               getSegmentPlan,\
+                               allocateAssembly)
+from .storeReader import readStore
 from boutdata import collect
-from boututils.datafile import DataFile
 import numpy as np
-import os
+from concurrent.futures import (ProcessPoolExecutor,\
+                                ThreadPoolExecutor,\
+                                as_completed)
+from concurrent.futures.process import BrokenProcessPool
+from itertools import starmap
+import threading
+
+# Default number of processes used when reading the dump files
+_nWorkers = 1
+# Default directory of the scratch files (None collects into memory)
+_scratchDir = None
+# Default number of restart segments read ahead on a background thread
+_prefetchDepth = 1
+# Default data type of the collected variables
+_dtype = float
+# The pools reading the dump files for each number of workers, which are
+# kept between the calls so that the readers are not started for every
+# call (for example for every block of iterCollect)
+_readPools = {}
+_readPoolsLock = threading.Lock()
 
 #{{{safeCollect
 def safeCollect(*args, **kwargs):
@@ -42,17 +68,41 @@ def safeCollect(*args, **kwargs):
 #}}}
 
 #{{{collectiveCollect
-def collectiveCollect(paths               ,\
-                      varStrings          ,\
-                      collectGhost = False,\
-                      tInd         = None ,\
-                      yInd         = None ,\
-                      xInd         = None ,\
-                      zInd         = None ):
+def collectiveCollect(paths                ,\
+                      varStrings           ,\
+                      collectGhost  = False,\
+                      tInd          = None ,\
+                      yInd          = None ,\
+                      xInd          = None ,\
+                      zInd          = None ,\
+                      out           = None ,\
+                      useCache      = True ,\
+                      nWorkers      = None ,\
+                      scratchDir    = None ,\
+                      prefetchDepth = None ,\
+                      dtype         = None):
     #{{{docstring
     """
     Collects variables from several paths
 
+    The size of the time axis is found in advance from the t_array of
+    the paths, so that each variable is allocated once, and every path
+    is written in place.
+
+    Variables without a time dimension are read once, and are given as
+    read only views broadcast over the time axis (with the length 1 in
+    the missing spatial dimensions), so that no memory is used for the
+    repeated time points.
+
+    If the on disk result cache is enabled (see resultCache.setCache),
+    the results are stored in the cache, and are memory mapped from the
+    cache if the same variable and window is collected again from
+    unchanged dump files.
+
+    If the run has been consolidated with writeStore, the variables
+    found in the store are read from the store rather than from the dump
+    files.
+
     Parameters
     ----------
     paths : iterable of strings
@@ -63,7 +113,9 @@ def collectiveCollect(paths               ,\
     collectGhost : bool
         If the ghost is to be collected
     tInd : [None|tuple]
-        Start and end of the time if not None
+        Start and end of the time if not None.
+        An optional third element gives the step, so that only the kept
+        time points are read.
     xInd : [None|2d array]
         x index range to collect. The first index is the start, and the
         second is the end of the range (inclusive)
@@ -73,6 +125,33 @@ def collectiveCollect(paths               ,\
     zInd : [None|2d array]
         z index range to collect. The first index is the start, and the
         second is the end of the range (inclusive)
+    out : [None|dict]
+        Dictionary of 4d arrays with the variable names as keys.
+        If a variable is present in out, the collected data is written
+        into the given array, which must have the shape of the result.
+    useCache : bool
+        Whether or not to use the result cache (if it has been enabled
+        with setCache).
+    nWorkers : [None|int]
+        Number of processes reading the processor files of all the
+        restart segments concurrently.
+        If None, the number set by setReadWorkers is used.
+        NOTE: The processes are not forked, so a script using more than
+              one process must guard its main code with
+              if __name__ == "__main__".
+    scratchDir : [None|str]
+        If given, the variables not given in out are written to memory
+        mapped scratch files in this directory rather than to memory.
+        If None, the directory set by setScratchDir is used.
+    prefetchDepth : [None|int]
+        Number of restart segments read ahead on a background thread
+        while the current segment is assembled, when nWorkers is 1.
+        0 reads the segments strictly one after the other.
+        If None, the depth set by setPrefetchDepth is used.
+    dtype : [None|dtype]
+        The data type of the collected variables. np.float32 halves the
+        memory compared to the float64 of the dump files.
+        If None, the data type set by setCollectDtype is used.
 
     Return
     ------
@@ -81,85 +160,389 @@ def collectiveCollect(paths               ,\
     """
     #}}}
 
+    if out is None:
+        out = {}
+
     # Initialize the data
     data = {var: None for var in varStrings}
 
-    # Initialize postCollectTInd for later checks
-    postCollectTInd = None
-    if len(paths) > 1:
-        if tInd is not None:
-            # Check if it necessary to use all paths
-            paths, tInd = removePathsOutsideRange(paths, tInd)
-            # If more than one path, we will slice in time after
-            # collection
-            postCollectTInd = tInd
-            tInd = None
+    try:
+        tLens = getSegmentLengths(paths)
+    except OSError:
+        # An OSError is thrown if the file is not found
+        raise ValueError("No collectable files found in {}".format(paths))
+
+    # Find the parts of the paths which are within the time range
+    plan, nt = getSegmentPlan(tLens, tInd)
+    if len(plan) == 0:
+        raise ValueError("tInd={} is outside the time range of {}".\
+                         format(tInd, paths))
+
+    if nWorkers is None:
+        nWorkers = _nWorkers
+    if scratchDir is None:
+        scratchDir = _scratchDir
+    if prefetchDepth is None:
+        prefetchDepth = _prefetchDepth
+    if dtype is None:
+        dtype = _dtype
+
+    readKwargs = {"collectGhost" : collectGhost,\
+                  "xInd"         : xInd        ,\
+                  "yInd"         : yInd        ,\
+                  "zInd"         : zInd        ,\
+                  "dtype"        : dtype       ,\
+                 }
+
+    # The time independent variables are only read from the first path
+    dimensions = getManifest(paths[0])["dimensions"]
+    invariantVars = tuple(var for var in varStrings if var in dimensions\
+                          and "t" not in dimensions[var])
+    if len(invariantVars) != 0:
+        invariant = _readSegment(paths[plan[0][0]], invariantVars,\
+                                 None, readKwargs)
+        for var, field in invariant.items():
+            data[var] =\
+                _broadcastInTime(field, dimensions[var], nt, out.get(var))
+
+    # Load the variables found in the cache
+    cacheKeys = {}
+    if useCache:
+        for var in varStrings:
+            if data[var] is not None:
+                continue
+            cacheKeys[var] = getCacheKey(paths, var, collectGhost,\
+                                         tInd, xInd, yInd, zInd, dtype)
+            cached = loadCached(cacheKeys[var])
+            if cached is not None:
+                if var in out:
+                    data[var] =\
+                        allocateAssembly(nt, cached.shape[1:], out[var])
+                    data[var][...] = cached
+                else:
+                    data[var] = cached
+
+    # Read the variables found in the consolidated store
+    stored = readStore(paths, tuple(var for var in varStrings\
+                                    if data[var] is None),\
+                       collectGhost, tInd, xInd, yInd, zInd, dtype)
+    for var, storedVar in stored.items():
+        if var in out:
+            data[var] = allocateAssembly(nt, storedVar.shape[1:], out[var])
+            data[var][...] = storedVar
         else:
-            postCollectTInd = None
-
-    # Must cast to list due to corner cases in collect
-    if tInd is not None:
-        tInd = list(tInd)
+            data[var] = storedVar
+            # Make the data immutable as in safeCollect
+            data[var].setflags(write=False)
+
+    # Only the variables not found in the cache or the store are read
+    varStrings = tuple(var for var in varStrings if data[var] is None)
+    if len(varStrings) == 0:
+        return data
+
+    if nWorkers > 1:
+        # NOTE: The dump files are read by a pool of processes as the
+        #       netCDF library is not thread safe. The threads only
+        #       submit the reads of each segment to the pool, so that
+        #       several segments are read concurrently
+        workers, segThreads = _getReadPools(nWorkers)
+        readKwargs["executor"] = workers
+        futures = {segThreads.submit(_readSegment, paths[segNr],\
+                                     varStrings, localTInd, readKwargs):\
+                   dest\
+                   for segNr, localTInd, dest in plan}
+        try:
+            # The segments are scattered as they are read
+            for future in as_completed(futures):
+                _scatterSegment(data, future.result(), futures[future],\
+                                nt, out, scratchDir, dtype)
+        except BrokenProcessPool:
+            # A reader died, so new pools are started in the next call
+            with _readPoolsLock:
+                _readPools.pop(nWorkers, None)
+            raise
+    else:
+        reads = ((paths[segNr], varStrings, localTInd, readKwargs)\
+                 for segNr, localTInd, _ in plan)
+        if prefetchDepth > 0 and len(plan) > 1:
+            # The next segments are read while the current is scattered
+            segments = prefetch(_readSegment, reads, prefetchDepth)
+        else:
+            segments = starmap(_readSegment, reads)
+        for (_, _, dest), segment in zip(plan, segments):
+            _scatterSegment(data, segment, dest, nt, out, scratchDir, dtype)
 
     for var in varStrings:
-        for path in paths:
-            try:
-                # Make a local var which is reused for every interation,
-                # then concatenate the dictionary
-                # NOTE: The collect indices are INCLUSIVE i.e not
-                #       working like pyhton slices
-                curVar =\
-                    safeCollect(var,\
-                                path     = path        ,\
-                                tind     = tInd        ,\
-                                xind     = xInd        ,\
-                                yind     = yInd        ,\
-                                zind     = zInd        ,\
-                                xguards  = collectGhost,\
-                                yguards  = collectGhost,\
-                                info     = False        )
-            except OSError:
-                # An OSError is thrown if the file is not found
-                raise ValueError("No collectable files found in {}".\
-                                 format(path))
-
-            # Ensure 4D
-            if len(curVar.shape) == 3:
-                # Make it a 4d variable
-                time = collectTime(paths, tInd)
-                tmp = np.zeros((len(time), *curVar.shape))
-                # Copy the field in to each time
-                tmp[:] = curVar
-                curVar = tmp
-            elif len(curVar.shape) == 1:
-                # Make it a 4d variable
-                tmp = np.zeros((len(curVar), 1, 1, 1))
-                # Copy the field in to each time
-                tmp[:,0,0,0] = curVar
-                curVar = tmp
-
-            # Set data[var] to curVar the first time in order to get the
-            # correct dimensions
-            if data[var] is None:
-                data[var] = curVar
+        if useCache:
+            storeCached(cacheKeys[var], data[var])
+        if var not in out:
+            # Make the data immutable as in safeCollect
+            data[var].setflags(write=False)
+
+    return data
+#}}}
+
+#{{{setReadWorkers
+def setReadWorkers(nWorkers):
+    #{{{docstring
+    """
+    Sets the default number of processes used when reading the dump
+    files.
+
+    Parameters
+    ----------
+    nWorkers : int
+        Number of processes reading the processor files concurrently.
+        1 reads the files serially in the calling process.
+    """
+    #}}}
+
+    global _nWorkers
+
+    if nWorkers < 1:
+        raise ValueError("nWorkers must be at least 1")
+
+    _nWorkers = nWorkers
+#}}}
+
+#{{{setScratchDir
+def setScratchDir(scratchDir):
+    #{{{docstring
+    """
+    Sets the default directory of the memory mapped scratch files.
+
+    Parameters
+    ----------
+    scratchDir : [None|str]
+        Directory where the collected variables are memory mapped.
+        If None, the variables are collected into memory.
+    """
+    #}}}
+
+    global _scratchDir
+
+    _scratchDir = scratchDir
+#}}}
+
+#{{{setPrefetchDepth
+def setPrefetchDepth(prefetchDepth):
+    #{{{docstring
+    """
+    Sets the default number of restart segments or time blocks read
+    ahead on a background thread.
+
+    Parameters
+    ----------
+    prefetchDepth : int
+        Number of segments or blocks read ahead of the caller.
+        0 disables the prefetching.
+    """
+    #}}}
+
+    global _prefetchDepth
+
+    if prefetchDepth < 0:
+        raise ValueError("prefetchDepth must be positive")
+
+    _prefetchDepth = prefetchDepth
+#}}}
+
+#{{{setCollectDtype
+def setCollectDtype(dtype):
+    #{{{docstring
+    """
+    Sets the default data type of the collected variables.
+
+    Parameters
+    ----------
+    dtype : dtype
+        The data type, for example np.float32 in order to halve the
+        memory when the precision of float64 is not needed.
+    """
+    #}}}
+
+    global _dtype
+
+    if not(np.issubdtype(dtype, np.floating)):
+        raise ValueError("dtype must be a floating point type")
+
+    _dtype = dtype
+#}}}
+
+#{{{getCollectDtype
+def getCollectDtype():
+    #{{{docstring
+    """
+    Returns the default data type of the collected variables.
+
+    Returns
+    -------
+    dtype : dtype
+        The data type set by setCollectDtype.
+    """
+    #}}}
+    return _dtype
+#}}}
+
+#{{{_getReadPools
+def _getReadPools(nWorkers):
+    #{{{docstring
+    """
+    Returns the pools reading the dump files.
+
+    The pools are started at the first call with a given number of
+    workers, and are reused by the later calls.
+
+    Parameters
+    ----------
+    nWorkers : int
+        Number of processes reading the processor files.
+
+    Returns
+    -------
+    workers : ProcessPoolExecutor
+        The processes reading the processor files.
+    segThreads : ThreadPoolExecutor
+        The threads submitting the reads of each restart segment to the
+        processes.
+    """
+    #}}}
+
+    with _readPoolsLock:
+        if nWorkers not in _readPools:
+            # NOTE: nWorkers segments in flight are enough to keep all the
+            #       processes busy
+            _readPools[nWorkers] =\
+                (ProcessPoolExecutor(max_workers = nWorkers    ,\
+                                     mp_context  = readerContext),\
+                 ThreadPoolExecutor(max_workers = nWorkers))
+
+        return _readPools[nWorkers]
+#}}}
+
+#{{{_readSegment
+def _readSegment(path, varStrings, localTInd, readKwargs):
+    #{{{docstring
+    """
+    Reads the variables of one restart segment.
+
+    Parameters
+    ----------
+    path : str
+        The path to read from.
+    varStrings : iterable of strings
+        The variables to be read.
+    localTInd : tuple
+        The collect-like (inclusive) time index range of the segment.
+    readKwargs : dict
+        The remaining keyword arguments to readDmpFolder.
+
+    Returns
+    -------
+    segment : dict
+        The read variables.
+    """
+    #}}}
+
+    try:
+        # Read all the variables from the dump files in one pass
+        # NOTE: The collect indices are INCLUSIVE i.e not
+        #       working like pyhton slices
+        segment, _ = readDmpFolder(path, varStrings,\
+                                   tInd = localTInd, **readKwargs)
+    except OSError:
+        # An OSError is thrown if the file is not found
+        raise ValueError("No collectable files found in {}".format(path))
+
+    return segment
+#}}}
+
+#{{{_scatterSegment
+def _scatterSegment(data, segment, dest, nt, out, scratchDir, dtype):
+    #{{{docstring
+    """
+    Writes a restart segment into the assembled arrays.
+
+    The assembled arrays are allocated when the first segment is
+    written.
+
+    Parameters
+    ----------
+    data : dict
+        The assembled variables. Variables which are None are allocated.
+    segment : dict
+        The variables of the segment.
+    dest : slice
+        The time slice in the assembled arrays to write to.
+    nt : int
+        Number of time points in the assembled arrays.
+    out : dict
+        Arrays given by the user to write into.
+    scratchDir : [None|str]
+        Directory of the scratch files of the allocated arrays.
+    dtype : dtype
+        The data type of the allocated arrays.
+    """
+    #}}}
+
+    for var, curVar in segment.items():
+        # Allocate the full time range the first time in order to
+        # get the correct dimensions
+        # NOTE: The time independent variables are broadcast by
+        #       collectiveCollect, so all the variables have a time
+        #       dimension
+        if data[var] is None:
+            if len(curVar.shape) == 1:
+                spatialShape = (1, 1, 1)
             else:
-                # Remove first point in time in the current time as this
-                # is the same as the last of the previous
-                data[var]=np.concatenate((data[var], curVar[1:,:,:,:]), axis=0)
+                spatialShape = curVar.shape[1:]
+            data[var] = allocateAssembly(nt, spatialShape, out.get(var),\
+                                         scratchDir, dtype)
 
-        # Do slicing post collection if necessary
-        if postCollectTInd is not None:
-            # +1 to include the last point
-            lastPost = postCollectTInd[1]+1 if postCollectTInd[1] is not None\
-                       else None
+        # Ensure 4D
+        if len(curVar.shape) == 1:
+            data[var][dest,0,0,0] = curVar
+        else:
+            data[var][dest] = curVar
+#}}}
 
-            data[var] = data[var][postCollectTInd[0]:lastPost]
+#{{{_broadcastInTime
+def _broadcastInTime(field, dims, nt, out):
+    #{{{docstring
+    """
+    Broadcasts a time independent variable over the time axis.
 
-    # Recast to tuple
-    if tInd is not None:
-        tInd = tuple(tInd)
+    Parameters
+    ----------
+    field : array
+        The variable.
+    dims : tuple
+        The dimensions of the variable (a subset of (x, y, z)).
+    nt : int
+        Number of time points.
+    out : [None|array]
+        If given, the variable is copied into this array.
 
-    return data
+    Returns
+    -------
+    var : array-4d
+        Read only view of the variable with the length 1 in the missing
+        spatial dimensions, or out if given.
+    """
+    #}}}
+
+    # Insert the missing spatial dimensions
+    spatialShape = tuple(field.shape[dims.index(dim)] if dim in dims else 1\
+                         for dim in ("x", "y", "z"))
+    field = field.reshape(spatialShape)
+
+    if out is not None:
+        var = allocateAssembly(nt, spatialShape, out)
+        var[...] = field
+        return var
+
+    # NOTE: The view is read only as all the time points shares the memory
+    return np.broadcast_to(field, (nt, *spatialShape))
 #}}}
 
 #{{{removePathsOutsideRange
@@ -194,13 +577,11 @@ def removePathsOutsideRange(paths, tInd):
         lenT = 1
         lastInd = None
         for ind in range(len(paths)):
-            with DataFile(os.path.join(paths[ind],"BOUT.dmp.0.nc")) as f:
-                t = f.read("t_array")
-                # -1 removes duplicate point
-                lenT += len(t)-1
-                if tInd[1] < lenT:
-                    lastInd = ind+1
-                    break
+            # -1 removes duplicate point
+            lenT += getManifest(paths[ind])["nt"]-1
+            if tInd[1] < lenT:
+                lastInd = ind+1
+                break
 
         # Remove from the right
         paths = paths[:lastInd]
@@ -215,16 +596,14 @@ def removePathsOutsideRange(paths, tInd):
         removePaths = []
         lenTs       = []
         for path in paths:
-            with DataFile(os.path.join(path,"BOUT.dmp.0.nc")) as f:
-                t = f.read("t_array")
-                curLenT = len(t)
-                lenTs.append(curLenT)
-                # -1 removes duplicate point
-                lenT += curLenT - 1
-                if tInd[0] >= lenT:
-                    removePaths.append(path)
-                else:
-                    break
+            curLenT = getManifest(path)["nt"]
+            lenTs.append(curLenT)
+            # -1 removes duplicate point
+            lenT += curLenT - 1
+            if tInd[0] >= lenT:
+                removePaths.append(path)
+            else:
+                break
 
         tInd = list(tInd)
         for remove, lenT in zip(removePaths, lenTs):
@@ -244,7 +623,7 @@ def removePathsOutsideRange(paths, tInd):
 #}}}
 
 #{{{collectTime
-def collectTime(paths, tInd = None):
+def collectTime(paths, tInd = None, out = None):
     #{{{docstring
     """
     Collects the time
@@ -256,7 +635,10 @@ def collectTime(paths, tInd = None):
         ascending temporal order as the variable will be
         concatenated.
     tInd : [None|tuple]
-        Start and end of the time if not None
+        Start and end of the time if not None.
+        An optional third element gives the step.
+    out : [None|array]
+        If given, the time is written into this array.
 
     Returns
     -------
@@ -265,25 +647,162 @@ def collectTime(paths, tInd = None):
     """
     #}}}
 
-    # Initialize
-    time = None
+    plan, nt = getSegmentPlan(getSegmentLengths(paths), tInd)
+    time = allocateAssembly(nt, (), out)
 
-    for path in paths:
-        with DataFile(os.path.join(path,"BOUT.dmp.0.nc")) as f:
-            if time is None:
-                time = f.read("t_array")
-            else:
-                # Remove first point in time in the current time as this
-                # is the same as the last of the previous
-                time = np.concatenate((time, f.read("t_array")[1:]), axis=0)
+    for segNr, localTInd, dest in plan:
+        step = localTInd[2] if len(localTInd) > 2 else 1
+        # NOTE: +1 since the collect ranges is INCLUSIVE, i.e. not
+        #       working like a python slice
+        time[dest] = getManifest(paths[segNr])["t_array"]\
+                                [localTInd[0]:localTInd[1]+1:step]
+
+    return time
+#}}}
+
+#{{{iterCollect
+def iterCollect(paths                ,\
+                varStrings           ,\
+                chunkSize            ,\
+                collectGhost  = False,\
+                tInd          = None ,\
+                yInd          = None ,\
+                xInd          = None ,\
+                zInd          = None ,\
+                nWorkers      = None ,\
+                prefetchDepth = None):
+    #{{{docstring
+    """
+    Iterates over the variables in blocks of time.
+
+    Only the current block and the prefetched blocks are held in memory
+    at the time. The blocks are continuous over the restart segments,
+    and the duplicated time point at the start of each segment is not
+    repeated.
+
+    Parameters
+    ----------
+    paths : iterable of strings
+        The paths to collect from. Must be in ascending order of the
+        simulation time, as the variables are being concatenated
+    varStrings : iterable of strings
+        The variables to be collected
+    chunkSize : int
+        The number of time points in each block (the last block may be
+        shorter).
+    collectGhost : bool
+        If the ghost is to be collected
+    tInd : [None|tuple]
+        Start and end of the time if not None.
+        An optional third element gives the step.
+    xInd : [None|2d array]
+        x index range to collect. The first index is the start, and the
+        second is the end of the range (inclusive)
+    yInd : [None|2d array]
+        y index range to collect. The first index is the start, and the
+        second is the end of the range (inclusive)
+    zInd : [None|2d array]
+        z index range to collect. The first index is the start, and the
+        second is the end of the range (inclusive)
+    nWorkers : [None|int]
+        Number of processes reading the dump files (see
+        collectiveCollect).
+    prefetchDepth : [None|int]
+        Number of blocks collected ahead on a background thread while
+        the caller processes the current block.
+        At most prefetchDepth + 1 blocks are held in memory at the time.
+        If None, the depth set by setPrefetchDepth is used.
+
+    Yields
+    ------
+    time : 1d-array
+        The time of the block.
+    data : dict
+        Dictionary of the variables in the block.
+    """
+    #}}}
+
+    if chunkSize < 1:
+        raise ValueError("chunkSize must be at least 1")
+
+    try:
+        tLens = getSegmentLengths(paths)
+    except OSError:
+        # An OSError is thrown if the file is not found
+        raise ValueError("No collectable files found in {}".format(paths))
+
+    _, nt = getSegmentPlan(tLens, tInd)
 
+    tStart = 0
+    step   = 1
     if tInd is not None:
-        # NOTE: +1 since the collect ranges is INCLUSIVE, i.e. not working
-        #       like a python slice
-        lastT = tInd[1]+1 if tInd[1] is not None else None
-        time  = time[tInd[0]:lastT]
+        if tInd[0] is not None:
+            tStart = tInd[0]
+        if len(tInd) > 2 and tInd[2] is not None:
+            step = tInd[2]
+
+    if prefetchDepth is None:
+        prefetchDepth = _prefetchDepth
+
+    # NOTE: The blocks are not cached, as they would fill the cache
+    collectKwargs = {"collectGhost" : collectGhost,\
+                     "yInd"         : yInd        ,\
+                     "xInd"         : xInd        ,\
+                     "zInd"         : zInd        ,\
+                     "useCache"     : False       ,\
+                     "nWorkers"     : nWorkers    ,\
+                    }
+
+    blocks = []
+    for firstPoint in range(0, nt, chunkSize):
+        nPoints    = min(chunkSize, nt - firstPoint)
+        chunkStart = tStart + firstPoint*step
+        # The collect indices are inclusive
+        chunkEnd   = chunkStart + (nPoints - 1)*step
+        chunkTInd  = (chunkStart, chunkEnd, step)
+        blocks.append((paths, varStrings, chunkTInd, collectKwargs))
+
+    if prefetchDepth > 0 and len(blocks) > 1:
+        # The next blocks are collected while the caller processes the
+        # current block
+        collectKwargs["prefetchDepth"] = 0
+        for time, data in prefetch(_collectBlock, blocks, prefetchDepth):
+            yield time, data
+    else:
+        for time, data in starmap(_collectBlock, blocks):
+            yield time, data
+#}}}
 
-    return time
+#{{{_collectBlock
+def _collectBlock(paths, varStrings, tInd, collectKwargs):
+    #{{{docstring
+    """
+    Collects a block of time for iterCollect.
+
+    Parameters
+    ----------
+    paths : iterable of strings
+        The paths to collect from.
+    varStrings : iterable of strings
+        The variables to be collected
+    tInd : tuple
+        The start, end and step of the block.
+    collectKwargs : dict
+        The remaining keyword arguments to collectiveCollect.
+
+    Returns
+    -------
+    time : 1d-array
+        The time of the block.
+    data : dict
+        Dictionary of the variables in the block.
+    """
+    #}}}
+
+    data = collectiveCollect(paths, varStrings, tInd = tInd, **collectKwargs)
+    time = collectTime(paths, tInd = tInd)
+
+    return time, data
 #}}}
 
 #{{{collectPoint
@@ -331,9 +850,92 @@ def collectPoint(paths, varName, xInd, yInd, zInd, tInd = None):
     return var
 #}}}
 
+#{{{collectPoints
+def collectPoints(paths, varStrings, points, tInd = None):
+    #{{{docstring
+    """
+    Collects the variables in several spatial points at once
+
+    The window bounding all the points is read once from each file,
+    before the points are picked out, so that the cost is independent of
+    the number of points.
+    All the variables are read in the same pass over the files.
+
+    Parameters
+    -----------
+    paths : iterable of strings
+        What path to use when collecting the variable. Must be in
+        ascending temporal order as the variable will be
+        concatenated.
+    varStrings : [str|iterable of strings]
+        Name of the variable(s) to collect.
+    points : iterable of tuples
+        The (xInd, yInd, zInd) of the points.
+        If zInd is None, the full poloidal profile is collected in the
+        point.
+    tInd : [None|tuple]
+        Start and end of the time if not None
+
+    Returns
+    -------
+    var : [tuple|dict]
+        The time traces of the variable in the points with shape
+        (nt,1,1,1), or (nt,1,1,nz) if zInd of the point is None.
+        If varStrings is not a str, a dictionary with the time traces of
+        each variable is returned.
+    """
+    #}}}
+
+    single = type(varStrings) == str
+    if single:
+        varStrings = (varStrings,)
+    varStrings = tuple(varStrings)
+
+    points = tuple(points)
+    if len(points) == 0:
+        return () if single else {varName:() for varName in varStrings}
+
+    xs, ys, zs = zip(*points)
+    xInd = (min(xs), max(xs))
+    yInd = (min(ys), max(ys))
+    if None in zs:
+        zInd = None
+        zMin = 0
+    else:
+        zInd = (min(zs), max(zs))
+        zMin = zInd[0]
+
+    varDict = collectiveCollect(paths, varStrings   ,\
+                                collectGhost = False,\
+                                xInd = xInd         ,\
+                                yInd = yInd         ,\
+                                zInd = zInd         ,\
+                                tInd = tInd
+                               )
+
+    pointsDict = {}
+    for varName in varStrings:
+        window = varDict[varName]
+        var = []
+        for x, y, z in points:
+            zSlice = slice(None) if z is None\
+                     else slice(z - zMin, z - zMin + 1)
+            # Copy so that the window can be released
+            point = window[:,\
+                           x - xInd[0]:x - xInd[0] + 1,\
+                           y - yInd[0]:y - yInd[0] + 1,\
+                           zSlice].copy()
+            # Make the data immutable as in safeCollect
+            point.setflags(write=False)
+            var.append(point)
+        pointsDict[varName] = tuple(var)
+
+    return pointsDict[varStrings[0]] if single else pointsDict
+#}}}
+
 #{{{collectRadialProfile
 def collectRadialProfile(paths, varName, yInd, zInd,\
-                         tInd = None, collectGhost = False):
+                         tInd = None, collectGhost = False, scratchDir = None):
     #{{{docstring
     """
     Collects the variable in along a radial line
@@ -354,6 +956,9 @@ def collectRadialProfile(paths, varName, yInd, zInd,\
         Start and end of the time if not None
     collectGhost : bool
         Whether or not the ghost should be collected
+    scratchDir : [None|str]
+        If given, the variable is memory mapped to a scratch file in
+        this directory (see collectiveCollect).
 
     Returns
     -------
@@ -368,6 +973,7 @@ def collectRadialProfile(paths, varName, yInd, zInd,\
                                  yInd = yInd                ,\
                                  zInd = zInd                ,\
                                  tInd = tInd                ,\
+                                 scratchDir = scratchDir    ,\
                                 )
 
     var  = varDict[varName]
@@ -377,7 +983,8 @@ def collectRadialProfile(paths, varName, yInd, zInd,\
 
 #{{{collectParallelProfile
 def collectParallelProfile(paths, varName, xInd, zInd,\
-                           tInd = None, collectGhost = False):
+                           tInd = None, collectGhost = False,\
+                           scratchDir = None):
     #{{{docstring
     """
     Collects the variable in along a parallel line
@@ -398,6 +1005,9 @@ def collectParallelProfile(paths, varName, xInd, zInd,\
         Start and end of the time if not None
     collectGhost : bool
         Whether or not the ghost should be collected
+    scratchDir : [None|str]
+        If given, the variable is memory mapped to a scratch file in
+        this directory (see collectiveCollect).
 
     Returns
     -------
@@ -412,6 +1022,7 @@ def collectParallelProfile(paths, varName, xInd, zInd,\
                                 xInd = xInd                ,\
                                 zInd = zInd                ,\
                                 tInd = tInd                ,\
+                                scratchDir = scratchDir    ,\
                                )
 
     var  = varDict[varName]
@@ -421,7 +1032,8 @@ def collectParallelProfile(paths, varName, xInd, zInd,\
 
 #{{{collectPoloidalProfile
 def collectPoloidalProfile(paths, varName, xInd, yInd,\
-                           tInd = None, collectGhost = False):
+                           tInd = None, collectGhost = False,\
+                           scratchDir = None):
     #{{{docstring
     """
     Collects the variable along a poloidal line
@@ -442,6 +1054,9 @@ def collectPoloidalProfile(paths, varName, xInd, yInd,\
         Start and end of the time if not None
     collectGhost : bool
         Whether or not the ghost should be collected
+    scratchDir : [None|str]
+        If given, the variable is memory mapped to a scratch file in
+        this directory (see collectiveCollect).
 
     Returns
     -------
@@ -456,6 +1071,7 @@ def collectPoloidalProfile(paths, varName, xInd, yInd,\
                                 xInd = xInd                ,\
                                 yInd = yInd                ,\
                                 tInd = tInd                ,\
+                                scratchDir = scratchDir    ,\
                                )
 
     var  = varDict[varName]
@@ -465,7 +1081,7 @@ def collectPoloidalProfile(paths, varName, xInd, yInd,\
 
 #{{{collectConstRho
 def collectConstRho(paths, varName, xInd,\
-                    tInd = None, collectGhost = False):
+                    tInd = None, collectGhost = False, scratchDir = None):
     #{{{docstring
     """
     Collects the variable with at specified rho
@@ -484,6 +1100,9 @@ def collectConstRho(paths, varName, xInd,\
         Start and end of the time if not None
     collectGhost : bool
         Whether or not the ghost should be collected
+    scratchDir : [None|str]
+        If given, the variable is memory mapped to a scratch file in
+        this directory (see collectiveCollect).
 
     Returns
     -------
@@ -497,6 +1116,7 @@ def collectConstRho(paths, varName, xInd,\
                                 collectGhost = collectGhost,\
                                 xInd = xInd                ,\
                                 tInd = tInd                ,\
+                                scratchDir = scratchDir    ,\
                                )
 
     var  = varDict[varName]
@@ -506,7 +1126,7 @@ def collectConstRho(paths, varName, xInd,\
 
 #{{{collectConstZ
 def collectConstZ(paths, varName, yInd,\
-                  tInd = None, collectGhost = False):
+                  tInd = None, collectGhost = False, scratchDir = None):
     #{{{docstring
     """
     Collects the variable with at specified z
@@ -525,6 +1145,9 @@ def collectConstZ(paths, varName, yInd,\
         Start and end of the time if not None
     collectGhost : bool
         Whether or not the ghost should be collected
+    scratchDir : [None|str]
+        If given, the variable is memory mapped to a scratch file in
+        this directory (see collectiveCollect).
 
     Returns
     -------
@@ -538,6 +1161,7 @@ def collectConstZ(paths, varName, yInd,\
                                 collectGhost = collectGhost,\
                                 yInd = yInd                ,\
                                 tInd = tInd                ,\
+                                scratchDir = scratchDir    ,\
                                )
 
     var  = varDict[varName]
@@ -547,7 +1171,7 @@ def collectConstZ(paths, varName, yInd,\
 
 #{{{collectConstTheta
 def collectConstTheta(paths, varName, zInd,\
-                      tInd = None, collectGhost = False):
+                      tInd = None, collectGhost = False, scratchDir = None):
     #{{{docstring
     """
     Collects the variable with at a specified theta
@@ -566,6 +1190,9 @@ def collectConstTheta(paths, varName, zInd,\
         Start and end of the time if not None
     collectGhost : bool
         Whether or not the ghost should be collected
+    scratchDir : [None|str]
+        If given, the variable is memory mapped to a scratch file in
+        this directory (see collectiveCollect).
 
     Returns
     -------
@@ -579,6 +1206,7 @@ def collectConstTheta(paths, varName, zInd,\
                                 collectGhost = collectGhost,\
                                 zInd = zInd                ,\
                                 tInd = tInd                ,\
+                                scratchDir = scratchDir    ,\
                                )
 
     var  = varDict[varName]
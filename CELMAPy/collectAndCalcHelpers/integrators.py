@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 
 """
-Contains functions for taking poloidal averages
+Contains functions for integrating fields
 """
 
 import numpy as np
@@ -112,3 +112,117 @@ def radialIntegration(f, dx, startInd=None, endInd=None):
 
     return out
 #}}}
+
+#{{{fluxSurfaceWeights
+def fluxSurfaceWeights(spatialShape, rho, dx = None, dy = None):
+    #{{{docstring
+    """
+    Returns the weights of a poloidal integration, optionally combined
+    with a radial or a parallel integration.
+
+    Summing a field times the weights over the spatial dimensions gives
+    the same as poloidalIntegration followed by radialIntegration (if dx
+    is given) and parallelIntegration (if dy is given).
+
+    Parameters
+    ----------
+    spatialShape : tuple
+        The (x, y, z) shape of the fields to integrate.
+        The z dimension should not include the last poloidal slice
+        (i.e. the domain should go from [0,2pi[)
+    rho : [float|array-1d]
+        The rho of the poloidal line element rho*dtheta.
+        If an array, it must have the length of the x dimension.
+    dx : [None|float]
+        The gridspacing in x, if the radial integration is included.
+    dy : [None|float]
+        The gridspacing in y, if the parallel integration is included.
+
+    Returns
+    -------
+    weights : array-3d
+        The weights with the shape spatialShape.
+    """
+    #}}}
+
+    xLen, yLen, zLen = spatialShape
+
+    # NOTE: Theta in [0, 2*pi] so we must include the last point
+    dTheta = 2*np.pi/zLen
+
+    weights = np.empty(spatialShape)
+    weights[...] = np.reshape(rho, (-1, 1, 1))*dTheta
+    if dx is not None:
+        weights *= dx
+    if dy is not None:
+        weights *= dy
+
+    return weights
+#}}}
+
+#{{{productIntegration
+def productIntegration(f, g, weights):
+    #{{{docstring
+    """
+    Returns the spatial integral of the product of two fields.
+
+    The product is never allocated, as the multiplication and the
+    weighted sum are done in one pass.
+
+    Parameters
+    ----------
+    f : array-4d
+        The first factor.
+    g : array-4d
+        The second factor. Must have the same shape as f.
+    weights : array-3d
+        The integration weights of the spatial dimensions (see
+        fluxSurfaceWeights).
+
+    Returns
+    -------
+    out : array-1d
+        The integral of each time point.
+    """
+    #}}}
+
+    if f.shape != g.shape or f.shape[1:] != weights.shape:
+        message = "f and g must have the same shape, and the weights the "\
+                  "spatial shape, got {}, {} and {}"
+        raise ValueError(message.format(f.shape, g.shape, weights.shape))
+
+    return np.einsum("txyz,txyz,xyz->t", f, g, weights)
+#}}}
+
+#{{{iterProductIntegration
+def iterProductIntegration(blocks, weights):
+    #{{{docstring
+    """
+    Iterates over the spatial integral of the product of two fields
+    given in blocks of time.
+
+    Only the current blocks are held in memory, so that the integrated
+    flux of long runs can be found from iterCollect:
+
+    >>> blocks = ((data["f"], data["g"])\\
+    ...           for _, data in iterCollect(paths, ("f", "g"), 500))
+    >>> flux = np.concatenate(tuple(iterProductIntegration(blocks, w)))
+
+    Parameters
+    ----------
+    blocks : iterable of tuples
+        The consecutive blocks in time of the two factors.
+    weights : array-3d
+        The integration weights of the spatial dimensions (see
+        fluxSurfaceWeights).
+
+    Yields
+    ------
+    out : array-1d
+        The integral of each time point of the block.
+    """
+    #}}}
+
+    for f, g in blocks:
+        yield productIntegration(f, g, weights)
+#}}}
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+
+""" Contains the LazyField class """
+
+from .dmpReader import getProcessorLayout
+from .improvedCollect import collectiveCollect, getCollectDtype
+from .runManifest import getManifest
+from .segmentAssembler import getSegmentLengths, getSegmentPlan
+import numpy as np
+
+#{{{collectLazy
+def collectLazy(paths, varName, collectGhost = False):
+    #{{{docstring
+    """
+    Returns a variable over several paths without collecting it.
+
+    Parameters
+    ----------
+    paths : iterable of strings
+        The paths to collect from. Must be in ascending order of the
+        simulation time, as the variables are being concatenated
+    varName : str
+        Name of the variable.
+    collectGhost : bool
+        If the ghost points are to be included.
+
+    Returns
+    -------
+    field : LazyField
+        The variable, which is collected when sliced.
+    """
+    #}}}
+
+    return LazyField(paths, varName, collectGhost = collectGhost)
+#}}}
+
+#{{{LazyField
+class LazyField(object):
+    """
+    Presents a variable over several restart segments as one 4d array.
+
+    Only the time and space window of a slice is collected, so that
+
+    >>> field = collectLazy(paths, "lnN")
+    >>> lnN = field[1000:2000, 16, :, 0]
+
+    only reads the processor files and restart segments containing the
+    window. Steps in time are used in the read, so that only the kept
+    time points are read.
+    The duplicated time point at the start of each restart segment is
+    removed, so the time index counts the points of the concatenated
+    time array.
+    Variables with fewer dimensions than (t, x, y, z) are presented with
+    a length of 1 in the missing dimensions.
+    """
+
+    #{{{__init__
+    def  __init__(self                ,\
+                  paths               ,\
+                  varName             ,\
+                  collectGhost = False):
+        #{{{docstring
+        """
+        The constructor for LazyField, which finds the shape of the
+        variable from the manifests of the paths.
+
+        Parameters
+        ----------
+        paths : iterable of strings
+            The paths to collect from. Must be in ascending order of the
+            simulation time, as the variables are being concatenated
+        varName : str
+            Name of the variable.
+        collectGhost : bool
+            If the ghost points are to be included.
+        """
+        #}}}
+
+        # Set the member data
+        self._paths        = tuple(paths)
+        self._varName      = varName
+        self._collectGhost = collectGhost
+
+        try:
+            tLens = getSegmentLengths(self._paths)
+        except OSError:
+            # An OSError is thrown if the file is not found
+            raise ValueError("No collectable files found in {}".\
+                             format(self._paths))
+
+        manifest = getManifest(self._paths[0])
+        if varName not in manifest["dimensions"]:
+            raise ValueError("Variable '{}' not found in {}".\
+                             format(varName, self._paths[0]))
+        dims = manifest["dimensions"][varName]
+
+        _, nt  = getSegmentPlan(tLens)
+        layout = getProcessorLayout(self._paths[0])
+
+        nx = layout["NXPE"]*layout["MXSUB"]
+        ny = layout["NYPE"]*layout["MYSUB"]
+        if collectGhost:
+            nx += 2*layout["MXG"]
+            ny += 2*layout["MYG"]
+
+        sizes = {"t" : nt, "x" : nx, "y" : ny, "z" : layout["nz"]}
+
+        # Only the time dimension is present in the collected 1d variables,
+        # and the time independent variables are broadcast in time
+        self.shape = tuple(sizes[dim] if (dim in dims or dim == "t") else 1\
+                           for dim in ("t", "x", "y", "z"))
+        self.ndim  = 4
+        self.dtype = np.dtype(getCollectDtype())
+    #}}}
+
+    #{{{__len__
+    def __len__(self):
+        #{{{docstring
+        """
+        Returns the length of the time dimension.
+
+        Returns
+        -------
+        nt : int
+            The number of time points.
+        """
+        #}}}
+        return self.shape[0]
+    #}}}
+
+    #{{{__repr__
+    def __repr__(self):
+        #{{{docstring
+        """
+        Returns the representation of the LazyField.
+
+        Returns
+        -------
+        representation : str
+            The representation.
+        """
+        #}}}
+        return "LazyField('{}', shape={}, paths={})".\
+                format(self._varName, self.shape, self._paths)
+    #}}}
+
+    #{{{__array__
+    def __array__(self, dtype = None):
+        #{{{docstring
+        """
+        Collects the full variable.
+
+        Parameters
+        ----------
+        dtype : [None|dtype]
+            The data type of the returned array.
+
+        Returns
+        -------
+        var : array-4d
+            The collected variable.
+        """
+        #}}}
+
+        var = self[...]
+
+        if dtype is not None:
+            var = var.astype(dtype)
+
+        return var
+    #}}}
+
+    #{{{__getitem__
+    def __getitem__(self, key):
+        #{{{docstring
+        """
+        Collects a slice of the variable.
+
+        Parameters
+        ----------
+        key : [int|slice|Ellipsis|tuple]
+            The index in (t, x, y, z).
+            Integer indices removes the dimension from the result as for
+            numpy arrays.
+
+        Returns
+        -------
+        var : array
+            The collected slice.
+        """
+        #}}}
+
+        key = self._expandKey(key)
+
+        inds       = []
+        localKey   = []
+        squeezeDim = []
+        for dim, (ind, dimLen) in enumerate(zip(key, self.shape)):
+            if isinstance(ind, slice):
+                points = range(*ind.indices(dimLen))
+            else:
+                ind = int(ind)
+                if ind < -dimLen or ind >= dimLen:
+                    message = "Index {} is out of bounds for dimension {}".\
+                              format(ind, dim)
+                    raise IndexError(message)
+                points = range(ind % dimLen, ind % dimLen + 1)
+                squeezeDim.append(dim)
+
+            if len(points) == 0:
+                # Nothing needs to be collected
+                # The integer indices removes the dimension
+                shape = tuple(len(range(*k.indices(l)))\
+                              for k, l in zip(key, self.shape)\
+                              if isinstance(k, slice))
+                return np.empty(shape, dtype=self.dtype)
+
+            # The inclusive window covering the points
+            first = min(points[0], points[-1])
+            last  = max(points[0], points[-1])
+
+            if dim == 0:
+                # The step in time is used in the read
+                step = abs(points.step)
+                inds.append((first, last, step))
+                localKey.append(slice(None, None, -1 if points.step < 0\
+                                                     else None))
+                continue
+
+            inds.append((first, last))
+
+            # The points relative to the collected window
+            stop = points[-1] - first + (1 if points.step > 0 else -1)
+            localKey.append(slice(points[0] - first,\
+                                  stop if stop >= 0 else None,\
+                                  points.step))
+
+        varDict = collectiveCollect(self._paths, (self._varName,),\
+                                    collectGhost = self._collectGhost,\
+                                    tInd = inds[0],\
+                                    xInd = inds[1],\
+                                    yInd = inds[2],\
+                                    zInd = inds[3])
+
+        var = varDict[self._varName][tuple(localKey)]
+
+        return np.squeeze(var, axis=tuple(squeezeDim))
+    #}}}
+
+    #{{{_expandKey
+    def _expandKey(self, key):
+        #{{{docstring
+        """
+        Expands the key to one index per dimension.
+
+        Parameters
+        ----------
+        key : [int|slice|Ellipsis|tuple]
+            The key given to __getitem__.
+
+        Returns
+        -------
+        key : tuple
+            Tuple of four integers or slices.
+        """
+        #}}}
+
+        if not(isinstance(key, tuple)):
+            key = (key,)
+
+        for ind in key:
+            if not(isinstance(ind, (slice, int, np.integer)))\
+               and ind is not Ellipsis:
+                message = "Only integers, slices and Ellipsis are "\
+                          "supported, got {}".format(type(ind))
+                raise TypeError(message)
+
+        nEllipsis = sum(ind is Ellipsis for ind in key)
+        if nEllipsis > 1:
+            raise IndexError("Only one Ellipsis is allowed")
+
+        nMissing = self.ndim - (len(key) - nEllipsis)
+        if nMissing < 0:
+            raise IndexError("Too many indices")
+
+        if nEllipsis == 1:
+            pos = key.index(Ellipsis)
+            key = key[:pos] + (slice(None),)*nMissing + key[pos+1:]
+        else:
+            key = key + (slice(None),)*nMissing
+
+        return key
+    #}}}
+#}}}
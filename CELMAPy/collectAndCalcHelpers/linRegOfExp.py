@@ -73,3 +73,52 @@ def linRegOfExp(x,y):
 
     return B, sigmaB
 #}}}
+
+#{{{linRegOfExps
+def linRegOfExps(x,Y):
+    #{{{docstring
+    """
+    Calculates the gradients of several exponential functions sampled at
+    the same x using one linear least squares solve.
+
+    Gives the same as calling linRegOfExp on each column of Y (see
+    linRegOfExp for the details on the uncertainties).
+
+    Parameters
+    ----------
+    x : array-1d
+        The x data. Should be without measuring uncertainties.
+    Y : array-2d
+        The y data on the form (x, function), for example the magnitude
+        of the modes on the form (t, mode).
+
+    Returns
+    -------
+    B : array-1d
+        The exponential growth rate of each function.
+    sigmaB : array-1d
+        The uncertainties of B of each function.
+    """
+    #}}}
+
+    x = np.asarray(x, dtype=np.float64)
+    # Take the logarithm (in double precision also for float32 input)
+    lnY = np.log(np.asarray(Y, dtype=np.float64))
+
+    N = len(x)
+    if lnY.ndim != 2 or lnY.shape[0] != N:
+        message = "Y must be on the form ({}, function), got {}"
+        raise ValueError(message.format(N, lnY.shape))
+
+    # Fit lnY = A + B*x for all the functions at once
+    design    = np.stack((np.ones(N), x), axis=-1)
+    coeffs, _, _, _ = np.linalg.lstsq(design, lnY, rcond=None)
+    A, B      = coeffs
+    # Calculation of sigmaLnY
+    Delta     = N*np.sum(x**2) - (np.sum(x))**2
+    residuals = lnY - A - B*x[:, np.newaxis]
+    sigmaLnY  = np.sqrt((1/(N-2))*np.sum(residuals**2, axis=0))
+    sigmaB    = sigmaLnY*np.sqrt(N/Delta)
+
+    return B, sigmaB
+#}}}
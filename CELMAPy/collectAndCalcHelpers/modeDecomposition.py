@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+
+"""
+Contains functions for analysing the poloidal fourier modes
+"""
+
+import numpy as np
+
+#{{{decomposeModes
+def decomposeModes(var, nModes = None, dtype = np.float32):
+    #{{{docstring
+    """
+    Decomposes real poloidal profiles into the magnitudes and phases of
+    the poloidal modes.
+
+    As the signal is real, only the non-negative frequencies are
+    transformed (np.fft.rfft), so no complex array larger than half the
+    full spectrum is made.
+    The magnitudes equals those of calcModeMagnitude.
+
+    Parameters
+    ----------
+    var : array
+        The real signal on the form (..., t, nz).
+        The leading dimensions may for example be the probe positions.
+    nModes : [None|int]
+        If not None, only the offset mode and the first nModes modes are
+        kept.
+    dtype : type
+        The floating point type of the magnitudes and the phases.
+        Single precision is the default, as the magnitudes and the
+        phases are only plotted or fitted (linRegOfExps fits in double
+        precision). Give float for double precision.
+
+    Returns
+    -------
+    magnitude : array
+        The magnitudes on the form (..., t, nKept) where nKept is
+        int(nz/2) + 1, or nModes + 1 if smaller.
+    phase : array
+        The phases in [-pi, pi] on the same form as the magnitudes.
+    """
+    #}}}
+
+    N           = var.shape[-1]
+    nyquistMode = int(N/2) + 1
+    if nModes is None:
+        nKept = nyquistMode
+    else:
+        if nModes < 0:
+            message = "nModes must be non-negative, got {}"
+            raise ValueError(message.format(nModes))
+        nKept = min(nModes + 1, nyquistMode)
+
+    spectrum = np.fft.rfft(var, axis=-1)[...,:nKept]
+
+    # NOTE: For a real signal the negative frequencies are the complex
+    #       conjugates of the positive ones, so the magnitude of a mode
+    #       is twice the one of the positive frequency (see
+    #       calcModeMagnitude)
+    magnitude = np.abs(spectrum)
+    magnitude[...,1:] *= 2
+    if nKept == nyquistMode and nyquistMode > 1:
+        # The last mode has the same convention as in calcModeMagnitude
+        magnitude[...,nyquistMode-1] =\
+            np.abs(spectrum[...,N - nyquistMode])
+    magnitude /= N
+
+    phase = np.angle(spectrum)
+
+    return magnitude.astype(dtype, copy=False), phase.astype(dtype, copy=False)
+#}}}
+
+#{{{calcModeMagnitude
+def calcModeMagnitude(modes):
+    #{{{docstring
+    """
+    Calculates the magnitude of the poloidal modes of a real signal.
+
+    Parameters
+    ----------
+    modes : array
+        The fourier transformed signal (as given by np.fft.fft over the
+        poloidal axis) on the form (..., t, nz).
+        The leading dimensions may for example be the probe positions.
+
+    Returns
+    -------
+    magnitude : array
+        The magnitudes on the form (..., t, int(nz/2) + 1).
+    """
+    #}}}
+
+    N           = modes.shape[-1]
+    nyquistMode = int(N/2) + 1
+
+    magnitude = np.empty((*modes.shape[:-1], nyquistMode))
+    #{{{ NOTE: We are dealing with a real signal:
+    #          As the fourier transform breaks the signal up in
+    #          cisoids there will be one part of the signal in
+    #          the positive rotating ciscoid and one in the
+    #          negative (negative frequencies) for a given mode
+    #          number. We need to take into account both in
+    #          order to calculate the amplitude.
+    # http://dsp.stackexchange.com/questions/431/what-is-the-physical-significance-of-negative-frequencies?noredirect=1&lq=1
+    # http://dsp.stackexchange.com/questions/4825/why-is-the-fft-mirrored
+    #}}}
+    # Magnitude of the signal
+    # https://en.wikipedia.org/wiki/Discrete_Fourier_transform#Definition
+    # The offset mode and the Nyquist mode
+    magnitude[...,0]             = np.abs(modes[...,0])/N
+    # Minus 1 as indices count from 0
+    magnitude[...,nyquistMode-1] = np.abs(modes[...,nyquistMode % N])/N
+    # The positive and the negative frequencies of all the other modes
+    # NOTE: The negative frequencies are in reversed order at the end
+    posFreq = np.abs(modes[...,1:nyquistMode-1])
+    negFreq = np.abs(modes[...,N-1:N-nyquistMode+1:-1])
+    magnitude[...,1:nyquistMode-1] = (posFreq + negFreq)/N
+
+    return magnitude
+#}}}
+
+#{{{calcModeAngularFrequency
+def calcModeAngularFrequency(modes, time):
+    #{{{docstring
+    """
+    Calculates the angular frequency of the poloidal modes from the
+    change of their phase between the time points.
+
+    Parameters
+    ----------
+    modes : array
+        The fourier transformed signal (as given by np.fft.fft over the
+        poloidal axis) on the form (..., t, nz).
+        The leading dimensions may for example be the probe positions.
+    time : array-1d
+        The time of the signal.
+
+    Returns
+    -------
+    angularFreq : array
+        The angular frequencies on the form (..., t - 1, int(nz/2) + 1).
+        NOTE: A negative angular frequency means that the perturbations
+              are moving in the negative theta direction.
+    """
+    #}}}
+
+    nyquistMode = int(modes.shape[-1]/2) + 1
+
+    #{{{ NOTE: We are dealing with a real signal:
+    #          As the signal is real only one of the phase sifts
+    #          are needed. Notice that for a real signal the
+    #          imaginary part occurs as a complex conjugate pair
+    # http://dsp.stackexchange.com/questions/431/what-is-the-physical-significance-of-negative-frequencies?noredirect=1&lq=1
+    # http://dsp.stackexchange.com/questions/4825/why-is-the-fft-mirrored
+    #}}}
+    # The phase shift is found from atan2
+    # http://dsp.stackexchange.com/questions/23994/meaning-of-real-and-imaginary-part-of-fourier-transform-of-a-signal
+    # atan2 in [-pi, pi]
+    phase = np.angle(modes[...,:nyquistMode])
+
+    return calcPhaseAngularFrequency(phase, time)
+#}}}
+
+#{{{calcPhaseAngularFrequency
+def calcPhaseAngularFrequency(phase, time):
+    #{{{docstring
+    """
+    Calculates the angular frequency from the phase of the modes.
+
+    Parameters
+    ----------
+    phase : array
+        The phase in [-pi, pi] of the modes on the form (..., t, mode).
+    time : array-1d
+        The time of the phase.
+
+    Returns
+    -------
+    angularFreq : array
+        The angular frequencies on the form (..., t - 1, mode).
+    """
+    #}}}
+
+    prevPhaseShift = phase[...,:-1,:]
+    curPhaseShift  = phase[...,1:,:]
+    # phaseShiftDiff in [0, 2*pi]
+    phaseShiftDiff = prevPhaseShift - curPhaseShift
+
+    # Corrections of the shifts crossing the discontinuity at pi
+    # NOTE: Equivalent to np.unwrap, but with the same rounding as the
+    #       shifts turned to the opposite quadrants
+    wrapped = (curPhaseShift*prevPhaseShift < 0) &\
+              (np.abs(curPhaseShift) + np.abs(prevPhaseShift) > np.pi)
+    # We are going from pi to -pi
+    fromPi    = wrapped & (curPhaseShift < 0)
+    # We are going from -pi to pi
+    fromMinPi = wrapped & (curPhaseShift >= 0)
+    phaseShiftDiff[fromPi] =\
+        -((np.pi + curPhaseShift[fromPi]) + (np.pi - prevPhaseShift[fromPi]))
+    phaseShiftDiff[fromMinPi] =\
+        (np.pi - curPhaseShift[fromMinPi]) + (np.pi + prevPhaseShift[fromMinPi])
+
+    # The angular speed (angular frequency) has units rad/s.
+    # Remember that if angularFreq*t = 2*pi the perturbation has
+    # revolved one time
+    deltaT = np.diff(time)[:, np.newaxis]
+
+    return phaseShiftDiff/deltaT
+#}}}
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+"""
+Contains function which reads in advance on a background thread
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import multiprocessing
+import threading
+
+# Serializes the reads of the netCDF and HDF5 libraries, which are not
+# thread safe, between the background thread and the calling thread
+ioLock = threading.RLock()
+# The context of the processes reading the files
+# NOTE: The readers are not forked, as a forked reader would inherit
+#       ioLock and the library state held by a thread reading in the
+#       parent
+if "forkserver" in multiprocessing.get_all_start_methods():
+    readerContext = multiprocessing.get_context("forkserver")
+else:
+    readerContext = multiprocessing.get_context("spawn")
+
+#{{{prefetch
+def prefetch(func, argsIter, depth = 1):
+    #{{{docstring
+    """
+    Calls a function on a background thread ahead of the caller.
+
+    The calls are made in order on one background thread, so that the
+    next calls are made while the caller is processing the current
+    result.
+
+    >>> for segment in prefetch(readSegment, ((path,) for path in paths)):
+    ...     process(segment)
+
+    Parameters
+    ----------
+    func : callable
+        The function to call.
+    argsIter : iterable of tuples
+        The positional arguments of each call.
+    depth : int
+        The maximum number of calls made ahead of the caller.
+        At most depth + 1 results are held in memory at the time.
+
+    Yields
+    ------
+    result : object
+        The results of the calls in the order of argsIter.
+    """
+    #}}}
+
+    if depth < 1:
+        raise ValueError("depth must be at least 1")
+
+    argsIter = iter(argsIter)
+    pending  = deque()
+    with ThreadPoolExecutor(max_workers = 1) as worker:
+        try:
+            for args in islice(argsIter, depth):
+                pending.append(worker.submit(func, *args))
+
+            while len(pending) != 0:
+                result = pending.popleft().result()
+                # Keep the queue full while the caller processes the result
+                for args in islice(argsIter, 1):
+                    pending.append(worker.submit(func, *args))
+                yield result
+        finally:
+            # The caller stopped the iteration
+            for future in pending:
+                future.cancel()
+#}}}
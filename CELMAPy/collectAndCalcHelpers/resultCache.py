@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+
+"""
+Contains functions which caches collected variables on disk
+"""
+
+from .runManifest import getManifest
+from glob import glob
+import numpy as np
+import threading
+import hashlib
+import os
+
+# The directory used when the cache is enabled without a directory
+_defaultCacheDir = os.path.join(os.path.expanduser("~"), ".cache", "CELMAPy")
+# The directory the results are stored in (None disables the cache)
+# NOTE: The cache is disabled until it is enabled with setCache, as the
+#       home directory is usually small on clusters
+_cacheDir = None
+# Maximum total size of the cache in bytes
+_maxSize = 10*1024**3
+# Running total size of the cache in bytes (None if not yet found)
+_cacheSize = None
+
+#{{{setCache
+def setCache(cacheDir = False, maxSize = None):
+    #{{{docstring
+    """
+    Sets the location and the size of the result cache.
+
+    The cache is disabled by default.
+
+    Parameters
+    ----------
+    cacheDir : [False|None|True|str]
+        The directory to store the results in.
+        If True, the results are stored in ~/.cache/CELMAPy.
+        If None, the cache is disabled.
+        If False, the directory is not changed.
+    maxSize : [None|int]
+        Maximum total size of the cache in bytes.
+        If None, the size is not changed.
+    """
+    #}}}
+
+    global _cacheDir
+    global _maxSize
+    global _cacheSize
+
+    if cacheDir is True:
+        _cacheDir  = _defaultCacheDir
+        _cacheSize = None
+    elif cacheDir is not False:
+        _cacheDir  = cacheDir
+        _cacheSize = None
+    if maxSize is not None:
+        _maxSize = maxSize
+#}}}
+
+#{{{getCacheKey
+def getCacheKey(paths, var, collectGhost, tInd, xInd, yInd, zInd,\
+                dtype = float):
+    #{{{docstring
+    """
+    Returns the key of a collected variable.
+
+    The key depends on the paths, the variable, the index windows, the
+    guard flag, the data type and the modification times of the dump
+    files, so that results are recollected if the simulation data
+    changes.
+
+    Parameters
+    ----------
+    paths : iterable of strings
+        The paths collected from.
+    var : str
+        The variable collected.
+    collectGhost : bool
+        If the ghost points are collected.
+    tInd : [None|int|2d array]
+        The t index range.
+    xInd : [None|int|2d array]
+        The x index range.
+    yInd : [None|int|2d array]
+        The y index range.
+    zInd : [None|int|2d array]
+        The z index range.
+    dtype : dtype
+        The data type of the collected variable.
+
+    Returns
+    -------
+    key : [None|str]
+        The key, or None if the cache is disabled.
+    """
+    #}}}
+
+    if _cacheDir is None:
+        return None
+
+    source = []
+    for path in paths:
+        mtimes = getManifest(path)["mtimes"]
+        source.append((os.path.abspath(path), sorted(mtimes.items())))
+
+    windows = tuple(_normalizeInd(ind) for ind in (tInd, xInd, yInd, zInd))
+
+    keyStr = repr((tuple(source), var, bool(collectGhost), windows,\
+                   np.dtype(dtype).str))
+
+    return hashlib.sha1(keyStr.encode("utf-8")).hexdigest()
+#}}}
+
+#{{{loadCached
+def loadCached(key):
+    #{{{docstring
+    """
+    Loads a cached result.
+
+    Parameters
+    ----------
+    key : [None|str]
+        The key of the result.
+
+    Returns
+    -------
+    data : [None|array]
+        The read only memory mapped result, or None if the result is not
+        cached.
+    """
+    #}}}
+
+    if key is None or _cacheDir is None:
+        return None
+
+    fileName = _getFileName(key)
+    try:
+        data = np.load(fileName, mmap_mode="r")
+        # Mark as recently used
+        os.utime(fileName)
+    except (OSError, ValueError):
+        return None
+
+    return data
+#}}}
+
+#{{{storeCached
+def storeCached(key, data):
+    #{{{docstring
+    """
+    Stores a result in the cache.
+
+    The least recently used results are removed if the cache exceeds
+    its maximum size.
+    Nothing is done if the cache directory is not writeable, or if the
+    result alone is larger than the maximum size of the cache.
+
+    Parameters
+    ----------
+    key : [None|str]
+        The key of the result.
+    data : array
+        The result to store.
+    """
+    #}}}
+
+    global _cacheSize
+
+    if key is None or _cacheDir is None:
+        return
+
+    data = np.ascontiguousarray(data)
+    if data.nbytes > _maxSize:
+        # The result would evict the whole cache before itself
+        return
+
+    fileName = _getFileName(key)
+    tmpName  = "{}.{}.{}.tmp".format(fileName, os.getpid(),\
+                                     threading.get_ident())
+    try:
+        os.makedirs(_cacheDir, exist_ok=True)
+        # NOTE: The file object is given to np.save in order to prevent
+        #       the .npy extension to be added to the temporary file
+        with open(tmpName, "wb") as f:
+            np.save(f, data)
+        size = os.path.getsize(tmpName)
+        try:
+            # The size of an eventually overwritten result
+            oldSize = os.path.getsize(fileName)
+        except OSError:
+            oldSize = 0
+        os.replace(tmpName, fileName)
+    except OSError:
+        if os.path.exists(tmpName):
+            os.remove(tmpName)
+        return
+
+    if _cacheSize is None:
+        # The cache directory is only scanned for the first result
+        _cacheSize = sum(entry[1] for entry in _getEntries())
+    else:
+        _cacheSize += size - oldSize
+
+    if _cacheSize > _maxSize:
+        _evict(fileName)
+#}}}
+
+#{{{_getFileName
+def _getFileName(key):
+    #{{{docstring
+    """
+    Returns the file name of a cached result.
+
+    Parameters
+    ----------
+    key : str
+        The key of the result.
+
+    Returns
+    -------
+    fileName : str
+        The file name.
+    """
+    #}}}
+    return os.path.join(_cacheDir, "{}.npy".format(key))
+#}}}
+
+#{{{_normalizeInd
+def _normalizeInd(ind):
+    #{{{docstring
+    """
+    Casts an index range to a hashable representation.
+
+    Parameters
+    ----------
+    ind : [None|int|2d array]
+        The index range.
+
+    Returns
+    -------
+    ind : [None|int|tuple]
+        The index range where the numpy integers are cast to int.
+    """
+    #}}}
+
+    if ind is None:
+        return None
+
+    if hasattr(ind, "__iter__"):
+        return tuple(None if i is None else int(i) for i in ind)
+
+    return int(ind)
+#}}}
+
+#{{{_getEntries
+def _getEntries():
+    #{{{docstring
+    """
+    Returns the results in the cache.
+
+    Returns
+    -------
+    entries : list
+        List of (modification time, size, file name) of the results.
+    """
+    #}}}
+
+    entries = []
+    for fileName in glob(os.path.join(_cacheDir, "*.npy")):
+        try:
+            stat = os.stat(fileName)
+        except OSError:
+            # Removed by another process
+            continue
+        entries.append((stat.st_mtime, stat.st_size, fileName))
+
+    return entries
+#}}}
+
+#{{{_evict
+def _evict(keep):
+    #{{{docstring
+    """
+    Removes the least recently used results until the cache is within
+    90 % of its maximum size.
+
+    The margin makes sure the cache is not scanned again at the next
+    stored result.
+
+    Parameters
+    ----------
+    keep : str
+        The file name of the result which was just stored, which is not
+        removed.
+    """
+    #}}}
+
+    global _cacheSize
+
+    # The total is found again, as other processes may use the cache
+    entries   = _getEntries()
+    totalSize = sum(entry[1] for entry in entries)
+
+    # Oldest first
+    for _, size, fileName in sorted(entries):
+        if totalSize <= 0.9*_maxSize:
+            break
+        if fileName == keep:
+            continue
+        try:
+            os.remove(fileName)
+        except OSError:
+            pass
+        totalSize -= size
+
+    _cacheSize = totalSize
+#}}}
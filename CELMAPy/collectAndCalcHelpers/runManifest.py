@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+
+"""
+Contains functions which caches the metadata of a dump folder
+"""
+
+from .prefetcher import ioLock
+from boututils.datafile import DataFile
+from fnmatch import fnmatch
+import numpy as np
+import threading
+import pickle
+import time
+import os
+
+# Name of the sidecar file stored in the dump folder
+MANIFEST_NAME = "CELMAPyManifest.pickle"
+# Bumped whenever the content of the manifest changes
+MANIFEST_VERSION = 3
+
+# The manifests already read by this process
+_manifests = {}
+# The time the dump files of each manifest were last checked
+_checked = {}
+# Number of seconds a checked manifest is trusted without checking the
+# dump files again
+_manifestTTL = 0
+
+#{{{getManifest
+def getManifest(path):
+    #{{{docstring
+    """
+    Returns the metadata manifest of a dump folder.
+
+    The manifest is built from BOUT.dmp.0.nc the first time it is
+    requested, and is thereafter cached in memory and in the sidecar
+    file MANIFEST_NAME in the dump folder.
+    The cached manifest is rebuilt if any of the dump files have
+    changed, i.e. if the latest modification time, the total size or the
+    number of the dump files have changed.
+    The dump files are checked on every call, unless a time to live is
+    set with setManifestTTL.
+
+    Parameters
+    ----------
+    path : str
+        The dump folder.
+
+    Returns
+    -------
+    manifest : dict
+        Dictionary with the keys:
+            * "t_array"       - The time array
+            * "nt"            - Number of time points
+            * "NXPE"          - Number of processors in x
+            * "NYPE"          - Number of processors in y
+            * "nProc"         - Total number of processor files
+            * "MXSUB"         - Number of inner x points per processor
+            * "MYSUB"         - Number of inner y points per processor
+            * "MXG"           - Number of ghost points in x
+            * "MYG"           - Number of ghost points in y
+            * "nz"            - Number of z points
+            * "dx"            - The x grid spacing of the first processor
+            * "dy"            - The y grid spacing of the first processor
+            * "dz"            - The z grid spacing
+            * "normalization" - Dict of the normalization parameters
+                                found in the file ("mu", "omCI", "rhoS",
+                                "n0" and "Te0")
+            * "dimensions"    - Dict of the dimensions of each variable
+            * "sizes"         - Dict of the local sizes of each variable
+            * "mtimes"        - Dict of the latest modification time
+                                ("mtime"), the total size ("size") and
+                                the number ("nFiles") of the dump files
+            * "version"       - The version of the manifest format
+    """
+    #}}}
+
+    path     = os.path.abspath(path)
+    manifest = _manifests.get(path)
+    now      = time.monotonic()
+    if manifest is not None and now - _checked[path] < _manifestTTL:
+        return manifest
+
+    mtimes = _getMtimes(path)
+
+    if len(mtimes) == 0:
+        raise OSError("No dump file found in {}".format(path))
+
+    if manifest is not None and manifest["mtimes"] == mtimes:
+        _checked[path] = now
+        return manifest
+
+    sidecar  = os.path.join(path, MANIFEST_NAME)
+    manifest = _readSidecar(sidecar)
+    if manifest is None or\
+       manifest.get("version") != MANIFEST_VERSION or\
+       manifest["mtimes"] != mtimes:
+        manifest = _buildManifest(path, mtimes)
+        _writeSidecar(sidecar, manifest)
+
+    # The manifest is shared between the callers
+    manifest["t_array"].setflags(write=False)
+    _manifests[path] = manifest
+    _checked  [path] = now
+
+    return manifest
+#}}}
+
+#{{{setManifestTTL
+def setManifestTTL(ttl):
+    #{{{docstring
+    """
+    Sets the number of seconds a manifest is trusted without checking
+    the dump files again.
+
+    Checking the dump files stats every processor file, which may be
+    slow on parallel file systems.
+
+    Parameters
+    ----------
+    ttl : float
+        The time to live in seconds.
+        If 0, the dump files are checked on every call to getManifest.
+    """
+    #}}}
+
+    global _manifestTTL
+
+    if ttl < 0:
+        raise ValueError("ttl must be non-negative, got {}".format(ttl))
+
+    _manifestTTL = ttl
+#}}}
+
+#{{{getNormalizationParameter
+def getNormalizationParameter(path, name):
+    #{{{docstring
+    """
+    Returns a normalization parameter stored in the dump files.
+
+    Parameters
+    ----------
+    path : str
+        The dump folder.
+    name : ["mu"|"omCI"|"rhoS"|"n0"|"Te0"]
+        The parameter to return.
+
+    Returns
+    -------
+    value : float
+        The value of the parameter.
+    """
+    #}}}
+
+    normalization = getManifest(path)["normalization"]
+
+    if name not in normalization:
+        raise ValueError("Variable '{}' not found in {}".format(name, path))
+
+    return normalization[name]
+#}}}
+
+#{{{_getMtimes
+def _getMtimes(path):
+    #{{{docstring
+    """
+    Returns the state of the dump files.
+
+    All the dump files are found and stat'ed in one pass over the
+    folder.
+
+    Parameters
+    ----------
+    path : str
+        The dump folder.
+
+    Returns
+    -------
+    mtimes : dict
+        Dictionary with the latest modification time in nanoseconds
+        ("mtime"), the total size ("size") and the number ("nFiles") of
+        the dump files.
+        Empty if no dump file is found.
+    """
+    #}}}
+
+    mtime  = 0
+    size   = 0
+    nFiles = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if not(fnmatch(entry.name, "BOUT.dmp.*.nc")):
+                continue
+            stat    = entry.stat()
+            mtime   = max(mtime, stat.st_mtime_ns)
+            size   += stat.st_size
+            nFiles += 1
+
+    if nFiles == 0:
+        return {}
+
+    return {"mtime" : mtime, "size" : size, "nFiles" : nFiles}
+#}}}
+
+#{{{_buildManifest
+def _buildManifest(path, mtimes):
+    #{{{docstring
+    """
+    Builds the manifest from the first dump file.
+
+    Parameters
+    ----------
+    path : str
+        The dump folder.
+    mtimes : dict
+        The modification time of the first dump file and the number of
+        dump files.
+
+    Returns
+    -------
+    manifest : dict
+        The manifest.
+        See getManifest for details.
+    """
+    #}}}
+
+    manifest = {"version" : MANIFEST_VERSION, "mtimes" : mtimes}
+
+    with ioLock, DataFile(os.path.join(path, "BOUT.dmp.0.nc")) as f:
+        fileVars = f.list()
+
+        manifest["t_array"] = np.array(f.read("t_array"))
+        manifest["nt"]      = len(manifest["t_array"])
+
+        for key in ("NXPE", "NYPE", "MXSUB", "MYSUB", "MXG", "MYG"):
+            manifest[key] = int(f.read(key))
+        manifest["nProc"] = manifest["NXPE"]*manifest["NYPE"]
+
+        manifest["dimensions"] = {}
+        manifest["sizes"]      = {}
+        for var in fileVars:
+            manifest["dimensions"][var] = tuple(f.dimensions(var))
+            manifest["sizes"]     [var] = tuple(f.size(var))
+
+        # NOTE: The z size is found from the size of an evolved field
+        #       as the meaning of MZ differs between BOUT++ versions
+        manifest["nz"] = 0
+        for var in fileVars:
+            dims = manifest["dimensions"][var]
+            if "z" in dims:
+                manifest["nz"] = int(manifest["sizes"][var][dims.index("z")])
+                break
+
+        for key in ("dx", "dy", "dz"):
+            manifest[key] = np.array(f.read(key)) if key in fileVars else None
+
+        manifest["normalization"] = {}
+        for key in ("mu", "omCI", "rhoS", "n0", "Te0"):
+            if key in fileVars:
+                manifest["normalization"][key] = float(f.read(key))
+
+    return manifest
+#}}}
+
+#{{{_readSidecar
+def _readSidecar(sidecar):
+    #{{{docstring
+    """
+    Reads the sidecar file.
+
+    Parameters
+    ----------
+    sidecar : str
+        Path to the sidecar file.
+
+    Returns
+    -------
+    manifest : [None|dict]
+        The stored manifest, or None if it could not be read.
+    """
+    #}}}
+
+    try:
+        with open(sidecar, "rb") as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+#}}}
+
+#{{{_writeSidecar
+def _writeSidecar(sidecar, manifest):
+    #{{{docstring
+    """
+    Writes the sidecar file.
+
+    The file is first written to a temporary file which is then moved,
+    so that other processes never reads a partially written file.
+    Nothing is done if the dump folder is not writeable.
+
+    Parameters
+    ----------
+    sidecar : str
+        Path to the sidecar file.
+    manifest : dict
+        The manifest to store.
+    """
+    #}}}
+
+    # The thread is in the name as the manifests may be built concurrently
+    tmpName = "{}.{}.{}".format(sidecar, os.getpid(), threading.get_ident())
+    try:
+        with open(tmpName, "wb") as f:
+            pickle.dump(manifest, f)
+        os.replace(tmpName, sidecar)
+    except OSError:
+        if os.path.exists(tmpName):
+            os.remove(tmpName)
+#}}}
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+
+"""
+Contains functions which assembles the time axis of several restart
+segments into preallocated arrays
+"""
+
+from .runManifest import getManifest
+import numpy as np
+import tempfile
+import os
+
+#{{{getSegmentLengths
+def getSegmentLengths(paths):
+    #{{{docstring
+    """
+    Returns the length of the time array in each of the paths.
+
+    Parameters
+    ----------
+    paths : iterable of strings
+        The paths to the restart segments in ascending temporal order.
+
+    Returns
+    -------
+    tLens : tuple
+        The number of time points in each segment.
+    """
+    #}}}
+
+    return tuple(getManifest(path)["nt"] for path in paths)
+#}}}
+
+#{{{getSegmentPlan
+def getSegmentPlan(tLens, tInd = None):
+    #{{{docstring
+    """
+    Plans how the restart segments are put together.
+
+    The first time point of a segment is the same as the last time point
+    of the previous segment, and is therefore dropped for all but the
+    first segment.
+
+    Parameters
+    ----------
+    tLens : iterable of ints
+        The number of time points in each segment.
+    tInd : [None|tuple]
+        Start and end (inclusive) of the time in the assembled array if
+        not None. An optional third element gives the step.
+
+    Returns
+    -------
+    plan : tuple
+        Tuple of the segments which contributes to the time range.
+        Each element is on the form (segNr, localTInd, dest), where
+        segNr is the index of the segment, localTInd is the
+        collect-like (inclusive) time index range to read from the
+        segment (with the step as the third element if the step is not
+        1), and dest is the slice in the assembled array to write the
+        read data to.
+    nt : int
+        Number of time points in the assembled array.
+    """
+    #}}}
+
+    # Number of time points when the duplicates are removed
+    totalLen = tLens[0] + sum(tLen - 1 for tLen in tLens[1:])
+
+    start = 0
+    end   = totalLen - 1
+    step  = 1
+    if tInd is not None:
+        if tInd[0] is not None:
+            start = tInd[0]
+        if tInd[1] is not None:
+            end = min(tInd[1], totalLen - 1)
+        if len(tInd) > 2 and tInd[2] is not None:
+            step = tInd[2]
+            if step < 1:
+                raise ValueError("The step must be positive, got {}".\
+                                 format(step))
+
+    plan = []
+    # Global index of the first local time point in the segment
+    segStart = 0
+    for segNr, tLen in enumerate(tLens):
+        # The first point is owned by the previous segment
+        localFirst = 0 if segNr == 0 else 1
+
+        first = max(segStart + localFirst, start)
+        last  = min(segStart + tLen - 1  , end)
+
+        # Move the first point onto the strided grid
+        first += (-(first - start)) % step
+
+        if first <= last:
+            # The number of strided points in the segment
+            nPoints   = (last - first)//step + 1
+            last      = first + (nPoints - 1)*step
+            localTInd = (first - segStart, last - segStart)
+            if step != 1:
+                localTInd += (step,)
+            destStart = (first - start)//step
+            dest      = slice(destStart, destStart + nPoints)
+            plan.append((segNr, localTInd, dest))
+
+        # -1 as the last point is repeated in the next segment
+        segStart += tLen - 1
+
+    nt = max((end - start)//step + 1, 0)
+
+    return tuple(plan), nt
+#}}}
+
+#{{{allocateAssembly
+def allocateAssembly(nt, spatialShape, out = None, scratchDir = None,\
+                     dtype = float):
+    #{{{docstring
+    """
+    Allocates the array the segments will be written to.
+
+    Parameters
+    ----------
+    nt : int
+        Number of time points in the assembled array.
+    spatialShape : tuple
+        The shape of the non-temporal dimensions.
+    out : [None|array]
+        If given, the segments will be written into this array.
+        Must have the shape (nt, *spatialShape).
+    scratchDir : [None|str]
+        If given (and out is None), the array is memory mapped to a
+        scratch file in this directory instead of being held in memory.
+        The scratch file is removed as soon as it is mapped, so the disk
+        space is released when the array is garbage collected.
+    dtype : dtype
+        The data type of the allocated array (not used if out is given).
+
+    Returns
+    -------
+    assembly : array
+        The array to write the segments into.
+    """
+    #}}}
+
+    shape = (nt, *spatialShape)
+
+    if out is None:
+        if scratchDir is None:
+            return np.empty(shape, dtype=dtype)
+        else:
+            return _allocateScratch(shape, scratchDir, dtype)
+
+    if tuple(out.shape) != shape:
+        message = "out has shape {}, but {} is needed".format(out.shape, shape)
+        raise ValueError(message)
+
+    return out
+#}}}
+
+#{{{_allocateScratch
+def _allocateScratch(shape, scratchDir, dtype = float):
+    #{{{docstring
+    """
+    Allocates an array memory mapped to an anonymous scratch file.
+
+    Parameters
+    ----------
+    shape : tuple
+        The shape of the array.
+    scratchDir : str
+        The directory to put the scratch file in.
+    dtype : dtype
+        The data type of the array.
+
+    Returns
+    -------
+    scratch : memmap
+        The memory mapped array.
+    """
+    #}}}
+
+    if 0 in shape:
+        # Empty files can not be memory mapped
+        return np.empty(shape, dtype=dtype)
+
+    os.makedirs(scratchDir, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=scratchDir, suffix=".scratch") as f:
+        # NOTE: The map is kept alive after the file is closed and
+        #       removed
+        scratch = np.memmap(f, dtype=dtype, mode="w+", shape=shape)
+
+    return scratch
+#}}}
@@ -25,7 +25,9 @@ def slicesToIndices(paths, theSlice, dimension, xguards=False, yguards=False):
     Returns
     -------
     indices : tuple
-        Tuple containing the start and the stop values from the slice
+        Tuple containing the start and the stop values from the slice.
+        If dimension is "t", the step of the slice is given as the
+        third value if it is not None.
     """
     #}}}
 
@@ -100,5 +102,10 @@ def slicesToIndices(paths, theSlice, dimension, xguards=False, yguards=False):
         # Cast to tuple
         indices = (start, end)
 
+        # The step is used when reading the time
+        if type(theSlice) == slice and dimension == "t" and\
+           theSlice.step is not None:
+            indices = (start, end, theSlice.step)
+
     return indices
 #}}}
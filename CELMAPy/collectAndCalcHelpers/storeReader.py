@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+
+"""
+Contains functions which reads from the consolidated store of a run
+"""
+
+from .dmpReader import _getWindow
+from .prefetcher import ioLock
+from .runManifest import getManifest
+import numpy as np
+import hashlib
+import os
+
+try:
+    import h5py
+except ImportError:
+    # The store is optional
+    h5py = None
+
+# Name of the store, which is formatted with the hash of the paths
+STORE_NAME = "CELMAPyStore.{}.h5"
+
+#{{{readStore
+def readStore(paths, varStrings, collectGhost = False, tInd = None,\
+              xInd = None, yInd = None, zInd = None, dtype = float):
+    #{{{docstring
+    """
+    Reads variables from the store of a run.
+
+    Only the chunks covering the window are read.
+
+    Parameters
+    ----------
+    paths : iterable of strings
+        The paths of the run.
+    varStrings : iterable of strings
+        The variables to read.
+    collectGhost : bool
+        If the ghost points are to be read.
+    tInd : [None|tuple]
+        Start and end (and optionally step) of the time if not None
+    xInd : [None|int|2d array]
+        x index range to read. The first index is the start, and the
+        second is the end of the range (inclusive)
+    yInd : [None|int|2d array]
+        y index range to read. The first index is the start, and the
+        second is the end of the range (inclusive)
+    zInd : [None|int|2d array]
+        z index range to read. The first index is the start, and the
+        second is the end of the range (inclusive)
+    dtype : dtype
+        The data type of the returned variables.
+
+    Returns
+    -------
+    data : dict
+        Dictionary of the 4d variables found in the store.
+        The dictionary is empty if h5py is not installed, or if there is
+        no store which is up to date with the dump files.
+    """
+    #}}}
+
+    if h5py is None:
+        return {}
+
+    paths    = tuple(paths)
+    fileName = getStoreName(paths)
+    if not(os.path.isfile(fileName)):
+        return {}
+
+    # NOTE: The source is found before the lock is taken, as the
+    #       manifests may be read from the dump files
+    source = getSource(paths)
+
+    data = {}
+    with ioLock:
+        try:
+            f = h5py.File(fileName, "r")
+        except OSError:
+            return {}
+
+        with f:
+            if f.attrs["source"] != source:
+                # The dump files have changed since the store was written
+                return {}
+
+            nt, nx, ny, nz = f.attrs["shape"]
+            MXG            = 0 if collectGhost else f.attrs["MXG"]
+            MYG            = 0 if collectGhost else f.attrs["MYG"]
+
+            tWindow = _getWindow(tInd, nt)
+            windows = (tWindow                                        ,\
+                       _shiftWindow(_getWindow(xInd, nx - 2*MXG), MXG),\
+                       _shiftWindow(_getWindow(yInd, ny - 2*MYG), MYG),\
+                       _getWindow(zInd, nz))
+
+            for var in varStrings:
+                if var not in f:
+                    continue
+                # The data type is converted in the read
+                dset = f[var].astype(dtype)
+                if f[var].ndim == 1:
+                    data[var] =\
+                        dset[tWindow][:, np.newaxis, np.newaxis, np.newaxis]
+                else:
+                    data[var] = dset[windows]
+
+    return data
+#}}}
+
+#{{{getStoreName
+def getStoreName(paths):
+    #{{{docstring
+    """
+    Returns the file name of the store of a run.
+
+    The store is placed in the last path of the run, and the name
+    depends on all the paths of the run, so that runs merged from
+    different phases of the same simulation have different stores.
+
+    Parameters
+    ----------
+    paths : tuple
+        The paths of the run.
+
+    Returns
+    -------
+    fileName : str
+        The file name.
+    """
+    #}}}
+
+    absPaths = repr(tuple(os.path.abspath(path) for path in paths))
+    pathHash = hashlib.sha1(absPaths.encode("utf-8")).hexdigest()[:12]
+
+    return os.path.join(paths[-1], STORE_NAME.format(pathHash))
+#}}}
+
+#{{{getSource
+def getSource(paths):
+    #{{{docstring
+    """
+    Returns a description of the dump files of a run.
+
+    The description changes if any processor file of any of the paths is
+    modified, added or removed (see getManifest).
+
+    Parameters
+    ----------
+    paths : tuple
+        The paths of the run.
+
+    Returns
+    -------
+    source : str
+        The absolute paths, and the latest modification time, the total
+        size and the number of the dump files of each path.
+    """
+    #}}}
+
+    source = []
+    for path in paths:
+        mtimes = getManifest(path)["mtimes"]
+        source.append((os.path.abspath(path), sorted(mtimes.items())))
+
+    return repr(tuple(source))
+#}}}
+
+#{{{_shiftWindow
+def _shiftWindow(window, offset):
+    #{{{docstring
+    """
+    Shifts a window by an offset.
+
+    Parameters
+    ----------
+    window : slice
+        The window.
+    offset : int
+        The offset.
+
+    Returns
+    -------
+    window : slice
+        The shifted window.
+    """
+    #}}}
+    return slice(window.start + offset, window.stop + offset, window.step)
+#}}}
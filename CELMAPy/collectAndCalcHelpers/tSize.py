@@ -4,8 +4,7 @@
 Contains functions dealing with sizes of the time
 """
 
-from boututils.datafile import DataFile
-import os
+from .runManifest import getManifest
 
 #{{{getTSize
 def getTSize(paths):
@@ -27,9 +26,7 @@ def getTSize(paths):
 
     tSize = 0
     for path in paths:
-        with DataFile(os.path.join(path,"BOUT.dmp.0.nc")) as f:
-            t = f.read("t_array")
-            tSize += len(t)
+        tSize += getManifest(path)["nt"]
 
     return tSize
 #}}}
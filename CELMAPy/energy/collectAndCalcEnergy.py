@@ -65,21 +65,15 @@ class CollectAndCalcEnergy(CollectAndCalcSuperClass):
         energies = {}
 
         # Set the slice
+        # NOTE: The indices contains the step of the slice, so only the
+        #       kept time points are read
         tInd = slicesToIndices(self._collectPaths, self._tSlice, "t")
 
-        if self._tSlice is not None:
-            # Slice the variables with the step
-            # Make a new slice as the collect dealt with the start and
-            # the stop of the slice
-            newSlice = slice(None, None, self._tSlice.step)
-
         # Collect the energies
         for key in eKeys:
             var =\
                 collectiveCollect(self._collectPaths, (key,), tInd = tInd)
             var = var[key][:,0,0,0]
-            if self._tSlice is not None:
-                var = var[newSlice]
             if self.uc.convertToPhysical:
                 energies[key] = self.uc.physicalConversion(var, "eEnergy")
             else:
@@ -89,8 +83,6 @@ class CollectAndCalcEnergy(CollectAndCalcSuperClass):
             var =\
                 collectiveCollect(self._collectPaths, (key,), tInd = tInd)
             var = var[key][:,0,0,0]
-            if self._tSlice is not None:
-                var = var[newSlice]
             if self.uc.convertToPhysical:
                 energies[key] = self.uc.physicalConversion(var, "iEnergy")
             else:
@@ -101,8 +93,6 @@ class CollectAndCalcEnergy(CollectAndCalcSuperClass):
         var =\
             collectiveCollect(self._collectPaths, (key,), tInd = tInd)
         var = var[key][:,0,0,0]
-        if self._tSlice is not None:
-            var = var[newSlice]
         # NOTE: Te is a free variable, when normalized, it equals 1
         #       Hence the normalized potential energy equals the
         #       normalized particle number
@@ -117,8 +107,6 @@ class CollectAndCalcEnergy(CollectAndCalcSuperClass):
 
         # Collect the time
         time = collectTime(self._collectPaths, tInd=tInd)
-        if self._tSlice is not None:
-            time = time[newSlice]
         if self.uc.convertToPhysical:
             energies["time"] = self.uc.physicalConversion(time, "t")
         else:
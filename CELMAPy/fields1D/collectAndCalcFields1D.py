@@ -11,6 +11,8 @@ from ..collectAndCalcHelpers import (collectTime,\
                                      collectParallelProfile,\
                                      collectRadialProfile,\
                                      collectPoloidalProfile,\
+                                     collectDerived,\
+                                     isDerived,\
                                      polAvg,\
                                      slicesToIndices,\
                                      timeAvg)
@@ -209,6 +211,14 @@ class CollectAndCalcFields1D(CollectAndCalcFieldsSuperClass):
              if "zInd" in collectKwargs.keys():
                 collectKwargs.pop("zInd")
 
+        # The time average must be taken over all the time points, so
+        # the step is applied after the processing
+        stepAfterProcessing = (self._processing is not None) and\
+                              ("time" in self._processing.lower())
+        tInd = collectKwargs["tInd"]
+        if stepAfterProcessing and tInd is not None and len(tInd) > 2:
+            collectKwargs["tInd"] = tInd[:2]
+
         # Decide if theta should be collected
         if not(self._mode == "poloidal"):
             if (self._processing is not None) and\
@@ -232,7 +242,14 @@ class CollectAndCalcFields1D(CollectAndCalcFieldsSuperClass):
             collecter = collectPoloidalProfile
 
         # Collect
-        var = collecter(self._collectPaths, self._varName, **collectKwargs)
+        if isDerived(self._varName):
+            # The windows of the collecters are the same as the windows
+            # of collectDerived
+            var = collectDerived(self._collectPaths ,\
+                                 (self._varName, )  ,\
+                                 **collectKwargs)[self._varName]
+        else:
+            var = collecter(self._collectPaths, self._varName, **collectKwargs)
         time = collectTime(self._collectPaths, collectKwargs["tInd"])
 
         # Process
@@ -253,7 +270,8 @@ class CollectAndCalcFields1D(CollectAndCalcFieldsSuperClass):
                 time = timeAvgTime
 
         # Slice
-        if self._tSlice is not None:
+        # NOTE: Otherwise the step was used in the collect
+        if stepAfterProcessing and self._tSlice is not None:
             if type(self._tSlice) == slice:
                 if self._tSlice.step is not None:
                     var  = var [::self._tSlice.step]
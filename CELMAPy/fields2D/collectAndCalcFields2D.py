@@ -6,14 +6,11 @@ Contains class for collecting and calculating the 2D fields
 
 from ..superClasses import CollectAndCalcFieldsSuperClass
 from ..collectAndCalcHelpers import (addLastThetaSlice,\
-                                     collectiveCollect,\
+                                     collectDerived,\
                                      collectTime,\
                                      get2DMesh,\
-                                     polAvg,\
-                                     slicesToIndices,\
-                                     calcN,\
-                                     calcUIPar,\
-                                     calcUEPar)
+                                     polFluct,\
+                                     slicesToIndices)
 import numpy as np
 
 #{{{CollectAndCalcFields2D
@@ -109,24 +106,11 @@ class CollectAndCalcFields2D(CollectAndCalcFieldsSuperClass):
                              z        = self._dh.z,\
                              mode     = "ZT")
 
-        # Convert to indices
-        xInd = slicesToIndices(self._collectPaths[0], self._xSlice, "x",\
-                               xguards=self._xguards)
-        yInd = slicesToIndices(self._collectPaths[0], self._ySlice, "y",\
-                               yguards=self._yguards)
-        zInd = slicesToIndices(self._collectPaths[0], self._zSlice, "z")
-        tInd = slicesToIndices(self._collectPaths[0], self._tSlice, "t")
-
-        collectGhost = True if (self._xguards or self._yguards) else False
-
         # Set keyword arguments
-        collectKwargs = {\
-            "collectGhost" : collectGhost,\
-            "tInd"         : tInd        ,\
-            "xInd"         : xInd        ,\
-            "yInd"         : yInd        ,\
-            "zInd"         : zInd        ,\
-                }
+        collectKwargs = self._getCollectKwargs()
+        xInd = collectKwargs["xInd"]
+        yInd = collectKwargs["yInd"]
+        zInd = collectKwargs["zInd"]
 
         # Collect
         var, time, varPPi =\
@@ -163,8 +147,8 @@ class CollectAndCalcFields2D(CollectAndCalcFieldsSuperClass):
         """
         Collects the variable and the time.
 
-        If the varName is n, uIPar or uEPar, calculation will be done
-        through _calcNonSolvedVars
+        If the varName is a derived variable (as n, uIPar or uEPar), the
+        calculation will be done through collectDerived
 
         Parameters
         ----------
@@ -182,46 +166,23 @@ class CollectAndCalcFields2D(CollectAndCalcFieldsSuperClass):
             The collected array pi from var
         """
         #}}}
-        if self._fluct:
-            collectKwargs.update({"zInd":None})
-
-        if not(self._varName == "n" or\
-               self._varName == "uIPar" or\
-               self._varName == "uEPar"):
-            var = collectiveCollect(\
-                        self._collectPaths,\
-                        (self._varName, ) ,\
-                        **collectKwargs)
-        else:
-            var = self._calcNonSolvedVars(collectKwargs)
+        windows = self._getWindows(collectKwargs)
+
+        var = collectDerived(self._collectPaths,\
+                             (self._varName, ) ,\
+                             **windows[0])
 
         var  = var[self._varName]
         time = collectTime(self._collectPaths, collectKwargs["tInd"])
 
         # Get index
         if self._mode == "par":
-            # In this case zSlice is an integer
-            zInd = self._zSlice
-
-            # Then theta index corresponding to pi
-            piInd = round(len(self._dh.thetaRad)/2)
-
-            if zInd > piInd:
-                zPPi = zInd - piInd
-            else:
-                zPPi = zInd + piInd
+            zInd, zPPi = self._getPiIndices()
 
             # Collect the negative
-            collectKwargs.update({"zInd":zPPi})
-            if not(self._varName == "n" or\
-                   self._varName == "uIPar" or\
-                   self._varName == "uEPar"):
-                varPPi = collectiveCollect(\
-                            self._collectPaths,\
-                            (self._varName, ) ,\
-                            **collectKwargs)
-            else:
-                varPPi = self._calcNonSolvedVars(collectKwargs)
+            varPPi = collectDerived(self._collectPaths,\
+                                    (self._varName, ) ,\
+                                    **windows[1])
 
             varPPi = varPPi[self._varName]
         else:
@@ -231,22 +192,16 @@ class CollectAndCalcFields2D(CollectAndCalcFieldsSuperClass):
             # Remove the inner ghost points from the variable
             var = np.delete(var, (0), axis=1)
 
-        # Slice in t
-        if self._tSlice is not None:
-            if self._tSlice.step is not None:
-                var  = var [::self._tSlice.step]
-                time = time[::self._tSlice.step]
-
+        # NOTE: The step of the t slice is used in the collect
         if self._fluct:
-            avg = polAvg(var)
+            fluct = polFluct(var)
             if self._mode == "par":
                 # The negative must have the same average, but not the same
                 # fluctuations
-                varTmp = (var - avg)[:,:,:,zInd:zInd+1]
-                varPPi = (var - avg)[:,:,:,zPPi:zPPi+1]
-                var    = varTmp
+                varPPi = fluct[:,:,:,zPPi:zPPi+1]
+                var    = fluct[:,:,:,zInd:zInd+1]
             else:
-                var = (var - avg)
+                var = fluct
 
         if self._mode != "par":
             # Add the last theta slice
@@ -255,55 +210,124 @@ class CollectAndCalcFields2D(CollectAndCalcFieldsSuperClass):
         return var, time, varPPi
     #}}}
 
-    #{{{_calcNonSolvedVars
-    def _calcNonSolvedVars(self, collectKwargs):
+    #{{{prefetch
+    def prefetch(self):
         #{{{docstring
         """
-        Calculates variables wich are not solved in the simulation
+        Collects the variable of executeCollectAndCalc in advance.
+
+        The collected variable is kept in the memo of collectDerived, so
+        that it is not collected again by executeCollectAndCalc.
+        This can be called from a background thread while another instance
+        is calculating.
+        """
+        #}}}
+
+        # Guard
+        if len(self._notCalled) > 0:
+            message = "The following functions were not called:\n{}".\
+                        format("\n".join(self._notCalled))
+            raise RuntimeError(message)
+
+        for window in self._getWindows(self._getCollectKwargs()):
+            collectDerived(self._collectPaths,\
+                           (self._varName, ) ,\
+                           **window)
+    #}}}
+
+    #{{{_getCollectKwargs
+    def _getCollectKwargs(self):
+        #{{{docstring
+        """
+        Converts the slices to keyword arguments for the collect.
+
+        Returns
+        -------
+        collectKwargs : dict
+            The collect-like indices and the ghost flag.
+        """
+        #}}}
+
+        # Convert to indices
+        xInd = slicesToIndices(self._collectPaths[0], self._xSlice, "x",\
+                               xguards=self._xguards)
+        yInd = slicesToIndices(self._collectPaths[0], self._ySlice, "y",\
+                               yguards=self._yguards)
+        zInd = slicesToIndices(self._collectPaths[0], self._zSlice, "z")
+        tInd = slicesToIndices(self._collectPaths[0], self._tSlice, "t")
+
+        collectGhost = True if (self._xguards or self._yguards) else False
+
+        collectKwargs = {\
+            "collectGhost" : collectGhost,\
+            "tInd"         : tInd        ,\
+            "xInd"         : xInd        ,\
+            "yInd"         : yInd        ,\
+            "zInd"         : zInd        ,\
+                }
 
-        NOTE: We set normalized True here as the collected
-              variables are normalized.
-              Conversion to physical happens later in
-              executeCollectAndCalc.
+        return collectKwargs
+    #}}}
+
+    #{{{_getWindows
+    def _getWindows(self, collectKwargs):
+        #{{{docstring
+        """
+        Returns the windows which are collected.
 
         Parameters
         ----------
         collectKwargs : dict
-            Keyword arguments for collectiveCollect
+           Keyword arguments from _getCollectKwargs
 
         Returns
         -------
-        varDict : dict
-            Dictionary where the varName variable have been calculated
+        windows : tuple
+            The keyword arguments of the variable, and if mode == "par"
+            the keyword arguments of the variable pi away.
         """
         #}}}
 
-        normalized = True
+        window = collectKwargs.copy()
+        if self._fluct:
+            window.update({"zInd":None})
+        windows = (window,)
 
-        var = collectiveCollect(self._collectPaths,\
-                                ("lnN", )         ,\
-                                **collectKwargs)
-        lnN = var["lnN"]
-        n = calcN(lnN, normalized, uc = self.uc)
-        if self._varName == "n":
-            return {"n":n}
+        if self._mode == "par":
+            _, zPPi = self._getPiIndices()
+            windowPPi = window.copy()
+            windowPPi.update({"zInd":zPPi})
+            windows += (windowPPi,)
+
+        return windows
+    #}}}
+
+    #{{{_getPiIndices
+    def _getPiIndices(self):
+        #{{{docstring
+        """
+        Returns the z index and the z index pi away.
+
+        Returns
+        -------
+        zInd : int
+            The z index (zSlice is an integer when mode == "par").
+        zPPi : int
+            The z index pi away from zInd.
+        """
+        #}}}
+
+        # In this case zSlice is an integer
+        zInd = self._zSlice
+
+        # Then theta index corresponding to pi
+        piInd = round(len(self._dh.thetaRad)/2)
+
+        if zInd > piInd:
+            zPPi = zInd - piInd
         else:
-            var = collectiveCollect(self._collectPaths,\
-                                    ("momDensPar", )  ,\
-                                    **collectKwargs)
-            momDensPar = var["momDensPar"]
-            uIPar = calcUIPar(momDensPar, n)
-            if self._varName == "uIPar":
-                return {"uIPar":uIPar}
-            else:
-                var = collectiveCollect(self._collectPaths,\
-                                        ("jPar", )        ,\
-                                        **collectKwargs)
-                jPar = var["jPar"]
-                uEPar = calcUEPar(uIPar     ,\
-                                  jPar      ,\
-                                  n         ,\
-                                  normalized)
-                return {"uEPar":uEPar}
+            zPPi = zInd + piInd
+
+        return zInd, zPPi
     #}}}
 #}}}
@@ -6,10 +6,14 @@ Contains class for collecting and calculating the fourier modes
 
 from ..superClasses import CollectAndCalcPointsSuperClass
 from ..collectAndCalcHelpers import (collectTime,\
-                                     collectPoloidalProfile,\
-                                     calcN,\
-                                     calcUIPar,\
-                                     calcUEPar,\
+                                     collectDerived,\
+                                     collectPoints,\
+                                     calcDerivedVariables,\
+                                     getBaseVariables,\
+                                     calcModeMagnitude,\
+                                     calcModeAngularFrequency,\
+                                     calcPhaseAngularFrequency,\
+                                     decomposeModes,\
                                      slicesToIndices)
 import numpy as np
 
@@ -74,15 +78,15 @@ class CollectAndCalcFourierModes(CollectAndCalcPointsSuperClass):
             key = "{},{}".format(rho,par)
             fourierModes[key] = {}
 
+            # NOTE: The indices contains the step of the slice, so only
+            #       the kept time points are read
             if self._tSlice is not None:
                 t = slicesToIndices(self._collectPaths, self._tSlice[tCounter], "t")
-                tStep = self._tSlice[tCounter].step
             else:
                 t = None
-                tStep = None
             tCounter += 1
 
-            var, time = self._collectWrapper(fourierModes,key,x,y,t,tStep)
+            var, time = self._collectWrapper(fourierModes,key,x,y,t)
 
             if self.uc.convertToPhysical:
                 fourierModes[key][self._varName] =\
@@ -96,6 +100,91 @@ class CollectAndCalcFourierModes(CollectAndCalcPointsSuperClass):
         return fourierModes
     #}}}
 
+    #{{{executeModeDecomposition
+    def executeModeDecomposition(self, nModes = None, dtype = np.float32):
+        #{{{docstring
+        """
+        Function which collects and decomposes the poloidal profiles into
+        the magnitudes and phases of the fourier modes.
+
+        Contrary to executeCollectAndCalc, the complex spectrum is not
+        stored, and all the positions with the same time are transformed
+        at once.
+
+        Parameters
+        ----------
+        nModes : [None|int]
+            If not None, only the offset mode and the first nModes modes
+            are kept.
+        dtype : type
+            The floating point type of the magnitudes and the phases.
+            See decomposeModes for why single precision is the default.
+
+        Returns
+        -------
+        fourierModes2d : dict
+            Dictionary where the keys are on the form "rho,z".
+            The value is a dict containing of
+            {varNameMagnitude:magnitude, varNamePhase:phase, "time":time}.
+            The magnitude and phase are 2d arrays on the form (t,mode).
+            Can be given to calcAngularFrequency.
+        """
+        #}}}
+
+        # Guard
+        if len(self._notCalled) > 0:
+            message = "The following functions were not called:\n{}".\
+                        format("\n".join(self._notCalled))
+            raise RuntimeError(message)
+
+        # Initialize output, the positions are grouped by the time
+        fourierModes2d = {}
+        groups         = {}
+
+        for tCounter, (x, y) in enumerate(zip(self._xInd, self._yInd)):
+            # NOTE: The indices
+            rho = self._dh.rho[x]
+            par = self._dh.z  [y]
+
+            # Add key to fourierModes2d in the order of the positions
+            key = "{},{}".format(rho,par)
+            fourierModes2d[key] = {}
+
+            # NOTE: The indices contains the step of the slice, so only
+            #       the kept time points are read
+            if self._tSlice is not None:
+                t = slicesToIndices(self._collectPaths,\
+                                    self._tSlice[tCounter], "t")
+            else:
+                t = None
+
+            groups.setdefault(t, []).append((key, x, y))
+
+        for t, positions in groups.items():
+            time = collectTime(self._collectPaths, tInd=t)
+            points = tuple((x, y, None) for _, x, y in positions)
+            var = self._collectPoloidalProfiles(points, t)
+
+            magnitudes, phases = decomposeModes(var, nModes, dtype)
+
+            if self.uc.convertToPhysical:
+                time = self.uc.physicalConversion(time, "t")
+
+            for (key, _, _), magnitude, phase in\
+                    zip(positions, magnitudes, phases):
+                if self.uc.convertToPhysical:
+                    # NOTE: The conversion is a multiplication, so the
+                    #       magnitudes can be converted directly
+                    magnitude =\
+                        self.uc.physicalConversion(magnitude, self._varName)
+
+                fourierModes2d[key][self._varName+"Magnitude"] = magnitude
+                fourierModes2d[key][self._varName+"Phase"]     = phase
+                fourierModes2d[key]["time"]                    = time
+
+        return fourierModes2d
+    #}}}
+
     #{{{convertTo2D
     def convertTo2D(self, fourierModes):
         #{{{docstring
@@ -122,13 +211,13 @@ class CollectAndCalcFourierModes(CollectAndCalcPointsSuperClass):
     #}}}
 
     #{{{_collectWrapper
-    def _collectWrapper(self,fourierModes,key,x,y,t,tStep):
+    def _collectWrapper(self,fourierModes,key,x,y,t):
         #{{{docstring
         """
         Collects the variable and the time.
 
-        If the varName is n, uIPar or uEPar, calculation will be done
-        through _calcNonSolvedVars
+        If the varName is a derived variable (as n, uIPar or uEPar), the
+        calculation will be done through collectDerived
 
         Parameters
         ----------
@@ -144,8 +233,6 @@ class CollectAndCalcFourierModes(CollectAndCalcPointsSuperClass):
             The z index to collect from
         t : [None|tuple]
             The collect-like slice in t
-        tStep : [None|int]
-            The step to chop the time variable in
 
         Returns
         -------
@@ -157,82 +244,57 @@ class CollectAndCalcFourierModes(CollectAndCalcPointsSuperClass):
         #}}}
 
         time = collectTime(self._collectPaths, tInd=t)
-        collector = collectPoloidalProfile
-        indArgs = (x, y)
-        if not(self._varName == "n" or\
-               self._varName == "uIPar" or\
-               self._varName == "uEPar"):
-            var = collector(self._collectPaths,\
-                            self._varName,\
-                            *indArgs, tInd=t)
-        else:
-            var = self._calcNonSolvedVars(collector,indArgs,t)
+        # Collect the poloidal profile
+        var = collectDerived(self._collectPaths,\
+                             (self._varName,) ,\
+                             xInd = x         ,\
+                             yInd = y         ,\
+                             tInd = t)[self._varName]
 
         # Fourier transform
         var = np.fft.fft(var)
 
-        if tStep is not None:
-            # Slice the variables with the step
-            # Make a new slice as the collect dealt with the start and
-            # the stop of the slice
-            newSlice = slice(None, None, tStep)
-
-            var  = var [newSlice]
-            time = time[newSlice]
-
         return var, time
     #}}}
 
-    #{{{_calcNonSolvedVars
-    def _calcNonSolvedVars(self,collector,indArgs,t):
+    #{{{_collectPoloidalProfiles
+    def _collectPoloidalProfiles(self, points, t):
         #{{{docstring
         """
-        Calculates variables wich are not solved in the simulation
+        Collects the poloidal profiles of the variable in the points.
 
-        NOTE: We set normalized True here as the collected
-              variables are normalized.
-              Conversion to physical happens later in
-              executeCollectAndCalc.
+        If the varName is a derived variable (as n, uIPar or uEPar), the
+        variables it is derived from are collected, and the calculation
+        will be done through calcDerivedVariables
 
         Parameters
         ----------
-        collector : func
-            Function to use for collection
-        indArgs : tuple
-            Tuple of index arguments.
-            Either x and y.
+        points : tuple
+            Tuple of the (x, y, None) indices to collect from
+        t : [None|tuple]
+            The collect-like slice in t
 
         Returns
         -------
-        var : 4d-array
-            The fourier modes of the calculated variable.
+        var : array
+            The poloidal profiles on the form (point, t, nz).
         """
         #}}}
 
-        normalized = True
+        baseVars  = getBaseVariables((self._varName,))
+        collected = collectPoints(self._collectPaths, baseVars, points, tInd=t)
 
-        lnN = collector(self._collectPaths,\
-                        "lnN"             ,\
-                        *indArgs, tInd=t)
-        n = calcN(lnN, normalized, uc = self.uc)
-        if self._varName == "n":
-            return n
-        else:
-            momDensPar = collector(self._collectPaths,\
-                                   "momDensPar"      ,\
-                                   *indArgs, tInd=t)
-            uIPar = calcUIPar(momDensPar, n)
-            if self._varName == "uIPar":
-                return uIPar
-            else:
-                jPar = collector(self._collectPaths,\
-                                "jPar"            ,\
-                                *indArgs, tInd=t)
-                uEPar = calcUEPar(uIPar     ,\
-                                  jPar      ,\
-                                  n         ,\
-                                  normalized)
-                return uEPar
+        var = None
+        for nr in range(len(points)):
+            fields   = {baseVar:collected[baseVar][nr] for baseVar in baseVars}
+            pointVar = calcDerivedVariables((self._varName,), fields)\
+                       [self._varName][:,0,0,:]
+            if var is None:
+                var = np.empty((len(points), *pointVar.shape),\
+                               dtype=pointVar.dtype)
+            var[nr] = pointVar
+
+        return var
     #}}}
 
     @staticmethod
@@ -263,6 +325,7 @@ class CollectAndCalcFourierModes(CollectAndCalcPointsSuperClass):
         # Strip the variable name
         varName = varName.replace("Magnitude","")
         varName = varName.replace("AngularFrequency","")
+        varName = varName.replace("Phase","")
 
         return varName
     #}}}
@@ -292,37 +355,15 @@ class CollectAndCalcFourierModes(CollectAndCalcPointsSuperClass):
 
         varName = CollectAndCalcFourierModes.obtainVarName(fourierModes2d)
 
-        for key in fourierModes2d.keys():
-            modes = fourierModes2d[key][varName].copy()
-            tSize, N  = modes.shape
-            nyquistMode = int(N/2) + 1
-            magnitude = np.zeros((tSize, nyquistMode))
-            #{{{ NOTE: We are dealing with a real signal:
-            #          As the fourier transform breaks the signal up in
-            #          cisoids there will be one part of the signal in
-            #          the positive rotating ciscoid and one in the
-            #          negative (negative frequencies) for a given mode
-            #          number. We need to take into account both in
-            #          order to calculate the amplitude.
-            # http://dsp.stackexchange.com/questions/431/what-is-the-physical-significance-of-negative-frequencies?noredirect=1&lq=1
-            # http://dsp.stackexchange.com/questions/4825/why-is-the-fft-mirrored
-            #}}}
-            # Magnitude of the signal
-            # https://en.wikipedia.org/wiki/Discrete_Fourier_transform#Definition
-            # The offset mode and the Nyquist mode
-            magnitude[:,0]             = np.abs(modes[:,0])/N
-            # Minus 1 as indices count from 0
-            magnitude[:,nyquistMode-1] = np.abs(modes[:,nyquistMode])/N
-            # Loop over all the modes
-            # NOTE: Range exludes the last point
-            # Minus 1 as indices count from 0
-            for modeNr in range(1, nyquistMode-1):
-                posFreq              = np.abs(modes[:,  modeNr])
-                negFreq              = np.abs(modes[:, -modeNr])
-                magnitude[:, modeNr] = (posFreq + negFreq)/N
+        # All the positions with the same shape are calculated at once
+        for keys, modes in\
+                CollectAndCalcFourierModes._batchPositions(fourierModes2d,\
+                                                           varName):
+            magnitude = calcModeMagnitude(modes)
 
             # Insert into the dict
-            fourierModes2d[key][varName+"Magnitude"] = magnitude
+            for key, posMagnitude in zip(keys, magnitude):
+                fourierModes2d[key][varName+"Magnitude"] = posMagnitude
         return fourierModes2d
     #}}}
 
@@ -341,6 +382,10 @@ class CollectAndCalcFourierModes(CollectAndCalcPointsSuperClass):
             {varName:fourierModes, "time":time}.
             The fourierModes is a 2d array on the form (t,mode).
 
+        If the dict contains the phases (as given by
+        executeModeDecomposition) rather than the fourier modes, the
+        angular frequency is calculated from the phases.
+
         Returns
         -------
         fourierModes2d : dict
@@ -354,59 +399,70 @@ class CollectAndCalcFourierModes(CollectAndCalcPointsSuperClass):
 
         varName = CollectAndCalcFourierModes.obtainVarName(fourierModes2d)
 
-        for key in fourierModes2d.keys():
-            modes    = fourierModes2d[key][varName].copy()
-            time     = fourierModes2d[key]["time"]
-            tSize, N = modes.shape
-            nyquistMode = int(N/2) + 1
-            angularFreq = np.zeros((tSize-1, nyquistMode))
-            #{{{ NOTE: We are dealing with a real signal:
-            #          As the signal is real only one of the phase sifts
-            #          are needed. Notice that for a real signal the
-            #          imaginary part occurs as a complex conjugate pair
-            # http://dsp.stackexchange.com/questions/431/what-is-the-physical-significance-of-negative-frequencies?noredirect=1&lq=1
-            # http://dsp.stackexchange.com/questions/4825/why-is-the-fft-mirrored
-            #}}}
-            # The phase shift is found from atan2
-            # http://dsp.stackexchange.com/questions/23994/meaning-of-real-and-imaginary-part-of-fourier-transform-of-a-signal
-            # atan2 in [-pi, pi]
-            for modeNr in range(0, nyquistMode):
-                for tInd in range(1, tSize):
-                    deltaT = time[tInd] - time[tInd-1]
-                    prevPhaseShift = np.arctan2(modes[tInd-1, modeNr].imag,\
-                                                modes[tInd-1, modeNr].real)
-                    curPhaseShift  = np.arctan2(modes[tInd  , modeNr].imag,\
-                                                modes[tInd  , modeNr].real)
-                    # phaseShiftDiff in [0, 2*pi]
-                    phaseShiftDiff = prevPhaseShift - curPhaseShift
-
-                    # Corrections
-                    if curPhaseShift*prevPhaseShift < 0\
-                       and abs(curPhaseShift) + abs(prevPhaseShift) > np.pi:
-                        if curPhaseShift < 0:
-                            # We are going from pi to -pi
-                            # In order to avoid the discontinuity, we turn
-                            # curPhaseShift and prevPhaseShift to the opposite
-                            # quadrants
-                            tempCurPhase   = np.pi + curPhaseShift
-                            tempPrevPhase  = np.pi - prevPhaseShift
-                            phaseShiftDiff = -(tempCurPhase + tempPrevPhase)
-                        else:
-                            # We are going from -pi to pi
-                            # In order to avoid the discontinuity, we
-                            # turn curPhaseShift and prevPhaseShift to
-                            # the opposite quadrants
-                            tempCurPhase   = np.pi - curPhaseShift
-                            tempPrevPhase  = np.pi + prevPhaseShift
-                            phaseShiftDiff = tempCurPhase + tempPrevPhase
-
-                    # The angular speed (angular frequency) has units rad/s.
-                    # Remember that if angularFreq*t = 2*pi the perturbation has
-                    # revolved one time
-                    angularFreq[tInd-1, modeNr] = phaseShiftDiff/deltaT
+        firstKey = tuple(fourierModes2d.keys())[0]
+        if varName in fourierModes2d[firstKey].keys():
+            batchName   = varName
+            calcAngFreq = calcModeAngularFrequency
+        else:
+            batchName   = varName+"Phase"
+            calcAngFreq = calcPhaseAngularFrequency
+
+        # All the positions with the same time are calculated at once
+        for keys, batch in\
+                CollectAndCalcFourierModes._batchPositions(fourierModes2d,\
+                                                           batchName,\
+                                                           sameTime=True):
+            time        = fourierModes2d[keys[0]]["time"]
+            angularFreq = calcAngFreq(batch, time)
 
             # Insert into the dict
-            fourierModes2d[key][varName+"AngularFrequency"] = angularFreq
+            for key, posAngularFreq in zip(keys, angularFreq):
+                fourierModes2d[key][varName+"AngularFrequency"] =\
+                        posAngularFreq
         return fourierModes2d
     #}}}
+
+    @staticmethod
+    #{{{_batchPositions
+    def _batchPositions(fourierModes2d, varName, sameTime=False):
+        #{{{docstring
+        """
+        Stacks the positions which can be calculated together.
+
+        Parameters
+        ----------
+        fourierModes2d : dict
+            Dictionary where the keys are on the form "rho,z".
+            The value is a dict containing of at least
+            {varName:fourierModes}.
+            The fourierModes is a 2d array on the form (t,mode).
+        varName : str
+            The name of the fourier modes (or the phases).
+        sameTime : bool
+            If True, only the positions with the same time are stacked.
+
+        Returns
+        -------
+        batches : list
+            List of tuples with the keys of the positions and the fourier
+            modes of the positions stacked on the form (position, t, mode).
+        """
+        #}}}
+
+        groups = {}
+        for key in fourierModes2d.keys():
+            modes = fourierModes2d[key][varName]
+            group = (modes.shape,)
+            if sameTime:
+                group += (np.asarray(fourierModes2d[key]["time"]).tobytes(),)
+            groups.setdefault(group, []).append(key)
+
+        batches = []
+        for keys in groups.values():
+            batches.append((tuple(keys),\
+                            np.stack([fourierModes2d[key][varName]\
+                                      for key in keys])))
+
+        return batches
+    #}}}
 #}}}
@@ -56,9 +56,7 @@ def driverFourierModes(collectPaths     ,\
     ccfm.setVarName(varName)
 
     # Execute the collection
-    fm = ccfm.executeCollectAndCalc()
-    fm = ccfm.convertTo2D(fm)
-    fm = ccfm.calcMagnitude(fm)
+    fm = ccfm.executeModeDecomposition(nModes)
 
     # Plot
     pfm = PlotFourierModes(ccfm.uc         ,\
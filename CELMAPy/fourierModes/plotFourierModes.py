@@ -74,6 +74,7 @@ class PlotFourierModes(PlotSuperClass):
         # Strip the variable name
         self._varName = self._varName.replace("Magnitude","")
         self._varName = self._varName.replace("AngularFrequency","")
+        self._varName = self._varName.replace("Phase","")
 
         # Obtain the color
         self._colors = seqCMap2(np.linspace(0, 1, self._nModes))
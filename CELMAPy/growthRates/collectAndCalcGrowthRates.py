@@ -5,9 +5,11 @@ Contains class to calculate the growth rate and angular frequency
 of a time trace of a spatial FFT.
 """
 
-from ..collectAndCalcHelpers import linRegOfExp, getScanValue
+from ..collectAndCalcHelpers import linRegOfExps, getScanValue
 from ..fourierModes import CollectAndCalcFourierModes
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+import os
 
 #{{{CollectAndCalcGrowthRates
 class CollectAndCalcGrowthRates(object):
@@ -83,17 +85,8 @@ class CollectAndCalcGrowthRates(object):
         """
         #}}}
 
-        # Slice the magnitudes and the time
-        modeIndices = range(magnitudes.shape[1])
-
-        slopes  = []
-        spreads = []
-
-        for modeNr in modeIndices:
-            # Calculate the slope and the spread
-            curSlope, curSpread = linRegOfExp(time, magnitudes[:,modeNr])
-            slopes .append(curSlope)
-            spreads.append(curSpread)
+        # Calculate the slopes and the spreads of all the modes at once
+        slopes, spreads = linRegOfExps(time, magnitudes)
 
         return tuple(slopes), tuple(spreads)
     #}}}
@@ -125,16 +118,9 @@ class CollectAndCalcGrowthRates(object):
         """
         #}}}
 
-        # Slice the angularFrequency
-        modeIndices      = range(angularFrequency.shape[1])
-
-        avgAngFreqs = []
-        spreads    = []
-
-        for modeNr in modeIndices:
-            # Calculate the average and the spread
-            avgAngFreqs.append(angularFrequency[:,modeNr].mean())
-            spreads   .append(angularFrequency[:,modeNr].std() )
+        # Calculate the average and the spread of all the modes at once
+        avgAngFreqs = angularFrequency.mean(axis=0)
+        spreads     = angularFrequency.std (axis=0)
 
         return tuple(avgAngFreqs), tuple(spreads)
     #}}}
@@ -145,7 +131,8 @@ class CollectAndCalcGrowthRates(object):
                 convertToPhysical,\
                 indicesArgs      ,\
                 indicesKwargs    ,\
-                nModes = 7       ,\
+                nModes   = 7     ,\
+                nWorkers = None  ,\
                ):
         #{{{docstring
         """
@@ -166,6 +153,10 @@ class CollectAndCalcGrowthRates(object):
             NOTE: Only one spatial point should be used.
         nModes : int
             Number of modes.
+        nWorkers : [None|int]
+            Number of processes treating the scan values concurrently.
+            If None, the number of CPUs available to the process is
+            used, but never more than the number of scan values.
 
         Returns
         -------
@@ -199,45 +190,41 @@ class CollectAndCalcGrowthRates(object):
                        self._tSlices         ,\
                        )
 
-        # Loop over the folders
+        # Each scan value is treated by its own process
+        scans = []
         for scanPaths, steadyStatePath, tSlice in loopOver:
+            # Update with the correct tSlice
+            scanIndicesKwargs = dict(indicesKwargs)
+            scanIndicesKwargs.update({"tSlice" : tSlice})
+
+            scans.append((scanPaths        ,\
+                          varName          ,\
+                          convertToPhysical,\
+                          steadyStatePath  ,\
+                          indicesArgs      ,\
+                          scanIndicesKwargs,\
+                          nModes))
+
+        if nWorkers is None:
+            if hasattr(os, "sched_getaffinity"):
+                nWorkers = len(os.sched_getaffinity(0))
+            else:
+                nWorkers = os.cpu_count() or 1
+            nWorkers = min(nWorkers, len(scans))
+
+        if nWorkers > 1 and len(scans) > 1:
+            with ProcessPoolExecutor(max_workers = nWorkers) as executor:
+                results = tuple(executor.map(self.calcScanValue, *zip(*scans)))
+        else:
+            results = tuple(self.calcScanValue(*scan) for scan in scans)
+
+        # Loop over the folders
+        for (scanPaths, *_), result in zip(scans, results):
             # Obtain the scan value
             scanValue = getScanValue(scanPaths, self._scanParameter)
 
-            # Update with the correct tSlice
-            indicesKwargs.update({"tSlice" : tSlice})
-
-            fm, positionTuple, uc = \
-                self.collectAndCalcFourierModes(scanPaths        ,\
-                                                varName          ,\
-                                                convertToPhysical,\
-                                                steadyStatePath  ,\
-                                                indicesArgs      ,\
-                                                indicesKwargs    ,\
-                                               )
-
-            # NOTE: We skip the offset mode.
-            #       Thus, we add 1 in the range in order to look at
-            #       nModes modes
-            modeStart = 1
-            modeEnd   = nModes+1
-
-            # Get the keys
-            firstKey = tuple(fm.keys())[0]
-
-            # Obtain the time, magitude and the angular frequency
-            time            = fm[firstKey]["time"]
-            magnitudes      = fm[firstKey][varName+"Magnitude"]
-            angularFrequency = fm[firstKey][varName+"AngularFrequency"]
-
-            slopes, slopesStd =\
-                self.calcSlopeAndSpread(magnitudes[:, modeStart:modeEnd],\
-                                        time                            ,\
-                                       )
-
-            avgAngFreqs, avgAngFreqsStd =\
-                self.calcAvgAngularFrequencyAndSpread(\
-                                        angularFrequency[:, modeStart:modeEnd])
+            slopes, slopesStd, avgAngFreqs, avgAngFreqsStd,\
+                positionTuple, uc = result
 
             for modeInd in range(len(slopes)):
                 # Fill the multiIndexTuple and the dict
@@ -262,6 +249,96 @@ class CollectAndCalcGrowthRates(object):
         return growthRateDataFrame, positionTuple, uc
     #}}}
 
+    @staticmethod
+    #{{{calcScanValue
+    def calcScanValue(scanPaths        ,\
+                      varName          ,\
+                      convertToPhysical,\
+                      steadyStatePath  ,\
+                      indicesArgs      ,\
+                      indicesKwargs    ,\
+                      nModes):
+        #{{{docstring
+        """
+        Calculates the growth rates and the angular frequencies of one
+        scan value.
+
+        Parameters
+        ----------
+        scanPaths : tuple
+            Tuple of the scan paths.
+        varName : str
+            Name of variable to find the growth rates of.
+        convertToPhysical : bool
+            Whether or not to convert to physical units.
+        steadyStatePath : str
+            String containing the steady state path
+        indicesArgs : tuple
+            Tuple containing the indices.
+        indicesKwargs : dict
+            Keyword arguments to use when setting the indices for
+            collecting.
+        nModes : int
+            Number of modes.
+
+        Returns
+        -------
+        slopes : tuple
+            The growth rates of the modes (see calcSlopeAndSpread).
+        slopesStd : tuple
+            The spreads of the growth rates.
+        avgAngFreqs : tuple
+            The average angular frequencies of the modes (see
+            calcAvgAngularFrequencyAndSpread).
+        avgAngFreqsStd : tuple
+            The spreads of the angular frequencies.
+        positionTuple : tuple
+            The tuple containing (rho, z).
+        uc : Units Converter
+            The units converter used when obtaining the fourier modes.
+        """
+        #}}}
+
+        fm, positionTuple, uc = \
+            CollectAndCalcGrowthRates.\
+                collectAndCalcFourierModes(scanPaths        ,\
+                                           varName          ,\
+                                           convertToPhysical,\
+                                           steadyStatePath  ,\
+                                           indicesArgs      ,\
+                                           indicesKwargs    ,\
+                                           nModes = nModes  ,\
+                                          )
+
+        # NOTE: We skip the offset mode.
+        #       Thus, we add 1 in the range in order to look at
+        #       nModes modes
+        modeStart = 1
+        modeEnd   = nModes+1
+
+        # Get the keys
+        firstKey = tuple(fm.keys())[0]
+
+        # Obtain the time, magitude and the angular frequency
+        time             = fm[firstKey]["time"]
+        magnitudes       = fm[firstKey][varName+"Magnitude"]
+        angularFrequency = fm[firstKey][varName+"AngularFrequency"]
+
+        slopes, slopesStd =\
+            CollectAndCalcGrowthRates.\
+                calcSlopeAndSpread(magnitudes[:, modeStart:modeEnd],\
+                                   time                            ,\
+                                  )
+
+        avgAngFreqs, avgAngFreqsStd =\
+            CollectAndCalcGrowthRates.\
+                calcAvgAngularFrequencyAndSpread(\
+                                    angularFrequency[:, modeStart:modeEnd])
+
+        return slopes, slopesStd, avgAngFreqs, avgAngFreqsStd,\
+               positionTuple, uc
+    #}}}
+
     @staticmethod
     #{{{collectAndCalcFourierModes
     def collectAndCalcFourierModes(scanPaths                 ,\
@@ -272,6 +349,7 @@ class CollectAndCalcGrowthRates(object):
                                    indicesKwargs             ,\
                                    calcMagnitude       = True,\
                                    calcAngularFrequency = True,\
+                                   nModes              = None,\
                                   ):
         #{{{docstring
         """
@@ -296,6 +374,9 @@ class CollectAndCalcGrowthRates(object):
             If the magnitude should be collected.
         calcAngularFrequency : bool
             If the angular frequency should be collected.
+        nModes : [None|int]
+            If not None, only the offset mode and the first nModes modes
+            are kept.
 
         Returns
         -------
@@ -323,10 +404,11 @@ class CollectAndCalcGrowthRates(object):
         ccfm.setVarName(varName)
 
         # Execute the collection
-        fm = ccfm.executeCollectAndCalc()
-        fm = ccfm.convertTo2D(fm)
-        if calcMagnitude:
-            fm = ccfm.calcMagnitude(fm)
+        # NOTE: The magnitudes and phases are calculated at once
+        fm = ccfm.executeModeDecomposition(nModes)
+        if not(calcMagnitude):
+            for key in fm.keys():
+                fm[key].pop(varName+"Magnitude")
         if calcAngularFrequency:
             fm = ccfm.calcAngularFrequency(fm)
 
@@ -5,8 +5,7 @@ Contains class for collecting and calculating the radial profiles
 """
 
 from ..fields1D import CollectAndCalcFields1D
-from ..collectAndCalcHelpers import (calcN, calcUIPar, calcUEPar,\
-                                     polAvg, timeAvg)
+from ..collectAndCalcHelpers import polAvg, timeAvg
 import numpy as np
 
 #{{{CollectAndCalcRadialProfile
@@ -85,55 +84,9 @@ class CollectAndCalcRadialProfile(object):
             self.dh = ccf1D.getDh()
 
         ccf1D.setSlice(*self._slices)
-        specialCollects = ("n", "uIPar", "uEPar")
-        if not(varName in specialCollects):
-            ccf1D.setVarName(varName)
-            dict1D = ccf1D.executeCollectAndCalc()
-        else:
-            dict1D = self._specialCollect(varName, ccf1D)
-
-        return dict1D
-    #}}}
-
-    #{{{_specialCollect
-    def _specialCollect(self, varName, ccf1D):
-        #{{{docstring
-        """
-        Calculate non-collectable variables
-
-        Parameters
-        ----------
-        varName : str
-            Name of the variable to calculate
-        ccf1D : CollectAndCalcFields1D
-            Object to perform helper collections
-
-        Returns
-        -------
-        dict1D : dict
-            Dictionary with the added variable.
-            For details, see the documentation of the CollectAndCalcFields1D
-            class.
-        """
-        #}}}
-
-        ccf1D.setVarName("lnN")
+        ccf1D.setVarName(varName)
         dict1D = ccf1D.executeCollectAndCalc()
-        dict1D.update({"n" : calcN(dict1D["lnN"],\
-                                   not(ccf1D.convertToPhysical),\
-                                   ccf1D.uc)})
-        if varName != "n":
-            ccf1D.setVarName("momDensPar")
-            dict1D.update(ccf1D.executeCollectAndCalc())
-            dict1D.update({"uIPar":\
-                           calcUIPar(dict1D["momDensPar"],dict1D["n"])})
-        if varName == "uEPar":
-            ccf1D.setVarName("jPar")
-            dict1D.update(ccf1D.executeCollectAndCalc())
-            dict1D.update({"uEPar": calcUEPar(dict1D["uIPar"],\
-                                              dict1D["jPar"],\
-                                              dict1D["n"],\
-                                              not(ccf1D.convertToPhysical))})
+
         return dict1D
     #}}}
 
@@ -5,3 +5,4 @@ Init-file for repairBrokenExits
 """
 
 from .repairBrokenExit import repairBrokenExit
+from .integrityScanner import scanDumpFolders, printReport
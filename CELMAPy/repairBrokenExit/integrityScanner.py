@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+
+"""
+Contains functions which scans dump folders for partial or corrupted
+dump and restart files
+"""
+
+from ..collectAndCalcHelpers.prefetcher import ioLock, readerContext
+from boututils.datafile import DataFile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import glob, os, re
+
+#{{{scanDumpFolders
+def scanDumpFolders(paths, nWorkers = None, stride = 4, nTimeSamples = 8):
+    #{{{docstring
+    """
+    Scans dump folders for partial or corrupted files.
+
+    Only the headers of the files are read, apart from the two last time
+    points of t_array, and strided samples of the fields, so that a whole
+    scan tree can be checked before the plots are submitted.
+    The following is checked:
+        * That the number of dump files matches NXPE*NYPE
+        * That all the dump files have the same number of time points
+        * That the time variables have the length of t_array
+        * That the last time is after the second last time (an
+          interrupted run leaves 0 at the last time)
+        * That the sampled fields of the dump files are finite, and not
+          zero at the last time point if they were not zero earlier
+        * That the sampled fields of the restart files are finite and not
+          zero
+
+    Parameters
+    ----------
+    paths : iterable of strings
+        The dump folders to scan.
+    nWorkers : [None|int]
+        Number of processes scanning the files.
+        If None, the number of CPUs available to the process is used.
+        As in collectiveCollect, the processes are not forked.
+    stride : int
+        The stride of the spatial samples.
+    nTimeSamples : int
+        The approximate number of time points sampled in the dump files.
+        The last time point is always sampled.
+
+    Returns
+    -------
+    report : dict
+        Dictionary with the paths as keys and a tuple of the found
+        problems as values. The tuple is empty if no problems were found.
+    """
+    #}}}
+
+    if stride < 1 or nTimeSamples < 1:
+        raise ValueError("stride and nTimeSamples must be at least 1")
+
+    paths = tuple(paths)
+    if nWorkers is None:
+        if hasattr(os, "sched_getaffinity"):
+            nWorkers = len(os.sched_getaffinity(0))
+        else:
+            nWorkers = os.cpu_count() or 1
+
+    fileNames = {}
+    for path in paths:
+        fileNames[path] = (_getFileNames(path, "dmp"),\
+                           _getFileNames(path, "restart"))
+
+    scans = tuple((fileName, stride, nTimeSamples)\
+                  for dmpFiles, restartFiles in fileNames.values()\
+                  for fileName in dmpFiles + restartFiles)
+
+    if nWorkers > 1 and len(scans) > 1:
+        with ProcessPoolExecutor(max_workers = nWorkers    ,\
+                                 mp_context  = readerContext) as executor:
+            results = executor.map(_scanFile, *zip(*scans),\
+                                   chunksize = max(len(scans)//nWorkers, 1))
+            results = dict(zip((scan[0] for scan in scans), results))
+    else:
+        results = {scan[0]:_scanFile(*scan) for scan in scans}
+
+    report = {}
+    for path, (dmpFiles, restartFiles) in fileNames.items():
+        report[path] = _checkFolder(dmpFiles, restartFiles, results)
+
+    return report
+#}}}
+
+#{{{printReport
+def printReport(report):
+    #{{{docstring
+    """
+    Prints the broken folders found by scanDumpFolders.
+
+    Parameters
+    ----------
+    report : dict
+        The report from scanDumpFolders.
+    """
+    #}}}
+
+    broken = tuple(path for path in sorted(report.keys()) if report[path])
+
+    print("\n{} of {} dump folders are broken".\
+          format(len(broken), len(report)))
+    for path in broken:
+        print("\n{}".format(path))
+        for problem in report[path]:
+            print("    {}".format(problem))
+#}}}
+
+#{{{_getFileNames
+def _getFileNames(path, fileType):
+    #{{{docstring
+    """
+    Returns the files of a folder sorted by the processor number.
+
+    Parameters
+    ----------
+    path : str
+        The dump folder.
+    fileType : ["dmp"|"restart"]
+        The type of file.
+
+    Returns
+    -------
+    fileNames : tuple
+        The file names.
+    """
+    #}}}
+
+    fileNames = glob.glob(os.path.join(path, "BOUT.{}.*.nc".format(fileType)))
+    procNr = lambda fileName:\
+        int(re.search(r"\.(\d+)\.nc$", fileName).group(1))
+
+    return tuple(sorted(fileNames, key=procNr))
+#}}}
+
+#{{{_scanFile
+def _scanFile(fileName, stride, nTimeSamples):
+    #{{{docstring
+    """
+    Scans one dump or restart file.
+
+    Parameters
+    ----------
+    fileName : str
+        The file to scan.
+    stride : int
+        The stride of the spatial samples.
+    nTimeSamples : int
+        The approximate number of time points sampled.
+
+    Returns
+    -------
+    result : dict
+        Dictionary with the keys:
+            * "nt"       - The length of t_array (None for restart files)
+            * "nProc"    - NXPE*NYPE of the file (None if not found)
+            * "problems" - List of the problems found in the file
+    """
+    #}}}
+
+    result = {"nt" : None, "nProc" : None, "problems" : []}
+    problems = result["problems"]
+    spatial  = [slice(None, None, stride)]*3
+
+    try:
+        with ioLock, DataFile(fileName) as f:
+            varList = f.list()
+
+            if "NXPE" in varList and "NYPE" in varList:
+                result["nProc"] = int(f.read("NXPE"))*int(f.read("NYPE"))
+
+            if "t_array" in varList:
+                nt = f.size("t_array")[0]
+                result["nt"] = nt
+                if nt == 0:
+                    problems.append("t_array is empty")
+                elif nt > 1:
+                    times = f.read("t_array", ranges=[slice(nt - 2, nt)])
+                    if not(times[-1] > times[-2]):
+                        problems.append("the last time {} is not after {}".\
+                                        format(times[-1], times[-2]))
+
+            for var in varList:
+                nDims = f.ndims(var)
+                if result["nt"] is not None and nDims in (1, 4):
+                    # The time variables of the dump files
+                    nt = result["nt"]
+                    if f.size(var)[0] != nt:
+                        problems.append("{} has {} time points, t_array {}".\
+                                        format(var, f.size(var)[0], nt))
+                        continue
+                    if nDims == 1 or nt == 0:
+                        continue
+                    # The last time point is always sampled
+                    tStride = max(nt//nTimeSamples, 1)
+                    tSlice  = slice((nt - 1) % tStride, nt, tStride)
+                    sample  = np.asarray(f.read(var, ranges=[tSlice]+spatial))
+                    if not(np.all(np.isfinite(sample))):
+                        problems.append("{} is not finite".format(var))
+                    elif np.any(sample[:-1]) and not(np.any(sample[-1])):
+                        problems.append("{} is zero at the last time".\
+                                        format(var))
+                elif result["nt"] is None and nDims == 3:
+                    # The fields of the restart files
+                    sample = np.asarray(f.read(var, ranges=spatial))
+                    if not(np.all(np.isfinite(sample))):
+                        problems.append("{} is not finite".format(var))
+                    elif not(np.any(sample)):
+                        problems.append("{} is zero".format(var))
+    except (OSError, RuntimeError, KeyError, IndexError) as error:
+        # A truncated file can not be opened or read
+        problems.append("could not be read ({})".format(error))
+
+    return result
+#}}}
+
+#{{{_checkFolder
+def _checkFolder(dmpFiles, restartFiles, results):
+    #{{{docstring
+    """
+    Checks the scanned files of a dump folder against each other.
+
+    Parameters
+    ----------
+    dmpFiles : tuple
+        The dump files of the folder.
+    restartFiles : tuple
+        The restart files of the folder.
+    results : dict
+        The results of _scanFile with the file names as keys.
+
+    Returns
+    -------
+    problems : tuple
+        The problems found in the folder.
+    """
+    #}}}
+
+    if len(dmpFiles) == 0:
+        return ("no dump files found",)
+
+    problems = []
+
+    nProc = results[dmpFiles[0]]["nProc"]
+    if nProc is not None and nProc != len(dmpFiles):
+        problems.append("found {} dump files, but NXPE*NYPE is {}".\
+                        format(len(dmpFiles), nProc))
+    if len(restartFiles) not in (0, len(dmpFiles)):
+        problems.append("found {} restart files, but {} dump files".\
+                        format(len(restartFiles), len(dmpFiles)))
+
+    nts = tuple(results[fileName]["nt"] for fileName in dmpFiles\
+                if results[fileName]["nt"] is not None)
+    if len(nts) != len(dmpFiles):
+        problems.append("{} dump files have no t_array".\
+                        format(len(dmpFiles) - len(nts)))
+    if len(nts) != 0 and min(nts) != max(nts):
+        problems.append("the dump files have between {} and {} time points".\
+                        format(min(nts), max(nts)))
+
+    for fileName in dmpFiles + restartFiles:
+        for problem in results[fileName]["problems"]:
+            problems.append("{}: {}".format(os.path.basename(fileName),\
+                                            problem))
+
+    return tuple(problems)
+#}}}
@@ -128,7 +128,8 @@ def checkForDifferentLengths(dmpFiles):
     for d in dmpFiles:
         print("\nChecking {}".format(d))
         with DataFile(d) as dmp:
-            tLen = len(dmp.read("t_array"))
+            # Only the header is read
+            tLen = dmp.size("t_array")[0]
             curMax = curMax if curMax > tLen else tLen
             curMin = curMin if curMin < tLen else tLen
 
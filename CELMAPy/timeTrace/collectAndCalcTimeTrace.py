@@ -5,13 +5,11 @@ Contains class for collecting and calculating the time traces
 """
 
 from ..superClasses import CollectAndCalcPointsSuperClass
-from ..collectAndCalcHelpers import (polAvg,\
-                                     collectPoint,\
+from ..collectAndCalcHelpers import (polFluct,\
+                                     collectPoints,\
                                      collectTime,\
-                                     collectPoloidalProfile,\
-                                     calcN,\
-                                     calcUIPar,\
-                                     calcUEPar,\
+                                     calcDerivedVariables,\
+                                     getBaseVariables,\
                                      slicesToIndices,\
                                      )
 
@@ -86,6 +84,8 @@ class CollectAndCalcTimeTrace(CollectAndCalcPointsSuperClass):
 
         # Initialize output
         timeTraces = {}
+        keys  = []
+        tInds = []
         tCounter = 0
         for x, y, z in zip(self._xInd, self._yInd, self._zInd):
             # NOTE: The indices
@@ -96,35 +96,43 @@ class CollectAndCalcTimeTrace(CollectAndCalcPointsSuperClass):
             # Add key and dict to timeTraces
             key = "{},{},{}".format(rho,theta,par)
             timeTraces[key] = {}
+            keys.append(key)
 
-            # Collect and slice
+            # NOTE: The indices contains the step of the slice, so only
+            #       the kept time points are read
             if self._tSlice is not None:
                 t = slicesToIndices(self._collectPaths, self._tSlice[tCounter], "t")
-                tStep = self._tSlice[tCounter].step
             else:
                 t = None
-                tStep = None
+            tInds.append(t)
 
-            var, time = self._collectWrapper(timeTraces,key,x,y,z,t)
+            tCounter += 1
 
-            if tStep is not None:
-                # Slice the variables with the step
-                # Make a new slice as the collect dealt with the start and
-                # the stop of the slice
-                newSlice = slice(None, None, tStep)
-                var  = var [newSlice]
-                time = time[newSlice]
+        # Collect all the points with the same time indices at once
+        for pointNr, t in enumerate(tInds):
+            if t in tInds[:pointNr]:
+                continue
+            pointNrs = tuple(nr for nr in range(len(tInds)) if tInds[nr] == t)
+            points   = tuple((self._xInd[nr], self._yInd[nr], self._zInd[nr])\
+                             for nr in pointNrs)
 
-            if self.uc.convertToPhysical:
-                timeTraces[key][self._varName] =\
-                        self.uc.physicalConversion(var , self._varName)
-                timeTraces[key]["time"]  =\
-                        self.uc.physicalConversion(time, "t")
-            else:
-                timeTraces[key][self._varName] = var
-                timeTraces[key]["time"]        = time
+            var, time = self._collectWrapper(points, t)
+
+            for nr, pointVar in zip(pointNrs, var):
+                key = keys[nr]
+
+                if self._mode == "fluct":
+                    timeTraces[key]["zInd"] = self._zInd[nr]
+
+                if self.uc.convertToPhysical:
+                    timeTraces[key][self._varName] =\
+                            self.uc.physicalConversion(pointVar, self._varName)
+                    timeTraces[key]["time"]  =\
+                            self.uc.physicalConversion(time, "t")
+                else:
+                    timeTraces[key][self._varName] = pointVar
+                    timeTraces[key]["time"]        = time
 
-            tCounter += 1
         return timeTraces
     #}}}
 
@@ -161,33 +169,26 @@ class CollectAndCalcTimeTrace(CollectAndCalcPointsSuperClass):
     #}}}
 
     #{{{_collectWrapper
-    def _collectWrapper(self,timeTraces,key,x,y,z,t):
+    def _collectWrapper(self,points,t):
         #{{{docstring
         """
-        Collects the variable and the time.
+        Collects the variable in the points and the time.
 
-        If the varName is n, uIPar or uEPar, calculation will be done
-        through _calcNonSolvedVars
+        If the varName is a derived variable (as n, uIPar or uEPar), the
+        variables it is derived from are collected, and the calculation
+        will be done through calcDerivedVariables
 
         Parameters
         ----------
-        timeTraces : dict
-            Dict containing the time traces
-        key : str
-            Key with the point position
-        x : int
-            The x index to collect from
-        y : int
-            The y index to collect from
-        z : int
-            The z index to collect from
+        points : tuple
+            Tuple of the (x, y, z) indices to collect from
         t : [None|tuple]
             The collect-like slice in t
 
         Returns
         -------
-        var : array-4d
-            The collected array.
+        var : tuple
+            The collected 4d arrays of the points.
         time : array
             The time array.
         """
@@ -195,80 +196,29 @@ class CollectAndCalcTimeTrace(CollectAndCalcPointsSuperClass):
 
         time = collectTime(self._collectPaths, tInd=t)
 
-        if self._mode == "normal":
-            collector = collectPoint
-            indArgs = (x, y, z)
-        elif self._mode == "fluct":
-            collector = collectPoloidalProfile
-            indArgs = (x, y)
-        if not(self._varName == "n" or\
-               self._varName == "uIPar" or\
-               self._varName == "uEPar"):
-            var = collector(self._collectPaths,\
-                            self._varName,\
-                            *indArgs, tInd=t)
-        else:
-            var = self._calcNonSolvedVars(collector,indArgs,t)
+        if self._mode == "fluct":
+            # The whole poloidal profile is needed for the average
+            points = tuple((x, y, None) for x, y, _ in points)
+
+        # NOTE: The collected variables are normalized.
+        #       Conversion to physical happens later in
+        #       executeCollectAndCalc.
+        baseVars  = getBaseVariables((self._varName,))
+        collected = collectPoints(self._collectPaths, baseVars, points, tInd=t)
+
+        var = []
+        for nr in range(len(points)):
+            fields = {baseVar:collected[baseVar][nr] for baseVar in baseVars}
+            var.append(calcDerivedVariables((self._varName,), fields)\
+                       [self._varName])
+        var = tuple(var)
 
         if self._mode == "fluct":
-            var = (var - polAvg(var))
-            timeTraces[key]["zInd"] = z
+            var = tuple(polFluct(pointVar) for pointVar in var)
 
         return var, time
     #}}}
 
-    #{{{_calcNonSolvedVars
-    def _calcNonSolvedVars(self,collector,indArgs,t):
-        #{{{docstring
-        """
-        Calculates variables wich are not solved in the simulation
-
-        NOTE: We set normalized True here as the collected
-              variables are normalized.
-              Conversion to physical happens later in
-              executeCollectAndCalc.
-
-        Parameters
-        ----------
-        collector : func
-            Function to use for collection
-        indArgs : tuple
-            Tuple of index arguments.
-            Either x,y and z, or x and y.
-
-        Returns
-        -------
-        var : 4d-array
-            The time trace of the calculated variable.
-        """
-        #}}}
-
-        normalized = True
-
-        lnN = collector(self._collectPaths,\
-                        "lnN"             ,\
-                        *indArgs, tInd=t)
-        n = calcN(lnN, normalized, uc = self.uc)
-        if self._varName == "n":
-            return n
-        else:
-            momDensPar = collector(self._collectPaths,\
-                                   "momDensPar"      ,\
-                                   *indArgs, tInd=t)
-            uIPar = calcUIPar(momDensPar, n)
-            if self._varName == "uIPar":
-                return uIPar
-            else:
-                jPar = collector(self._collectPaths,\
-                                "jPar"            ,\
-                                *indArgs, tInd=t)
-                uEPar = calcUEPar(uIPar     ,\
-                                  jPar      ,\
-                                  n         ,\
-                                  normalized)
-                return uEPar
-    #}}}
-
     #{{{getDh
     def getDh(self):
         """
@@ -6,19 +6,15 @@ Contains the total flux calculation
 
 from ..calcVelocities import calcRadialExBConstRho
 from ..collectAndCalcHelpers import (DimensionsHelper   ,\
-                                     calcUEPar          ,\
-                                     calcUIPar          ,\
-                                     collectConstZ      ,\
-                                     collectConstRho    ,\
+                                     collectDerived     ,\
                                      collectTime        ,\
+                                     fluxSurfaceWeights ,\
                                      getGridSizes       ,\
-                                     parallelIntegration,\
-                                     poloidalIntegration,\
-                                     radialIntegration  ,\
+                                     polFluct           ,\
+                                     productIntegration ,\
                                      slicesToIndices    ,\
                                     )
 from ..unitsConverter import UnitsConverter
-import numpy as np
 
 #{{{CollectAndCalcTotalFlux
 class CollectAndCalcTotalFlux(object):
@@ -100,11 +96,9 @@ class CollectAndCalcTotalFlux(object):
         Function which collects and calculates the integrated fluxes.
 
         This fucntion will:
-            1. Collect the velocities
-            2. Calculate n from collected lnN
-            3. Multiply and integrate
-            4. Recast to 1D
-            5. Out parallel int flux, perpendicular int flux
+            1. Collect the density and the velocities
+            2. Multiply and integrate in one pass
+            3. Out parallel int flux, perpendicular int flux
 
         Returns
         -------
@@ -130,26 +124,19 @@ class CollectAndCalcTotalFlux(object):
         # Initialize output
         totalFluxes = {}
 
-        # Collect densities
-        radialN = np.exp(self._collectAndCalcConstRho("lnN"))
-        parN    = np.exp(self._collectAndCalcConstZ("lnN"))
-
-        if self.convertToPhysical:
-            radialN = self.uc.physicalConversion(radialN, "n")
-            parN    = self.uc.physicalConversion(parN   , "n")
-
-        # Collect the parallel velocities
-        parMomDensPar = self._collectAndCalcConstZ("momDensPar")
-        parJPar       = self._collectAndCalcConstZ("jPar")
-        parIonVel = calcUIPar(parMomDensPar, parN)
-        parElVel  = calcUEPar(parIonVel, parJPar, parN,
-                              not(self.convertToPhysical))
+        # Collect the density and the parallel velocities
+        radialN = self._collectAndCalcConstRho(("n",))["n"]
+        parVars = self._collectAndCalcConstZ(("n", "uIPar", "uEPar"))
+        parN      = parVars["n"]
+        parIonVel = parVars["uIPar"]
+        parElVel  = parVars["uEPar"]
 
         if self._mode == "fluct":
-            radialN   = (radialN   - polAvg(radialN))
-            parN      = (parN      - polAvg(parN))
-            parIonVel = (parIonVel - polAvg(parIonVel))
-            parElVel  = (parElVel  - polAvg(parElVel))
+            # NOTE: The collected variables are read only
+            radialN   = polFluct(radialN)
+            parN      = polFluct(parN)
+            parIonVel = polFluct(parIonVel)
+            parElVel  = polFluct(parElVel)
 
         # Collect the perpendicular velocities
         radialExB = calcRadialExBConstRho(\
@@ -165,43 +152,32 @@ class CollectAndCalcTotalFlux(object):
         if self.convertToPhysical:
             time = self.uc.physicalConversion(time ,"t")
 
-        if self._tSlice is not None:
-            if type(self._tSlice) == slice:
-                if self._tSlice.step is not None:
-                    time  = time[::self._tSlice.step]
-
-        # Multiply
-        radFluxDens    = radialN*radialExB
-        parElFluxDens  = parN*parElVel
-        parIonFluxDens = parN*parIonVel
-
         # Integration multipliers
         rho = self._dh.rho[self._xInd]
         dx = self._dh.dx
         dy = self._dh.dy
 
-        # First integration
-        intRadFluxDens    = poloidalIntegration(radFluxDens   , rho)
-        intParElFluxDens  = poloidalIntegration(parElFluxDens , rho)
-        intParIonFluxDens = poloidalIntegration(parIonFluxDens, rho)
+        # The products are multiplied and integrated in one pass
+        parWeights  = fluxSurfaceWeights(parN.shape[1:], rho, dx = dx)
+        perpWeights = fluxSurfaceWeights(radialN.shape[1:], rho, dy = dy)
 
-        int2RadFluxDens    = radialIntegration  (intParElFluxDens , dx)
-        int2ParElFluxDens  = radialIntegration  (intParIonFluxDens, dx)
-        int2ParIonFluxDens = parallelIntegration(intRadFluxDens   , dy)
+        parElIntFlux  = productIntegration(parN   , parElVel , parWeights)
+        parIonIntFlux = productIntegration(parN   , parIonVel, parWeights)
+        perpIntFlux   = productIntegration(radialN, radialExB, perpWeights)
 
         # Integrating over time
         dt = time[1] - time[0]
-        timeIntRadFluxDens    = int2RadFluxDens   .sum()*dt
-        timeIntParElFluxDens  = int2ParElFluxDens .sum()*dt
-        timeIntParIonFluxDens = int2ParIonFluxDens.sum()*dt
+        timeIntEl   = parElIntFlux .sum()*dt
+        timeIntIon  = parIonIntFlux.sum()*dt
+        timeIntPerp = perpIntFlux  .sum()*dt
 
         # Storing
-        totalFluxes["parElIntFlux"]  = int2RadFluxDens   .flatten()
-        totalFluxes["parIonIntFlux"] = int2ParElFluxDens .flatten()
-        totalFluxes["perpIntFlux"]   = int2ParIonFluxDens.flatten()
-        totalFluxes["timeIntEl"]     = timeIntRadFluxDens
-        totalFluxes["timeIntIon"]    = timeIntParElFluxDens
-        totalFluxes["timeIntPerp"]   = timeIntParIonFluxDens
+        totalFluxes["parElIntFlux"]  = parElIntFlux
+        totalFluxes["parIonIntFlux"] = parIonIntFlux
+        totalFluxes["perpIntFlux"]   = perpIntFlux
+        totalFluxes["timeIntEl"]     = timeIntEl
+        totalFluxes["timeIntIon"]    = timeIntIon
+        totalFluxes["timeIntPerp"]   = timeIntPerp
         totalFluxes["time"]          = time
         totalFluxes["rho"]           = rho
         totalFluxes["z"]             = self._dh.z[self._yInd]
@@ -210,82 +186,66 @@ class CollectAndCalcTotalFlux(object):
     #}}}
 
     #{{{_collectAndCalcConstZ
-    def _collectAndCalcConstZ(self, varName):
+    def _collectAndCalcConstZ(self, varNames):
         #{{{docstring
         """
-        Collects and transforms a variable for a constant z
+        Collects and transforms variables for a constant z
 
         Parameters
         ----------
-        varName : str
-            The variable to collect.
+        varNames : tuple
+            The variables to collect (derived or not).
 
         Returns
         -------
-        var : array-4d
-            The collected variable
-        time : array-1d
-            The corresponding time
+        varDict : dict
+            Dictionary of the collected variables (array-4d).
         """
         #}}}
 
-        tInd = slicesToIndices(self._collectPaths[0], self._tSlice, "t")
-
-        # Collect phi
-        var = collectConstZ(self._collectPaths,\
-                            varName           ,\
-                            self._yInd        ,\
-                            tInd=self._tInd)
-
-        # Slice
-        if self._tSlice is not None:
-            if type(self._tSlice) == slice:
-                if self._tSlice.step is not None:
-                    var  = var [::self._tSlice.step]
+        varDict = collectDerived(self._collectPaths,\
+                                 varNames          ,\
+                                 yInd = self._yInd ,\
+                                 tInd = self._tInd)
 
         # Convert to physical units
         if self.convertToPhysical:
-            var = self.uc.physicalConversion(var, varName)
+            varDict = {varName : self.uc.physicalConversion(varDict[varName],\
+                                                            varName)\
+                       for varName in varNames}
 
-        return var
+        return varDict
     #}}}
 
     #{{{_collectAndCalcConstRho
-    def _collectAndCalcConstRho(self, varName):
+    def _collectAndCalcConstRho(self, varNames):
         #{{{docstring
         """
-        Collects and transforms a variable for a constant rho
+        Collects and transforms variables for a constant rho
 
         Parameters
         ----------
-        varName : str
-            The variable to collect.
+        varNames : tuple
+            The variables to collect (derived or not).
 
         Returns
         -------
-        var : array-4d
-            The collected variable
-        time : array-1d
-            The corresponding time
+        varDict : dict
+            Dictionary of the collected variables (array-4d).
         """
         #}}}
 
-        # Collect phi
-        var = collectConstRho(self._collectPaths,\
-                              varName           ,\
-                              self._xInd        ,\
-                              tInd = self._tInd)
-
-        # Slice
-        if self._tSlice is not None:
-            if type(self._tSlice) == slice:
-                if self._tSlice.step is not None:
-                    var  = var [::self._tSlice.step]
+        varDict = collectDerived(self._collectPaths,\
+                                 varNames          ,\
+                                 xInd = self._xInd ,\
+                                 tInd = self._tInd)
 
         # Convert to physical units
         if self.convertToPhysical:
-            var = self.uc.physicalConversion(var, varName)
+            varDict = {varName : self.uc.physicalConversion(varDict[varName],\
+                                                            varName)\
+                       for varName in varNames}
 
-        return var
+        return varDict
     #}}}
 #}}}
@@ -2,7 +2,7 @@
 
 """ Contains the UnitsConverter class """
 
-from ..collectAndCalcHelpers import safeCollect
+from ..collectAndCalcHelpers import getNormalizationParameter
 import scipy.constants as cst
 
 #{{{UnitsConverter
@@ -71,19 +71,17 @@ class UnitsConverter(object):
 
         # Caclulate mi from mu
         normalizerDict["mi"] =\
-                safeCollect("mu", path=self._path, info=False)*cst.m_e
+                getNormalizationParameter(self._path, "mu")*cst.m_e
 
         if self.convertToPhysical:
             # If no errors are encountered, the function returns normalizerDict
             try:
                 for normalizer in normalizers:
                     normalizerDict[normalizer] =\
-                           safeCollect(normalizer, path=self._path, info=False)
+                           getNormalizationParameter(self._path, normalizer)
 
                 # The collected Te0 is given in eV, we convert this to J
-                normalizerDict["Te0"].setflags(write=True)
                 normalizerDict["Te0"] *= cst.e
-                normalizerDict["Te0"].setflags(write=False)
 
                 return normalizerDict
 
@@ -218,6 +216,18 @@ class UnitsConverter(object):
                       "factor"       :self._normDict["rhoS"]*\
                                       self._normDict["omCI"],\
                      },\
+        # NOTE: The ExB velocities are derived from the normalized phi, rho
+        #       and B, which gives c_s as c_s^2 = T_{e,0}/m_i
+        "radialExB" :{"units"        :r"\mathrm{ms}^{-1}",\
+                      "normalization":r"/c_s",\
+                      "factor"       :self._normDict["rhoS"]*\
+                                      self._normDict["omCI"],\
+                     },\
+        "poloidalExB":{"units"       :r"\mathrm{ms}^{-1}",\
+                       "normalization":r"/c_s",\
+                       "factor"       :self._normDict["rhoS"]*\
+                                       self._normDict["omCI"],\
+                      },\
         "S"         :{"units"        :r"\mathrm{m}^{-3}\mathrm{s}^{-1}",\
                       "normalization":r"/\omega_{{ci}}n_0",\
                       "factor"       :self._normDict["omCI"]*\
@@ -6,6 +6,7 @@ from .analyticGrowthRates import analyticGrowthRatesPlot
 from .blobs import blobWaitingTimePulsePlot, blobTimeTracesPlot, blob2DPlot
 from .blobDensPDF import blobDensPDF
 from .combinedPlots import combinedPlotsPlot
+from .consolidateStore import consolidateStore
 from .fields1D import fields1DAnimation
 from .fields2D import fields2DAnimation
 from .fourierModes import fourierModesPlot
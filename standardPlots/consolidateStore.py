@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+
+"""Consolidates the dump files of a run into one store"""
+
+import os, sys
+# If we add to sys.path, then it must be an absolute path
+commonDir = os.path.abspath("./../common")
+# Sys path is a list of system paths
+sys.path.append(commonDir)
+
+from CELMAPy.collectAndCalcHelpers import writeStore
+
+#{{{consolidateStore
+def consolidateStore(collectPaths, chunks = "time"):
+    #{{{docstring
+    """
+    Writes the store which the collect helpers read from
+
+    Parameters
+    ----------
+    collectPaths : tuple
+        Tuple of the paths to collect from.
+    chunks : ["time"|"plane"|tuple]
+        The chunk shape of the store (see writeStore).
+    """
+    #}}}
+
+    writeStore(collectPaths, chunks = chunks)
+#}}}
@@ -12,6 +12,7 @@ commonDir = os.path.abspath("./../")
 sys.path.append(commonDir)
 
 from CELMAPy.driverHelpers import PBSSubmitter, pathMerger
+from CELMAPy.repairBrokenExit import scanDumpFolders, printReport
 from .analyticGrowthRates import analyticGrowthRatesPlot
 from .blobs import (blobRadialFlux          ,\
                     blobWaitingTimePulsePlot,\
@@ -19,6 +20,7 @@ from .blobs import (blobRadialFlux          ,\
                     blob2DPlot)
 from .blobDensPDF import blobDensPDF
 from .combinedPlots import combinedPlotsPlot
+from .consolidateStore import consolidateStore
 from .fields1D import fields1DAnimation
 from .fields2D import fields2DAnimation
 from .fourierModes import fourierModesPlot
@@ -79,7 +81,7 @@ class PlotSubmitter(object):
 
         # Ranges to loop over
         self._paramKeys = tuple(sorted(list(self._mergeFromLinear.keys())))
-        self._rangeJobs = range(len(self._paramKeys))
+        self._rangeJobs = tuple(range(len(self._paramKeys)))
 
         # Generate the submitter
         self.sub = PBSSubmitter()
@@ -153,6 +155,59 @@ class PlotSubmitter(object):
         self._satTurbTSlices = tSlices
     #}}}
 
+    #{{{skipBrokenRuns
+    def skipBrokenRuns(self, nWorkers = None):
+        #{{{docstring
+        """
+        Scans the dump folders, and removes the scan parameters with
+        broken dump folders from the jobs submitted hereafter.
+
+        Parameters
+        ----------
+        nWorkers : [None|int]
+            Number of processes scanning the files (see scanDumpFolders).
+
+        Returns
+        -------
+        broken : dict
+            Dictionary with the broken dump folders as keys and a tuple of
+            the found problems as values. The folders can be repaired
+            with repairBrokenExit.
+        """
+        #}}}
+
+        paths = tuple(path for key in self._paramKeys\
+                      for path in self._mergeAll[key])
+        report = scanDumpFolders(paths, nWorkers = nWorkers)
+        printReport(report)
+
+        broken = {path:problems for path, problems in report.items()\
+                  if len(problems) != 0}
+        keep = tuple(ind for ind, key in enumerate(self._paramKeys)\
+                     if not(any(path in broken\
+                                for path in self._mergeAll[key])))
+
+        if len(keep) == 0:
+            raise RuntimeError("All the runs are broken")
+
+        # Remove the broken scan parameters
+        nParams = len(self._paramKeys)
+        for phase, folders in self._dmpFolders.items():
+            if len(folders) == nParams:
+                self._dmpFolders[phase] = [folders[ind] for ind in keep]
+        for merged in (self._mergeAll,\
+                       self._mergeInitAndExpand,\
+                       self._mergeFromLinear):
+            for ind in range(nParams):
+                if ind not in keep:
+                    merged.pop(self._paramKeys[ind])
+        # NOTE: The job numbers are kept
+        self._paramKeys = tuple(self._paramKeys[ind] for ind in keep)
+        self._rangeJobs = tuple(self._rangeJobs[ind] for ind in keep)
+
+        return broken
+    #}}}
+
     #{{{updatePlotSuperKwargs
     def updatePlotSuperKwargs(self, updateDict):
         #{{{docstring
@@ -315,7 +370,7 @@ class PlotSubmitter(object):
 
         # NOTE: The ordering of param is in descending order (because of the
         #       organization in PBSScan)
-        dmp_folders = (self._mergeFromLinear["param0"][-1],)
+        dmp_folders = (self._mergeFromLinear[self._paramKeys[0]][-1],)
         steadyStatePaths = self._dmpFolders["expand"]
 
         # Local modification of plotSuperKwargs
@@ -332,6 +387,28 @@ class PlotSubmitter(object):
         self.sub.submitFunction(analyticGrowthRatesPlot, args=args)
     #}}}
 
+    #{{{runConsolidateStore
+    def runConsolidateStore(self, chunks = "time"):
+        #{{{docstring
+        """
+        Consolidates the runs from the linear phase into stores, which
+        are read by the collect helpers of the later plots.
+
+        Parameters
+        ----------
+        chunks : ["time"|"plane"|tuple]
+            The chunk shape of the stores (see writeStore).
+        """
+        #}}}
+
+        for key, nr in zip(self._paramKeys, self._rangeJobs):
+            collectPaths = self._mergeFromLinear[key]
+            args   = (collectPaths,)
+            kwargs = {"chunks":chunks}
+            self.sub.setJobName("consolidateStore{}".format(nr))
+            self.sub.submitFunction(consolidateStore, args=args, kwargs=kwargs)
+    #}}}
+
     #{{{runEnergy
     def runEnergy(self, sliced=False):
         """
@@ -478,7 +555,7 @@ class PlotSubmitter(object):
 
         # NOTE: The ordering of param is in descending order (because of the
         #       organization in PBSScan)
-        dmp_folders = (self._mergeFromLinear["param0"][-1],)
+        dmp_folders = (self._mergeFromLinear[self._paramKeys[0]][-1],)
         keys = tuple(sorted(list(self._mergeFromLinear.keys())))
         scanCollectPaths = tuple(self._mergeFromLinear[key] for key in keys)
         steadyStatePaths = self._dmpFolders["expand"]
@@ -666,7 +743,7 @@ class PlotSubmitter(object):
 
         # NOTE: The ordering of param is in descending order (because of the
         #       organization in PBSScan)
-        dmp_folders = (self._mergeFromLinear["param0"][-1],)
+        dmp_folders = (self._mergeFromLinear[self._paramKeys[0]][-1],)
         keys = tuple(sorted(list(self._mergeFromLinear.keys())))
         scanCollectPaths = tuple(self._mergeFromLinear[key] for key in keys)
         steadyStatePaths = self._dmpFolders["expand"]
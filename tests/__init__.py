@@ -0,0 +1,3 @@
+#!/usr/bin/env python
+
+""" Init for the tests """
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+"""
+Contains the fixtures of the tests
+"""
+
+import pytest
+import shutil
+import os
+
+pytest.importorskip("boutdata")
+pytest.importorskip("netCDF4")
+
+from .dmpFactory import makeRun
+from CELMAPy.collectAndCalcHelpers import clearDerivedMemo, setCache
+
+#{{{runPaths
+@pytest.fixture(scope="session")
+def runPaths(tmp_path_factory):
+    """The paths of a synthetic run which must not be modified."""
+    return makeRun(str(tmp_path_factory.mktemp("run")))
+#}}}
+
+#{{{copiedRunPaths
+@pytest.fixture
+def copiedRunPaths(runPaths, tmp_path):
+    """The paths of a copy of the synthetic run which may be modified."""
+    paths = []
+    for path in runPaths:
+        copy = os.path.join(str(tmp_path), os.path.basename(path))
+        shutil.copytree(path, copy)
+        paths.append(copy)
+    return tuple(paths)
+#}}}
+
+#{{{resetCaches
+@pytest.fixture(autouse=True)
+def resetCaches():
+    """Disables the result cache and empties the derived memo."""
+    setCache(None)
+    clearDerivedMemo()
+    yield
+    setCache(None)
+    clearDerivedMemo()
+#}}}
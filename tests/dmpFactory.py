@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+
+"""
+Contains functions which writes small synthetic dump folders and the
+reference collect of them
+"""
+
+from boutdata import collect
+import numpy as np
+import os
+
+netCDF4 = None
+
+# The processor layout of the synthetic runs
+LAYOUT = {"NXPE" : 2, "NYPE" : 3, "MXSUB" : 3, "MYSUB" : 2,\
+          "MXG"  : 2, "MYG"  : 1, "nz"    : 4}
+# The number of time points of each restart segment
+# NOTE: The first time point of a segment repeats the last of the
+#       previous segment
+SEGMENT_LENGTHS = (5, 4, 6)
+# The time dependent fields of the synthetic runs
+FIELDS = ("lnN", "phi", "momDensPar", "jPar")
+
+#{{{makeRun
+def makeRun(basePath, seed = 0):
+    #{{{docstring
+    """
+    Writes a run of several restart segments with several processors.
+
+    The fields are random, but continuous over the segments, so that
+    the duplicated time points of the segments are equal.
+
+    Parameters
+    ----------
+    basePath : str
+        The folder to write the segments to.
+    seed : int
+        The seed of the random fields.
+
+    Returns
+    -------
+    paths : tuple
+        The paths of the segments in ascending order of the time.
+    """
+    #}}}
+
+    nt = sum(SEGMENT_LENGTHS) - (len(SEGMENT_LENGTHS) - 1)
+    nx = LAYOUT["NXPE"]*LAYOUT["MXSUB"] + 2*LAYOUT["MXG"]
+    ny = LAYOUT["NYPE"]*LAYOUT["MYSUB"] + 2*LAYOUT["MYG"]
+    nz = LAYOUT["nz"]
+
+    rng    = np.random.RandomState(seed)
+    fields = {var: rng.normal(size=(nt, nx, ny, nz)) for var in FIELDS}
+    static = rng.normal(size=(nx, ny, nz))
+    energy = rng.normal(size=nt)
+
+    paths = []
+    first = 0
+    for segNr, segLen in enumerate(SEGMENT_LENGTHS):
+        path = os.path.join(basePath, "seg{}".format(segNr))
+        tSlice = slice(first, first + segLen)
+        writeDmpFolder(path                                              ,\
+                       np.arange(first, first + segLen, dtype=float)      ,\
+                       {var: field[tSlice] for var, field in fields.items()},\
+                       static                                            ,\
+                       energy[tSlice])
+        paths.append(path)
+        first += segLen - 1
+
+    return tuple(paths)
+#}}}
+
+#{{{writeDmpFolder
+def writeDmpFolder(path, tArray, fields, static, energy):
+    #{{{docstring
+    """
+    Writes the processor files of one restart segment.
+
+    Parameters
+    ----------
+    path : str
+        The folder to write to.
+    tArray : array-1d
+        The time of the segment.
+    fields : dict
+        The global 4d fields (including the ghost points).
+    static : array-3d
+        A global time independent field.
+    energy : array-1d
+        A time trace.
+    """
+    #}}}
+
+    global netCDF4
+    if netCDF4 is None:
+        import netCDF4
+
+    os.makedirs(path, exist_ok=True)
+
+    MXSUB, MYSUB = LAYOUT["MXSUB"], LAYOUT["MYSUB"]
+    MXG  , MYG   = LAYOUT["MXG"]  , LAYOUT["MYG"]
+    nz           = LAYOUT["nz"]
+    ny           = LAYOUT["NYPE"]*MYSUB + 2*MYG
+    header = {"NXPE" : LAYOUT["NXPE"], "NYPE" : LAYOUT["NYPE"],\
+              "MXSUB": MXSUB, "MYSUB": MYSUB, "MXG" : MXG, "MYG" : MYG,\
+              "MZ"   : nz, "NZPE" : 1, "MZSUB" : nz, "MZG" : 0,\
+              "nx"   : LAYOUT["NXPE"]*MXSUB + 2*MXG, "ny" : ny, "nz" : nz,\
+              "ny_inner" : ny, "jyseps1_1" : -1, "jyseps2_1" : ny//2,\
+              "jyseps1_2" : ny//2, "jyseps2_2" : ny - 1,\
+              "BOUT_VERSION" : 4.0, "mu" : 1836.0, "omCI" : 1e6,\
+              "rhoS" : 0.01, "n0" : 1e18, "Te0" : 10.0}
+
+    for proc in range(LAYOUT["NXPE"]*LAYOUT["NYPE"]):
+        xProc = proc % LAYOUT["NXPE"]
+        yProc = proc // LAYOUT["NXPE"]
+        xs    = slice(xProc*MXSUB, (xProc + 1)*MXSUB + 2*MXG)
+        ys    = slice(yProc*MYSUB, (yProc + 1)*MYSUB + 2*MYG)
+
+        fileName = os.path.join(path, "BOUT.dmp.{}.nc".format(proc))
+        with netCDF4.Dataset(fileName, "w", format="NETCDF3_CLASSIC") as f:
+            f.createDimension("t", None)
+            f.createDimension("x", MXSUB + 2*MXG)
+            f.createDimension("y", MYSUB + 2*MYG)
+            f.createDimension("z", nz)
+
+            for key, value in header.items():
+                dtype = "f8" if isinstance(value, float) else "i4"
+                f.createVariable(key, dtype, ())[...] = value
+
+            f.createVariable("t_array", "f8", ("t",))[:] = tArray
+            for var, field in fields.items():
+                f.createVariable(var, "f8", ("t", "x", "y", "z"))[:] =\
+                    field[:, xs, ys, :]
+            f.createVariable("static", "f8", ("x", "y", "z"))[:] =\
+                static[xs, ys, :]
+            f.createVariable("energy", "f8", ("t",))[:] = energy
+            f.createVariable("dx", "f8", ("x", "y"))[:] = 0.5
+            f.createVariable("dy", "f8", ("x", "y"))[:] = 0.25
+            f.createVariable("dz", "f8", ())[...] = 2*np.pi/nz
+#}}}
+
+#{{{collectReference
+def collectReference(paths, varName, collectGhost = False, tInd = None,\
+                     xInd = None, yInd = None, zInd = None):
+    #{{{docstring
+    """
+    Collects a variable with boutdata.collect.
+
+    The segments are collected one by one, and are concatenated without
+    the duplicated time points before the time is sliced.
+
+    Parameters
+    ----------
+    paths : tuple
+        The paths of the segments.
+    varName : str
+        The variable to collect.
+    collectGhost : bool
+        If the ghost points are to be collected.
+    tInd : [None|tuple]
+        Start and end (inclusive), and optionally the step of the time.
+    xInd : [None|tuple]
+        Start and end (inclusive) of x.
+    yInd : [None|tuple]
+        Start and end (inclusive) of y.
+    zInd : [None|tuple]
+        Start and end (inclusive) of z.
+
+    Returns
+    -------
+    var : array-4d
+        The collected variable.
+    """
+    #}}}
+
+    segments = []
+    for segNr, path in enumerate(paths):
+        var = collect(varName                                  ,\
+                      path    = path                           ,\
+                      xind    = None if xInd is None else list(xInd),\
+                      yind    = None if yInd is None else list(yInd),\
+                      zind    = None if zInd is None else list(zInd),\
+                      xguards = collectGhost                   ,\
+                      yguards = collectGhost                   ,\
+                      info    = False)
+        var = np.asarray(var)
+        if var.ndim == 1:
+            var = var[:, np.newaxis, np.newaxis, np.newaxis]
+        segments.append(var if segNr == 0 else var[1:])
+    var = np.concatenate(segments, axis=0)
+
+    if tInd is not None:
+        step = tInd[2] if len(tInd) > 2 else None
+        var  = var[tInd[0]:tInd[1] + 1:step]
+
+    return var
+#}}}
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+
+"""
+Tests the consolidated HDF5 store of a run
+"""
+
+import pytest
+
+pytest.importorskip("h5py")
+
+from .dmpFactory import collectReference
+from CELMAPy.collectAndCalcHelpers import collectiveCollect, writeStore
+from CELMAPy.collectAndCalcHelpers.storeReader import readStore
+import numpy as np
+import netCDF4
+import os
+
+#{{{test_writeStore
+@pytest.mark.parametrize("chunks", ("time", "plane"))
+@pytest.mark.parametrize("collectGhost", (False, True))
+def test_writeStore(copiedRunPaths, chunks, collectGhost):
+    """Checks that the store is read and equals the dump files."""
+    fileName = writeStore(copiedRunPaths, chunks = chunks, blockSize = 4)
+    assert os.path.isfile(fileName)
+
+    window = {"collectGhost" : collectGhost, "tInd" : (2, 12, 3),\
+              "xInd"         : (1, 4)      , "zInd" : (1, 2)}
+    assert "phi" in readStore(copiedRunPaths, ("phi",), **window)
+
+    data = collectiveCollect(copiedRunPaths, ("phi", "energy"), **window)
+    for var in ("phi", "energy"):
+        expected = collectReference(copiedRunPaths, var, **window)
+        assert np.array_equal(data[var], expected)
+#}}}
+
+#{{{test_storeBypassedWhenModified
+def test_storeBypassedWhenModified(copiedRunPaths):
+    """Checks that the store is not read once a processor file changes."""
+    writeStore(copiedRunPaths, blockSize = 4)
+    assert "lnN" in readStore(copiedRunPaths, ("lnN",))
+
+    # Modify a processor file which is not the first
+    fileName = os.path.join(copiedRunPaths[1], "BOUT.dmp.3.nc")
+    with netCDF4.Dataset(fileName, "a") as f:
+        f["lnN"][:] = f["lnN"][:] + 100
+
+    assert readStore(copiedRunPaths, ("lnN",)) == {}
+
+    data     = collectiveCollect(copiedRunPaths, ("lnN",))
+    expected = collectReference(copiedRunPaths, "lnN")
+    assert np.array_equal(data["lnN"], expected)
+#}}}
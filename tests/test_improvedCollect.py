@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+
+"""
+Tests collectiveCollect and iterCollect against boutdata.collect
+"""
+
+from .dmpFactory import collectReference
+from CELMAPy.collectAndCalcHelpers import (collectiveCollect,\
+                                           collectTime,\
+                                           iterCollect,\
+                                           readDmpFolder)
+import numpy as np
+import pytest
+
+# The windows on the form (xInd, yInd, zInd) which are collected
+# NOTE: The windows cross the processor boundaries
+WINDOWS = ((None  , None  , None  ),\
+           ((0, 0), (0, 0), (0, 0)),\
+           ((1, 4), (2, 5), None  ),\
+           ((2, 2), None  , (1, 2)),\
+           (None  , (1, 1), (3, 3)))
+# The time ranges collected, where the third element is the step
+T_INDS = (None, (0, 12), (2, 9), (4, 4), (3, 11, 3), (0, 12, 5))
+
+#{{{test_collectiveCollect
+@pytest.mark.parametrize("collectGhost", (False, True))
+@pytest.mark.parametrize("window", WINDOWS)
+@pytest.mark.parametrize("tInd", T_INDS)
+def test_collectiveCollect(runPaths, collectGhost, window, tInd):
+    """Compares the collected fields with boutdata.collect."""
+    xInd, yInd, zInd = window
+    data = collectiveCollect(runPaths, ("lnN", "phi")    ,\
+                             collectGhost = collectGhost,\
+                             tInd = tInd, xInd = xInd   ,\
+                             yInd = yInd, zInd = zInd)
+
+    for var in ("lnN", "phi"):
+        expected = collectReference(runPaths, var, collectGhost,\
+                                    tInd, xInd, yInd, zInd)
+        assert data[var].shape == expected.shape
+        assert np.array_equal(data[var], expected)
+        assert not(data[var].flags.writeable)
+#}}}
+
+#{{{test_collectiveCollectTimeTraces
+@pytest.mark.parametrize("tInd", T_INDS)
+def test_collectiveCollectTimeTraces(runPaths, tInd):
+    """Compares the time and the time traces with boutdata.collect."""
+    data = collectiveCollect(runPaths, ("energy",), tInd = tInd)
+
+    expected = collectReference(runPaths, "energy", tInd = tInd)
+    assert np.array_equal(data["energy"], expected)
+
+    time = collectReference(runPaths, "t_array", tInd = tInd)
+    assert np.array_equal(collectTime(runPaths, tInd), time[:,0,0,0])
+#}}}
+
+#{{{test_collectiveCollectStatic
+def test_collectiveCollectStatic(runPaths):
+    """Checks that the time independent fields are broadcast in time."""
+    data = collectiveCollect(runPaths, ("static",), tInd = (2, 9, 3),\
+                             xInd = (1, 4))
+
+    expected = collectReference(runPaths[:1], "static", xInd = (1, 4))
+    assert data["static"].shape == (3, *expected.shape)
+    assert np.array_equal(data["static"],\
+                          np.broadcast_to(expected, data["static"].shape))
+#}}}
+
+#{{{test_collectiveCollectOptions
+@pytest.mark.parametrize("kwargs", ({"nWorkers"      : 2},\
+                                    {"prefetchDepth" : 0},\
+                                    {"prefetchDepth" : 2},\
+                                    {"scratchDir"    : "scratch"}))
+def test_collectiveCollectOptions(runPaths, tmp_path, kwargs):
+    """Checks that the ways of reading give the same result."""
+    if "scratchDir" in kwargs:
+        kwargs = {"scratchDir" : str(tmp_path)}
+
+    data = collectiveCollect(runPaths, ("lnN",), collectGhost = True,\
+                             tInd = (1, 11, 2), yInd = (1, 6), **kwargs)
+
+    expected = collectReference(runPaths, "lnN", True, (1, 11, 2),\
+                                yInd = (1, 6))
+    assert np.array_equal(data["lnN"], expected)
+#}}}
+
+#{{{test_collectiveCollectOut
+def test_collectiveCollectOut(runPaths):
+    """Checks that the fields are written into the given arrays."""
+    expected = collectReference(runPaths, "phi", xInd = (1, 4))
+    out      = np.empty_like(expected)
+
+    data = collectiveCollect(runPaths, ("phi",), xInd = (1, 4),\
+                             out = {"phi" : out})
+
+    assert data["phi"] is out
+    assert np.array_equal(out, expected)
+#}}}
+
+#{{{test_collectiveCollectFloat32
+def test_collectiveCollectFloat32(runPaths):
+    """Checks the single precision collect."""
+    data = collectiveCollect(runPaths, ("lnN",), dtype = np.float32)
+
+    expected = collectReference(runPaths, "lnN")
+    assert data["lnN"].dtype == np.float32
+    assert np.array_equal(data["lnN"], expected.astype(np.float32))
+#}}}
+
+#{{{test_readDmpFolder
+@pytest.mark.parametrize("collectGhost", (False, True))
+@pytest.mark.parametrize("window", WINDOWS)
+def test_readDmpFolder(runPaths, collectGhost, window):
+    """Compares the read of one segment with boutdata.collect."""
+    xInd, yInd, zInd = window
+    data, _ = readDmpFolder(runPaths[1], ("jPar",)     ,\
+                            collectGhost = collectGhost,\
+                            tInd = (1, 2), xInd = xInd ,\
+                            yInd = yInd, zInd = zInd)
+
+    expected = collectReference(runPaths[1:2], "jPar", collectGhost,\
+                                (1, 2), xInd, yInd, zInd)
+    assert np.array_equal(data["jPar"], expected)
+#}}}
+
+#{{{test_iterCollect
+@pytest.mark.parametrize("chunkSize", (1, 3, 5, 20))
+@pytest.mark.parametrize("tInd", (None, (2, 11), (1, 12, 2)))
+def test_iterCollect(runPaths, chunkSize, tInd):
+    """Checks that the blocks are continuous over the segments."""
+    times  = []
+    blocks = []
+    for time, data in iterCollect(runPaths, ("momDensPar",), chunkSize,\
+                                  tInd = tInd, xInd = (1, 4)):
+        assert len(time) <= chunkSize
+        times .append(time)
+        blocks.append(data["momDensPar"])
+
+    expected = collectReference(runPaths, "momDensPar", tInd = tInd,\
+                                xInd = (1, 4))
+    assert np.array_equal(np.concatenate(blocks), expected)
+    assert np.array_equal(np.concatenate(times), collectTime(runPaths, tInd))
+#}}}
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+"""
+Tests the lazily collected LazyField against boutdata.collect
+"""
+
+from .dmpFactory import collectReference
+from CELMAPy.collectAndCalcHelpers import collectLazy, setCollectDtype
+import numpy as np
+import pytest
+
+# The slices of the tests
+KEYS = ((slice(None),),\
+        (slice(1, 9, 2), 2, slice(None), 0),\
+        (-1, slice(1, 5), slice(None, None, -1), slice(1, 3)),\
+        (slice(10, 2, -3), Ellipsis, 3),\
+        (4, 0, 0, 0))
+
+#{{{test_lazyField
+@pytest.mark.parametrize("collectGhost", (False, True))
+@pytest.mark.parametrize("key", KEYS)
+def test_lazyField(runPaths, collectGhost, key):
+    """Compares the slices with the slices of the collected field."""
+    field    = collectLazy(runPaths, "phi", collectGhost = collectGhost)
+    expected = collectReference(runPaths, "phi", collectGhost)
+
+    assert field.shape == expected.shape
+    assert np.array_equal(field[key], expected[key])
+    assert np.array_equal(np.asarray(field), expected)
+#}}}
+
+#{{{test_lazyFieldTimeTrace
+def test_lazyFieldTimeTrace(runPaths):
+    """Checks that the time traces are presented as 4d fields."""
+    field    = collectLazy(runPaths, "energy")
+    expected = collectReference(runPaths, "energy")
+
+    assert field.shape == expected.shape
+    assert np.array_equal(field[2:11:4], expected[2:11:4])
+#}}}
+
+#{{{test_lazyFieldEmpty
+def test_lazyFieldEmpty(runPaths):
+    """Checks that an empty slice has the shape and type of numpy."""
+    setCollectDtype(np.float32)
+    try:
+        field = collectLazy(runPaths, "lnN")
+        empty = field[3:3, 1]
+    finally:
+        setCollectDtype(float)
+
+    assert empty.shape == np.empty(field.shape)[3:3, 1].shape
+    assert empty.dtype == np.float32
+#}}}
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+
+"""
+Tests the on disk result cache of collectiveCollect
+"""
+
+from .dmpFactory import collectReference
+from CELMAPy.collectAndCalcHelpers import collectiveCollect, setCache
+import numpy as np
+import netCDF4
+import os
+
+#{{{test_resultCache
+def test_resultCache(copiedRunPaths, tmp_path):
+    """Checks that the cached results are up to date with the files."""
+    cacheDir = os.path.join(str(tmp_path), "cache")
+    setCache(cacheDir)
+    window = {"tInd" : (1, 11), "xInd" : (1, 4)}
+
+    first = collectiveCollect(copiedRunPaths, ("lnN",), **window)["lnN"]
+    assert len(os.listdir(cacheDir)) == 1
+
+    cached = collectiveCollect(copiedRunPaths, ("lnN",), **window)["lnN"]
+    assert isinstance(cached, np.memmap)
+    assert np.array_equal(cached, first)
+
+    # Modify a processor file which is not the first
+    fileName = os.path.join(copiedRunPaths[1], "BOUT.dmp.3.nc")
+    with netCDF4.Dataset(fileName, "a") as f:
+        f["lnN"][:] = f["lnN"][:] + 100
+
+    modified = collectiveCollect(copiedRunPaths, ("lnN",), **window)["lnN"]
+    expected = collectReference(copiedRunPaths, "lnN", **window)
+    assert np.array_equal(modified, expected)
+    assert not(np.array_equal(modified, first))
+#}}}
+
+#{{{test_resultCacheDisabled
+def test_resultCacheDisabled(runPaths, tmp_path):
+    """Checks that nothing is stored when the cache is disabled."""
+    cacheDir = os.path.join(str(tmp_path), "cache")
+    setCache(cacheDir)
+    setCache(None)
+
+    collectiveCollect(runPaths, ("phi",))
+    assert not(os.path.exists(cacheDir))
+#}}}